@@ -0,0 +1,31 @@
+"""add_external_id_to_menus
+
+Revision ID: a9c4e1f7b250
+Revises: f3b8d2a6c417
+Create Date: 2026-10-19 16:41:05.372915
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9c4e1f7b250"
+down_revision: Union[str, None] = "f3b8d2a6c417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("menus", sa.Column("external_id", sa.String(100), nullable=True))
+    op.create_unique_constraint(
+        "uq_menus_store_external_id", "menus", ["store_id", "external_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_menus_store_external_id", "menus", type_="unique")
+    op.drop_column("menus", "external_id")
@@ -0,0 +1,147 @@
+"""partition_menu_change_logs_by_month
+
+Revision ID: b5d18e3c9f62
+Revises: a9c4e1f7b250
+Create Date: 2026-10-19 18:12:44.905361
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d18e3c9f62"
+down_revision: Union[str, None] = "a9c4e1f7b250"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARENT_TABLE = "menu_change_logs"
+
+COLUMNS = (
+    "id, menu_id, store_id, user_id, action, field_name, "
+    "old_value, new_value, changes, changed_at"
+)
+
+# 店舗ごとの期間指定・新しい順のキーセットページネーション用
+STORE_CHANGED_AT_INDEX = "ix_menu_change_logs_store_changed_at"
+
+SECONDARY_INDEXES = (
+    ("ix_menu_change_logs_menu_id", "menu_id"),
+    ("ix_menu_change_logs_user_id", "user_id"),
+    ("ix_menu_change_logs_action", "action"),
+    ("ix_menu_change_logs_changed_at", "changed_at"),
+)
+
+# 先行して作成する将来の月パーティションの数（マイグレーション作成時点の値で固定）
+MONTHS_AHEAD = 3
+
+
+# マイグレーションの内容が後のアプリのコード変更で変わらないよう、
+# パーティションの補助関数はアプリのモジュールから読み込まずにここで定義する
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition_sql(table_name: str, month: date, parent: str) -> str:
+    name = f"{table_name}_y{month.year:04d}m{month.month:02d}"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def _create_table_sql(table: str, partitioned: bool) -> str:
+    primary_key = "PRIMARY KEY (id, changed_at)" if partitioned else "PRIMARY KEY (id)"
+    partition_by = " PARTITION BY RANGE (changed_at)" if partitioned else ""
+    return f"""
+        CREATE TABLE {table} (
+            id INTEGER NOT NULL DEFAULT nextval('menu_change_logs_id_seq'),
+            menu_id INTEGER NOT NULL REFERENCES menus(id) ON DELETE CASCADE,
+            store_id INTEGER NOT NULL REFERENCES stores(id) ON DELETE CASCADE,
+            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+            action VARCHAR(50) NOT NULL,
+            field_name VARCHAR(100),
+            old_value TEXT,
+            new_value TEXT,
+            changes JSON,
+            changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            {primary_key}
+        ){partition_by}
+    """
+
+
+def _create_indexes() -> None:
+    op.execute(
+        f"CREATE INDEX {STORE_CHANGED_AT_INDEX} "
+        f"ON {PARENT_TABLE} (store_id, changed_at DESC, id DESC)"
+    )
+    for name, column in SECONDARY_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {PARENT_TABLE} ({column})")
+
+
+def _replace_table(partitioned: bool) -> None:
+    """監査ログのテーブルを作り直し、既存の行を移す"""
+    new_table = f"{PARENT_TABLE}_new"
+    # 旧テーブルの削除で採番シーケンスが消えないよう所有を外す
+    op.execute("ALTER SEQUENCE menu_change_logs_id_seq OWNED BY NONE")
+    op.execute(_create_table_sql(new_table, partitioned))
+
+    if partitioned:
+        # 既存データの最古の月から先行作成分までの月パーティションを作成
+        oldest = op.get_bind().execute(
+            sa.text(f"SELECT min(changed_at) FROM {PARENT_TABLE}")
+        ).scalar()
+        current = _month_start(date.today())
+        month = _month_start(oldest.date()) if oldest else current
+        last = _add_months(current, MONTHS_AHEAD)
+        while month <= last:
+            op.execute(_create_partition_sql(PARENT_TABLE, month, new_table))
+            month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {PARENT_TABLE}_default "
+            f"PARTITION OF {new_table} DEFAULT"
+        )
+
+    op.execute(
+        f"INSERT INTO {new_table} ({COLUMNS}) "
+        f"SELECT id, menu_id, store_id, user_id, action, field_name, old_value, "
+        f"new_value, changes, COALESCE(changed_at, now()) FROM {PARENT_TABLE}"
+    )
+    op.execute(f"DROP TABLE {PARENT_TABLE}")
+    op.execute(f"ALTER TABLE {new_table} RENAME TO {PARENT_TABLE}")
+    op.execute(f"ALTER SEQUENCE menu_change_logs_id_seq OWNED BY {PARENT_TABLE}.id")
+    _create_indexes()
+
+
+def upgrade() -> None:
+    """監査ログを changed_at の月単位でレンジパーティション分割（PostgreSQLのみ）"""
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(
+            STORE_CHANGED_AT_INDEX,
+            PARENT_TABLE,
+            ["store_id", sa.text("changed_at DESC"), sa.text("id DESC")],
+        )
+        op.drop_index("ix_menu_change_logs_store_id", table_name=PARENT_TABLE)
+        return
+    _replace_table(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index("ix_menu_change_logs_store_id", PARENT_TABLE, ["store_id"])
+        op.drop_index(STORE_CHANGED_AT_INDEX, table_name=PARENT_TABLE)
+        return
+    _replace_table(partitioned=False)
+    op.execute(f"CREATE INDEX ix_menu_change_logs_id ON {PARENT_TABLE} (id)")
+    op.execute(f"CREATE INDEX ix_menu_change_logs_store_id ON {PARENT_TABLE} (store_id)")
+    op.execute(f"DROP INDEX {STORE_CHANGED_AT_INDEX}")
@@ -0,0 +1,137 @@
+"""partition_orders_by_month
+
+Revision ID: c7e2f4a8d913
+Revises: b5d18e3c9f62
+Create Date: 2026-10-19 19:05:21.640187
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2f4a8d913"
+down_revision: Union[str, None] = "b5d18e3c9f62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "orders"
+
+COLUMNS = (
+    "id, user_id, menu_id, store_id, quantity, total_price, status, "
+    "delivery_time, notes, ordered_at, updated_at"
+)
+
+# 店舗別の日付範囲検索用（パーティションごとに作成される）
+STORE_ORDERED_INDEX = "ix_orders_store_ordered"
+
+INDEXES = (
+    (STORE_ORDERED_INDEX, "store_id, ordered_at"),
+    ("ix_orders_store_id", "store_id"),
+    ("ix_orders_status", "status"),
+    ("ix_orders_ordered_at", "ordered_at"),
+)
+
+# 先行して作成する将来の月パーティションの数（マイグレーション作成時点の値で固定）
+MONTHS_AHEAD = 3
+
+
+# マイグレーションの内容が後のアプリのコード変更で変わらないよう、
+# パーティションの補助関数はアプリのモジュールから読み込まずにここで定義する
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition_sql(table_name: str, month: date, parent: str) -> str:
+    name = f"{table_name}_y{month.year:04d}m{month.month:02d}"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def _create_table_sql(table: str, partitioned: bool) -> str:
+    primary_key = "PRIMARY KEY (id, ordered_at)" if partitioned else "PRIMARY KEY (id)"
+    partition_by = " PARTITION BY RANGE (ordered_at)" if partitioned else ""
+    return f"""
+        CREATE TABLE {table} (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            menu_id INTEGER NOT NULL REFERENCES menus(id),
+            store_id INTEGER NOT NULL REFERENCES stores(id) ON DELETE CASCADE,
+            quantity INTEGER NOT NULL,
+            total_price INTEGER NOT NULL,
+            status VARCHAR(50),
+            delivery_time TIME WITHOUT TIME ZONE,
+            notes TEXT,
+            ordered_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            {primary_key}
+        ){partition_by}
+    """
+
+
+def _replace_table(partitioned: bool) -> None:
+    """注文テーブルを作り直し、既存の行を移す"""
+    new_table = f"{TABLE}_new"
+    # 旧テーブルの削除で採番シーケンスが消えないよう所有を外す
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute(_create_table_sql(new_table, partitioned))
+
+    if partitioned:
+        # 既存データの最古の月から先行作成分までの月パーティションを作成
+        oldest = op.get_bind().execute(
+            sa.text(f"SELECT min(ordered_at) FROM {TABLE}")
+        ).scalar()
+        current = _month_start(date.today())
+        month = _month_start(oldest.date()) if oldest else current
+        last = _add_months(current, MONTHS_AHEAD)
+        while month <= last:
+            op.execute(_create_partition_sql(TABLE, month, new_table))
+            month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {TABLE}_default "
+            f"PARTITION OF {new_table} DEFAULT"
+        )
+
+    op.execute(
+        f"INSERT INTO {new_table} ({COLUMNS}) "
+        f"SELECT id, user_id, menu_id, store_id, quantity, total_price, status, "
+        f"delivery_time, notes, COALESCE(ordered_at, now()), updated_at FROM {TABLE}"
+    )
+    op.execute(f"DROP TABLE {TABLE}")
+    op.execute(f"ALTER TABLE {new_table} RENAME TO {TABLE}")
+    op.execute(f"ALTER SEQUENCE orders_id_seq OWNED BY {TABLE}.id")
+    # 親テーブルに作成したインデックスは各パーティションにも作成される
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {TABLE} ({columns})")
+
+
+def upgrade() -> None:
+    """注文を ordered_at の月単位でレンジパーティション分割（PostgreSQLのみ）"""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        index_names = [index["name"] for index in sa.inspect(bind).get_indexes(TABLE)]
+        if STORE_ORDERED_INDEX not in index_names:
+            op.create_index(STORE_ORDERED_INDEX, TABLE, ["store_id", "ordered_at"])
+        return
+    _replace_table(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(STORE_ORDERED_INDEX, table_name=TABLE)
+        return
+    _replace_table(partitioned=False)
+    op.execute(f"CREATE INDEX ix_orders_id ON {TABLE} (id)")
+    op.execute(f"DROP INDEX {STORE_ORDERED_INDEX}")
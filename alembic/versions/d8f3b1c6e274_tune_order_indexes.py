@@ -0,0 +1,113 @@
+"""tune_order_indexes
+
+Revision ID: d8f3b1c6e274
+Revises: c7e2f4a8d913
+Create Date: 2026-10-19 20:14:37.218604
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f3b1c6e274"
+down_revision: Union[str, None] = "c7e2f4a8d913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "orders"
+
+ACTIVE_PREDICATE = "status <> 'cancelled'"
+
+# 注文履歴（get_my_orders）が参照する列。自由記述の notes は索引を肥大化させるため含めず、
+# 1ページ分だけテーブルから読む
+# （パーティション化で主キーは (id, ordered_at) になり、id は索引に含まれないため明示する）
+USER_ORDERED_INCLUDE = [
+    "id",
+    "menu_id",
+    "quantity",
+    "total_price",
+    "status",
+    "delivery_time",
+    "updated_at",
+]
+
+# ix_orders_store_ordered (store_id, ordered_at) の先頭列と重複、
+# または status 単独では選択性が低く使われないインデックス
+REDUNDANT_INDEXES = (
+    ("ix_orders_store_id", ["store_id"]),
+    ("ix_orders_status", ["status"]),
+)
+
+
+# 002_add_performance_indexes の複合インデックス。ix_orders_store_ordered と
+# ix_orders_store_ordered_active で代替できる。通常は 2f4aeea60b82 で削除済みだが、
+# 手動で作り直された環境に残っていれば削除する（downgrade では作り直さない）
+SUPERSEDED_INDEXES = ("ix_orders_store_status", "ix_orders_store_ordered_status")
+
+
+def _index_names(bind) -> set:
+    return {index["name"] for index in sa.inspect(bind).get_indexes(TABLE)}
+
+
+def upgrade() -> None:
+    """注文のインデックスを実際のホットクエリに合わせて再構成"""
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    # 全店舗の日付範囲検索: PostgreSQL では B-tree を BRIN に置き換える
+    # （ordered_at は挿入順に増えるため、数ページの索引で範囲を絞り込める）
+    if is_postgresql:
+        op.drop_index("ix_orders_ordered_at", table_name=TABLE)
+        op.create_index(
+            "ix_orders_ordered_at", TABLE, ["ordered_at"], postgresql_using="brin"
+        )
+
+    # 注文履歴: ユーザーごとに新しい順
+    op.create_index(
+        "ix_orders_user_ordered",
+        TABLE,
+        ["user_id", sa.text("ordered_at DESC")],
+        postgresql_include=USER_ORDERED_INCLUDE,
+    )
+
+    # 売上集計: キャンセルを除いた注文だけの部分インデックス
+    op.create_index(
+        "ix_orders_store_ordered_active",
+        TABLE,
+        ["store_id", "ordered_at"],
+        postgresql_include=["menu_id", "quantity", "total_price"],
+        postgresql_where=sa.text(ACTIVE_PREDICATE),
+        sqlite_where=sa.text(ACTIVE_PREDICATE),
+    )
+
+    existing = _index_names(bind)
+    for name, _ in REDUNDANT_INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name=TABLE)
+    for name in SUPERSEDED_INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name=TABLE)
+    # 主キーと重複する id のインデックス（PostgreSQL ではパーティション化で削除済み）
+    if "ix_orders_id" in existing:
+        op.drop_index("ix_orders_id", table_name=TABLE)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    if not is_postgresql:
+        op.create_index("ix_orders_id", TABLE, ["id"])
+    for name, columns in REDUNDANT_INDEXES:
+        op.create_index(name, TABLE, columns)
+
+    op.drop_index("ix_orders_store_ordered_active", table_name=TABLE)
+    op.drop_index("ix_orders_user_ordered", table_name=TABLE)
+
+    if is_postgresql:
+        op.drop_index("ix_orders_ordered_at", table_name=TABLE)
+        op.create_index("ix_orders_ordered_at", TABLE, ["ordered_at"])
@@ -0,0 +1,32 @@
+"""add_catalog_version_to_stores
+
+Revision ID: e7a2c5f19d03
+Revises: d41e7b0c9a25
+Create Date: 2026-10-19 13:20:11.904517
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a2c5f19d03"
+down_revision: Union[str, None] = "d41e7b0c9a25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "stores",
+        sa.Column(
+            "catalog_version", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("stores", "catalog_version")
@@ -0,0 +1,171 @@
+"""create_menu_search_index
+
+Revision ID: f3b8d2a6c417
+Revises: e7a2c5f19d03
+Create Date: 2026-10-19 15:02:37.118204
+
+"""
+
+import re
+import unicodedata
+from typing import List, Optional, Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b8d2a6c417"
+down_revision: Union[str, None] = "e7a2c5f19d03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# マイグレーションの内容が後のアプリのコード変更で変わらないよう、
+# DDLとn-gramの作り方はアプリのモジュール（services.menu_search）から読み込まずにここで定義する
+SEARCH_INDEX_TABLE = "menu_search_index"
+
+# 説明文のn-gramの開始位置（メニュー名とまたがってフレーズ一致しないよう離す）
+DESCRIPTION_POSITION_OFFSET = 1000
+
+# tsvector の位置の上限（PostgreSQL の仕様）
+MAX_TSVECTOR_POSITION = 16383
+
+BATCH_SIZE = 1000
+
+_WORD_SPLIT_PATTERN = re.compile(r"[\W_]+")
+
+POSTGRESQL_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} (
+        menu_id INTEGER PRIMARY KEY REFERENCES menus(id) ON DELETE CASCADE,
+        store_id INTEGER NOT NULL,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_INDEX_TABLE}_document "
+    f"ON {SEARCH_INDEX_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_INDEX_TABLE}_store_id "
+    f"ON {SEARCH_INDEX_TABLE} (store_id)",
+)
+
+SQLITE_DDL = (
+    # rowid をメニューIDとして使う
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5(
+        store_id UNINDEXED,
+        name_ngrams,
+        description_ngrams,
+        tokenize = 'unicode61 remove_diacritics 0'
+    )
+    """,
+)
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    # NFKC・大文字小文字の統一・カタカナのひらがな化
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return "".join(
+        chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in value
+    )
+
+
+def _text_ngrams(value: Optional[str]) -> List[str]:
+    # 単語ごとのbigramと末尾の1文字（例: "弁当屋" -> ["弁当", "当屋", "屋"]）
+    ngrams: List[str] = []
+    for word in _WORD_SPLIT_PATTERN.split(_normalize_text(value)):
+        if word:
+            ngrams.extend(word[i : i + 2] for i in range(len(word) - 1))
+            ngrams.append(word[-1])
+    return ngrams
+
+
+def _tsvector_literal(name: Optional[str], description: Optional[str]) -> str:
+    lexemes = []
+    for offset, weight, value in (
+        (0, "A", name),
+        (DESCRIPTION_POSITION_OFFSET, "B", description),
+    ):
+        for position, ngram in enumerate(_text_ngrams(value), start=offset + 1):
+            position = min(position, MAX_TSVECTOR_POSITION)
+            quoted = ngram.replace("\\", "\\\\").replace("'", "''")
+            lexemes.append(f"'{quoted}':{position}{weight}")
+    return " ".join(lexemes)
+
+
+def _index_rows(conn, dialect: str, rows) -> None:
+    if dialect == "postgresql":
+        conn.execute(
+            sa.text(
+                f"""
+                INSERT INTO {SEARCH_INDEX_TABLE} (menu_id, store_id, document)
+                VALUES (:menu_id, :store_id, CAST(:document AS tsvector))
+                """
+            ),
+            [
+                {
+                    "menu_id": row.id,
+                    "store_id": row.store_id,
+                    "document": _tsvector_literal(row.name, row.description),
+                }
+                for row in rows
+            ],
+        )
+    else:
+        conn.execute(
+            sa.text(
+                f"""
+                INSERT INTO {SEARCH_INDEX_TABLE}
+                    (rowid, store_id, name_ngrams, description_ngrams)
+                VALUES (:menu_id, :store_id, :name_ngrams, :description_ngrams)
+                """
+            ),
+            [
+                {
+                    "menu_id": row.id,
+                    "store_id": row.store_id,
+                    "name_ngrams": " ".join(_text_ngrams(row.name)),
+                    "description_ngrams": " ".join(_text_ngrams(row.description)),
+                }
+                for row in rows
+            ],
+        )
+
+
+def upgrade() -> None:
+    """メニュー名・説明文のn-gram検索インデックスを作成し、既存メニューを登録"""
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        ddl = POSTGRESQL_DDL
+    elif dialect == "sqlite":
+        ddl = SQLITE_DDL
+    else:
+        # 未対応のデータベースでは部分一致検索にフォールバックする
+        return
+    for statement in ddl:
+        op.execute(statement)
+
+    conn.execute(sa.text(f"DELETE FROM {SEARCH_INDEX_TABLE}"))
+    # 挿入と同じ接続で読み出すため、全件を取得せずにキーセットで分割する
+    last_id = 0
+    count = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, store_id, name, description FROM menus "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        _index_rows(conn, dialect, rows)
+        last_id = rows[-1].id
+        count += len(rows)
+    print(f"✓ {count}件のメニューを検索インデックスに登録しました")
+
+
+def downgrade() -> None:
+    op.execute(f"DROP TABLE IF EXISTS {SEARCH_INDEX_TABLE}")
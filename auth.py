@@ -4,9 +4,16 @@
 JWT トークンベースの認証とパスワードハッシュ化機能
 """
 
+import asyncio
+import hashlib
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -21,8 +28,34 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# ロールクレームを含むアクセストークンの最大有効期間（分）
+# ロール・所属店舗の変更がトークンに反映されるまでの最大遅延となる
+ROLE_CLAIMS_MAX_AGE_MINUTES = int(os.getenv("ROLE_CLAIMS_MAX_AGE_MINUTES", "5"))
+
+# Trueの場合、書き込み系リクエストではロールをDBで再検証する
+ROLE_CLAIMS_STRICT = os.getenv("ROLE_CLAIMS_STRICT", "False").lower() == "true"
+
+# bcryptのコスト（ラウンド数）。変更するとログイン時に自動で再ハッシュされる
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# パスワード処理専用ワーカー数（デフォルト: CPUコア数）
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+# ワーカー待ちを許容する最大件数（超過時は PasswordHasherBusyError）
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+# 検証済みJWTのキャッシュ件数（0で無効化）
+JWT_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE", "4096"))
+
+# 無効なJWTを検証失敗としてキャッシュする秒数
+JWT_CACHE_NEGATIVE_TTL_SECONDS = float(
+    os.getenv("JWT_CACHE_NEGATIVE_TTL_SECONDS", "5")
+)
+
 # パスワードハッシュ化用コンテキスト
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -52,28 +85,251 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+class PasswordHasherBusyError(Exception):
+    """パスワード処理の待ち行列が上限に達した場合の例外"""
+
+
+class PasswordHashPool:
+    """
+    bcrypt処理専用のサイズ制限付きスレッドプール
+
+    bcryptはGILを解放するため、スレッドでもコア数に応じて並列に処理できる。
+    非同期ルートから await することで、AnyIOのスレッドプールを占有しない。
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, func, *args):
+        """
+        関数をプールで実行して結果を返す
+
+        Raises:
+            PasswordHasherBusyError: 待ち行列が上限に達している場合
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Password hashing queue is full")
+            self._in_flight += 1
+            executor = self._get_executor()
+
+        submitted_at = time.perf_counter()
+
+        def task():
+            wait_seconds = time.perf_counter() - submitted_at
+            with self._lock:
+                self.total_wait_seconds += wait_seconds
+            return func(*args)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, task)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        """キューイングのメトリクスを取得"""
+        with self._lock:
+            queued = max(self._in_flight - self.max_workers, 0)
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queued": queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "average_wait_ms": (
+                    round(self.total_wait_seconds / self.completed * 1000, 2)
+                    if self.completed
+                    else 0.0
+                ),
+            }
+
+    def shutdown(self) -> None:
+        """ワーカースレッドを停止"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    パスワードを専用プールで検証し、必要に応じて再ハッシュする
+    
+    Args:
+        plain_password: 平文パスワード
+        hashed_password: ハッシュ化されたパスワード
+        
+    Returns:
+        Tuple[bool, Optional[str]]: (一致したか, 再ハッシュ後の値)
+            再ハッシュ後の値はコスト設定が変わった場合のみ返す
+    """
+    return await password_hash_pool.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    パスワードを専用プールでハッシュ化
+    
+    Args:
+        password: 平文パスワード
+        
+    Returns:
+        str: ハッシュ化されたパスワード
+    """
+    return await password_hash_pool.run(pwd_context.hash, password)
+
+
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    roles: Optional[List[str]] = None,
+    store_id: Optional[int] = None,
+) -> str:
     """
     JWTアクセストークンを作成
     
     Args:
         data: トークンに含めるデータ
         expires_delta: 有効期限（デフォルト: ACCESS_TOKEN_EXPIRE_MINUTES）
+        roles: トークンに含めるロール名（指定時は store_id もクレームに含める）
+        store_id: トークンに含める所属店舗ID
         
     Returns:
         str: JWTトークン
+        
+    Note:
+        ロールクレームを含むトークンの有効期限は ROLE_CLAIMS_MAX_AGE_MINUTES を超えない
     """
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    
+    if roles is not None:
+        to_encode.update({"roles": sorted(roles), "store_id": store_id})
+        expire = min(expire, now + timedelta(minutes=ROLE_CLAIMS_MAX_AGE_MINUTES))
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+class TokenVerificationCache:
+    """
+    検証済みJWTのLRUキャッシュ
+
+    トークンのSHA-256ダイジェストをキーとし、検証済みのペイロードを exp まで保持する。
+    検証に失敗したトークンは JWT_CACHE_NEGATIVE_TTL_SECONDS の間だけ失敗として保持する。
+    """
+
+    def __init__(self, max_size: int, negative_ttl_seconds: float):
+        self.max_size = max_size
+        self.negative_ttl_seconds = negative_ttl_seconds
+        # ダイジェスト -> (有効期限のUNIX時刻, ペイロード or 検証エラー)
+        self._entries: "OrderedDict[bytes, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict:
+        """
+        キャッシュを利用してJWTを検証・デコード
+
+        Raises:
+            JWTError: トークンが無効または期限切れの場合
+        """
+        if self.max_size <= 0:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                result = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                result = None
+
+        if result is not None:
+            if isinstance(result, JWTError):
+                raise result
+            return dict(result)
+
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError as e:
+            if self.negative_ttl_seconds > 0:
+                self._store(key, now + self.negative_ttl_seconds, e)
+            raise
+
+        # exp を持たないトークンは期限を判断できないためキャッシュしない
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)) and exp > now:
+            self._store(key, float(exp), dict(payload))
+        return payload
+
+    def _store(self, key: bytes, expires_at: float, value: object) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """ヒット率などのメトリクスを取得"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+token_cache = TokenVerificationCache(JWT_CACHE_MAX_SIZE, JWT_CACHE_NEGATIVE_TTL_SECONDS)
+
+
 def verify_token(token: str) -> Optional[str]:
     """
     JWTトークンを検証し、ユーザー名を取得
@@ -85,7 +341,7 @@ def verify_token(token: str) -> Optional[str]:
         Optional[str]: ユーザー名（無効な場合はNone）
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.decode(token)
         username: str = payload.get("sub")
         if username is None:
             return None
@@ -96,7 +352,7 @@ def verify_token(token: str) -> Optional[str]:
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
-    JWTリフレッシュトークンを作成
+    JWTリフレッシュトークンを作成（無効化用のトークンID jti を含む）
     
     Args:
         data: トークンに含めるデータ
@@ -111,7 +367,8 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     else:
         expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode.update({"exp": expire, "type": "refresh"})
+    # 無効化リストで識別するためのトークンID
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -130,7 +387,7 @@ def decode_token(token: str) -> Optional[dict]:
         JWTError: トークンが無効または期限切れの場合
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.decode(token)
         return payload
     except JWTError:
         raise
\ No newline at end of file
@@ -6,17 +6,23 @@ FastAPIの依存関数（Dependency Injection）を定義
 """
 
 from typing import List, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from database import get_db
-from auth import verify_token, decode_token
+from auth import ROLE_CLAIMS_STRICT, decode_token
 from models import User, Role, UserRole
+from services.token_revocation import is_token_revoked
+from services.user_cache import CachedPrincipal, user_cache
 
 # OAuth2認証スキーム（Swagger UI対応）
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# 読み取り専用のHTTPメソッド（strictモードでもロールをDBで再検証しない）
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
 
 # カスタム例外クラス
 class InvalidCredentialsException(HTTPException):
@@ -54,6 +60,12 @@ def get_current_user(
     """
     現在のユーザーを取得
     
+    ユーザー情報はプロセス内キャッシュ（services.user_cache）から取得し、
+    キャッシュにない場合のみデータベースを参照する。
+    キャッシュヒット時はDBセッションに紐付かないUserを返すため、
+    ロールは user.role_names で参照すること。
+    トークンにロールクレームが含まれる場合は role_names にクレームの値を設定する。
+    
     Args:
         token: JWTトークン
         db: データベースセッション
@@ -65,21 +77,54 @@ def get_current_user(
         InvalidCredentialsException: 認証に失敗した場合
     """
     try:
-        # トークンからユーザー名を取得
-        username = verify_token(token)
+        # トークンからユーザー名とクレームを取得
+        payload = decode_token(token)
+        username = payload.get("sub")
         if username is None:
             raise InvalidCredentialsException()
     except Exception:
         raise InvalidCredentialsException()
     
-    # データベースからユーザーを取得
-    user = db.query(User).filter(User.username == username).first()
+    # キャッシュから取得
+    principal = user_cache.get(username)
+    if principal is not None:
+        user = principal.to_user()
+        _apply_claims(user, payload)
+        return user
+    
+    # データベースからユーザーを取得（ロールも同時にロード）
+    user = (
+        db.query(User)
+        .options(joinedload(User.user_roles).joinedload(UserRole.role))
+        .filter(User.username == username)
+        .first()
+    )
     if user is None:
         raise InvalidCredentialsException()
     
+    principal = CachedPrincipal.from_user(user)
+    user_cache.set(principal)
+    user.role_names = list(principal.role_names)
+    _apply_claims(user, payload)
+    
     return user
 
 
+def _apply_claims(user: User, payload: dict) -> None:
+    """
+    アクセストークンのクレーム（ロール・所属店舗）をユーザーに反映
+    
+    ロールと所属店舗は発行時点の同じスナップショットとして扱う。
+    所属店舗は読み込み済みの値として設定し、DBへの変更としては扱わない。
+    """
+    role_claims = payload.get("roles")
+    if role_claims is None:
+        return
+    user.role_names = list(role_claims)
+    if "store_id" in payload:
+        set_committed_value(user, "store_id", payload["store_id"])
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     現在のアクティブユーザーを取得
@@ -129,8 +174,18 @@ def get_current_user_from_refresh_token(
     except Exception:
         raise InvalidCredentialsException()
     
-    # データベースからユーザーを取得
-    user = db.query(User).filter(User.username == username).first()
+    # 無効化済みトークンの確認（他ワーカーでの無効化を同期待ちなしで反映するためDBを直接参照）
+    jti = payload.get("jti")
+    if jti is not None and is_token_revoked(db, jti):
+        raise InvalidCredentialsException()
+    
+    # データベースからユーザーを取得（新しいトークンのクレーム用にロールも同時にロード）
+    user = (
+        db.query(User)
+        .options(joinedload(User.user_roles).joinedload(UserRole.role))
+        .filter(User.username == username)
+        .first()
+    )
     if user is None:
         raise InvalidCredentialsException()
     
@@ -154,14 +209,19 @@ def require_role(allowed_roles: List[str]):
     """
     def role_checker(
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        request: Request = None,
     ) -> User:
         """
         ユーザーの役割を確認
         
+        通常はアクセストークンのロールクレーム（またはキャッシュ）で判定する。
+        ROLE_CLAIMS_STRICT が有効な場合、書き込み系リクエストのみDBで再検証する。
+        
         Args:
             current_user: 現在のアクティブユーザー
             db: データベースセッション
+            request: リクエスト（HTTPメソッドの判定に使用）
             
         Returns:
             User: 権限を持つユーザー
@@ -169,16 +229,27 @@ def require_role(allowed_roles: List[str]):
         Raises:
             InsufficientPermissionsException: 権限が不足している場合
         """
-        # UserRoleテーブルから役割を取得
-        user_roles = (
-            db.query(Role.name)
-            .join(UserRole, UserRole.role_id == Role.id)
-            .filter(UserRole.user_id == current_user.id)
-            .all()
-        )
-        
-        # ユーザーが持つ役割名のリストを作成
-        user_role_names = [role.name for role in user_roles]
+        # get_current_user で取得済みの役割を使用（未設定の場合のみDBから取得）
+        user_role_names = getattr(current_user, "role_names", None)
+        if ROLE_CLAIMS_STRICT and (
+            request is None or request.method not in SAFE_METHODS
+        ):
+            user_role_names = None
+        if user_role_names is None:
+            user_roles = (
+                db.query(Role.name)
+                .join(UserRole, UserRole.role_id == Role.id)
+                .filter(UserRole.user_id == current_user.id)
+                .all()
+            )
+            user_role_names = [role.name for role in user_roles]
+            # ルート内の user_has_role も同じ結果を使用する
+            current_user.role_names = user_role_names
+            # 所属店舗もクレームではなくDBの値で判定する
+            store_id = (
+                db.query(User.store_id).filter(User.id == current_user.id).scalar()
+            )
+            set_committed_value(current_user, "store_id", store_id)
         
         # 許可された役割のいずれかを持っているかチェック
         if not any(role in user_role_names for role in allowed_roles):
@@ -5,9 +5,17 @@
 """
 
 import os
-from typing import List
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 from pydantic import EmailStr
+from sqlalchemy.orm import Session
+
+from models import EmailOutbox
 
 
 class EmailConfig:
@@ -25,142 +33,332 @@ class EmailConfig:
     MAIL_VALIDATE_CERTS = os.getenv("MAIL_VALIDATE_CERTS", "True").lower() == "true"
 
 
-# メール設定の初期化
-conf = ConnectionConfig(
-    MAIL_USERNAME=EmailConfig.MAIL_USERNAME,
-    MAIL_PASSWORD=EmailConfig.MAIL_PASSWORD,
-    MAIL_FROM=EmailConfig.MAIL_FROM,
-    MAIL_PORT=EmailConfig.MAIL_PORT,
-    MAIL_SERVER=EmailConfig.MAIL_SERVER,
-    MAIL_FROM_NAME=EmailConfig.MAIL_FROM_NAME,
-    MAIL_STARTTLS=EmailConfig.MAIL_STARTTLS,
-    MAIL_SSL_TLS=EmailConfig.MAIL_SSL_TLS,
-    USE_CREDENTIALS=EmailConfig.MAIL_USE_CREDENTIALS,
-    VALIDATE_CERTS=EmailConfig.MAIL_VALIDATE_CERTS
-)
+# メールクライアント（最初の送信時に作成）
+_mail_client: Optional[FastMail] = None
+_mail_client_lock = threading.Lock()
+
 
-fast_mail = FastMail(conf)
+def get_mail_client() -> FastMail:
+    """
+    メールクライアントを取得（初回呼び出し時に作成）
+    
+    Returns:
+        FastMail: メールクライアント
+    """
+    global _mail_client
+    if _mail_client is None:
+        with _mail_client_lock:
+            if _mail_client is None:
+                conf = ConnectionConfig(
+                    MAIL_USERNAME=EmailConfig.MAIL_USERNAME,
+                    MAIL_PASSWORD=EmailConfig.MAIL_PASSWORD,
+                    MAIL_FROM=EmailConfig.MAIL_FROM,
+                    MAIL_PORT=EmailConfig.MAIL_PORT,
+                    MAIL_SERVER=EmailConfig.MAIL_SERVER,
+                    MAIL_FROM_NAME=EmailConfig.MAIL_FROM_NAME,
+                    MAIL_STARTTLS=EmailConfig.MAIL_STARTTLS,
+                    MAIL_SSL_TLS=EmailConfig.MAIL_SSL_TLS,
+                    USE_CREDENTIALS=EmailConfig.MAIL_USE_CREDENTIALS,
+                    VALIDATE_CERTS=EmailConfig.MAIL_VALIDATE_CERTS
+                )
+                _mail_client = FastMail(conf)
+    return _mail_client
 
 
-async def send_password_reset_email(email: EmailStr, reset_token: str, base_url: str = "http://localhost:8000"):
+# ===== メールテンプレート =====
+
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_IMPORTANT = re.compile(r"\s*!\s*important$", re.I)
+# 要素名・#ID・.クラス名を組み合わせたセレクタ（子孫結合子や疑似クラスは展開しない）
+_COMPOUND_SELECTOR = re.compile(r"^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+_OPENING_TAG = re.compile(r"<([a-zA-Z][\w-]*)(\s[^<>]*?)?(/?)>")
+
+
+def _attr_pattern(name: str) -> "re.Pattern":
+    # 二重引用符・単一引用符・引用符なしのいずれの属性値にも一致させる
+    return re.compile(
+        rf"""\s{name}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""", re.I
+    )
+
+
+_CLASS_ATTR = _attr_pattern("class")
+_ID_ATTR = _attr_pattern("id")
+_STYLE_ATTR = _attr_pattern("style")
+
+
+def _attr_value(match: "re.Match") -> str:
+    return next(g for g in match.groups() if g is not None)
+
+
+def _split_declarations(declarations: str) -> List[str]:
+    result = []
+    for part in declarations.split(";"):
+        part = " ".join(part.split())
+        if part:
+            result.append(_IMPORTANT.sub(" !important", part))
+    return result
+
+
+def _with_important(declarations: List[str]) -> str:
+    return "; ".join(
+        d if d.endswith("!important") else f"{d} !important" for d in declarations
+    )
+
+
+def _parse_css(css: str) -> List[Tuple[str, Optional[str]]]:
     """
-    パスワードリセットメールを送信
+    CSSを最上位の (セレクタまたはアットルール, ブロック本体) に分割
+
+    @media などの入れ子のブロックは本体に文字列のまま残す。
+    @import のようにブロックを持たない文は本体を None とする。
+    """
+    rules: List[Tuple[str, Optional[str]]] = []
+    depth = 0
+    start = 0
+    body_start = 0
+    prelude = ""
+    for i, ch in enumerate(css):
+        if ch == "{":
+            if depth == 0:
+                prelude = css[start:i].strip()
+                body_start = i + 1
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[body_start:i]))
+                start = i + 1
+        elif ch == ";" and depth == 0:
+            statement = css[start:i].strip()
+            if statement:
+                rules.append((statement, None))
+            start = i + 1
+    return rules
+
+
+def _nested_css(body: str) -> str:
+    """@media 等の中のルールに !important を付けて、展開した style 属性より優先させる"""
+    parts = []
+    for prelude, inner in _parse_css(body):
+        if inner is None:
+            parts.append(f"{prelude};")
+        elif prelude.startswith("@"):
+            parts.append(f"{prelude} {{ {_nested_css(inner)} }}")
+        else:
+            parts.append(f"{prelude} {{ {_with_important(_split_declarations(inner))} }}")
+    return " ".join(parts)
+
+
+class _InlineRule:
+    """展開対象の1セレクタ分のルール"""
+
+    __slots__ = ("specificity", "tag", "element_id", "classes", "declarations")
+
+    def __init__(self, selector: "re.Match", order: int, declarations: List[str]):
+        tag, rest = selector.group(1), selector.group(2)
+        ids = re.findall(r"#([\w-]+)", rest)
+        classes = re.findall(r"\.([\w-]+)", rest)
+        self.tag = tag.lower() if tag else None
+        self.element_id = ids[0] if ids else None
+        self.classes = frozenset(classes)
+        # 詳細度（ID数, クラス数, 要素名数）が同じ場合は後に書かれたルールを優先
+        self.specificity = (len(ids), len(classes), 1 if tag else 0, order)
+        self.declarations = declarations
+
+    def matches(self, tag: str, element_id: Optional[str], classes: set) -> bool:
+        if self.tag is not None and self.tag != tag:
+            return False
+        if self.element_id is not None and self.element_id != element_id:
+            return False
+        return self.classes <= classes
+
+
+def inline_css(html: str) -> str:
+    """
+    <style> 内のルールのうち要素名・ID・クラス名だけのセレクタを各要素の style 属性に展開
+    
+    多くのメールクライアントは <style> を無視するため、テンプレートの読み込み時に一度だけ実行する。
+    宣言はセレクタの詳細度とルールの記述順で並べ、既存の style 属性を最後に置く。
+    !important 付きの宣言は既存の style 属性より後に置く。
+    疑似クラスや子孫セレクタなど展開できないルールと @media 内のルールは
+    !important を付けて <style> に残し、@font-face などその他のアットルールはそのまま残す。
+    
+    Args:
+        html: HTML（Jinja2テンプレートのソース）
+        
+    Returns:
+        str: CSSを展開したHTML
+    """
+    rules: List[_InlineRule] = []
+    remaining_css: List[str] = []
+
+    def collect(match: "re.Match") -> str:
+        css = _CSS_COMMENT.sub("", match.group(1))
+        for prelude, body in _parse_css(css):
+            if body is None:
+                remaining_css.append(f"{prelude};")
+                continue
+            if prelude.startswith("@"):
+                if prelude.lower().startswith(("@media", "@supports")):
+                    remaining_css.append(f"{prelude} {{ {_nested_css(body)} }}")
+                else:
+                    remaining_css.append(f"{prelude} {{{body}}}")
+                continue
+
+            declarations = _split_declarations(body)
+            kept = []
+            for selector in prelude.split(","):
+                selector = selector.strip()
+                compound = _COMPOUND_SELECTOR.match(selector)
+                if compound is None or not selector or selector.count("#") > 1:
+                    kept.append(selector)
+                else:
+                    rules.append(_InlineRule(compound, len(rules), declarations))
+            if kept:
+                # 展開した style 属性より優先されるよう !important を付ける
+                remaining_css.append(f"{', '.join(kept)} {{ {_with_important(declarations)} }}")
+        return "\x00"
+
+    html = _STYLE_BLOCK.sub(collect, html, count=1)
+
+    def apply(match: "re.Match") -> str:
+        tag, attrs, self_closing = match.group(1), match.group(2) or "", match.group(3)
+        class_attr = _CLASS_ATTR.search(attrs)
+        id_attr = _ID_ATTR.search(attrs)
+        classes = set(_attr_value(class_attr).split()) if class_attr else set()
+        element_id = _attr_value(id_attr) if id_attr else None
+        matched = sorted(
+            (r for r in rules if r.matches(tag.lower(), element_id, classes)),
+            key=lambda r: r.specificity,
+        )
+        if not matched:
+            return match.group(0)
+
+        declarations = [d for r in matched for d in r.declarations]
+        style_attr = _STYLE_ATTR.search(attrs)
+        if style_attr:
+            declarations.extend(_split_declarations(_attr_value(style_attr)))
+            attrs = attrs[: style_attr.start()] + attrs[style_attr.end():]
+        # !important の宣言は記述順を保ったまま末尾へ（既存の style 属性より優先）
+        ordered = [d for d in declarations if not d.endswith("!important")]
+        ordered += [d for d in declarations if d.endswith("!important")]
+        style = "; ".join(ordered).replace('"', "&quot;")
+        return f'<{tag}{attrs} style="{style};"{self_closing}>'
+
+    html = _OPENING_TAG.sub(apply, html)
+
+    style_block = ""
+    if remaining_css:
+        style_block = "<style>\n" + "\n".join(remaining_css) + "\n</style>"
+    return html.replace("\x00", style_block, 1)
+
+
+class EmailTemplateRegistry:
+    """
+    メールテンプレートの登録簿
+    
+    テンプレートは初回使用時にCSSを展開してからコンパイルし、以降はコンパイル済みのものを使い回す。
+    """
+
+    def __init__(self, template_dir: Path):
+        self._env = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+        )
+        self._templates: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Template:
+        """コンパイル済みテンプレートを取得"""
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    source, _, _ = self._env.loader.get_source(self._env, name)
+                    if name.endswith(".html"):
+                        source = inline_css(source)
+                    template = self._env.from_string(source)
+                    self._templates[name] = template
+        return template
+
+    def render(self, template_name: str, /, **context) -> str:
+        """テンプレートを描画"""
+        return self.get(template_name).render(**context)
+
+
+email_templates = EmailTemplateRegistry(Path(__file__).parent / "templates" / "email")
+
+
+PASSWORD_RESET_SUBJECT = "【Bento Order System】パスワードリセットのご案内"
+
+
+def build_password_reset_email(reset_token: str, base_url: str = "http://localhost:8000") -> Tuple[str, str]:
+    """
+    パスワードリセットメールの件名と本文を作成
     
     Args:
-        email: 送信先メールアドレス
         reset_token: パスワードリセットトークン
         base_url: アプリケーションのベースURL
+        
+    Returns:
+        Tuple[str, str]: (件名, HTML本文)
     """
     reset_link = f"{base_url}/reset-password?token={reset_token}"
+    html_content = email_templates.render("password_reset.html", reset_link=reset_link)
     
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>パスワードリセット</title>
-        <style>
-            body {{
-                font-family: 'Helvetica Neue', Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            .container {{
-                background-color: #f9f9f9;
-                border-radius: 10px;
-                padding: 30px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .header {{
-                text-align: center;
-                padding-bottom: 20px;
-                border-bottom: 2px solid #4CAF50;
-            }}
-            h1 {{
-                color: #4CAF50;
-                margin: 0;
-            }}
-            .content {{
-                padding: 20px 0;
-            }}
-            .button {{
-                display: inline-block;
-                padding: 12px 24px;
-                margin: 20px 0;
-                background-color: #4CAF50;
-                color: white !important;
-                text-decoration: none;
-                border-radius: 5px;
-                font-weight: bold;
-            }}
-            .button:hover {{
-                background-color: #45a049;
-            }}
-            .info-box {{
-                background-color: #fff3cd;
-                border-left: 4px solid #ffc107;
-                padding: 15px;
-                margin: 20px 0;
-            }}
-            .footer {{
-                text-align: center;
-                padding-top: 20px;
-                border-top: 1px solid #ddd;
-                color: #777;
-                font-size: 12px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🍱 Bento Order System</h1>
-            </div>
-            
-            <div class="content">
-                <h2>パスワードリセットのご案内</h2>
-                <p>パスワードリセットのリクエストを受け付けました。</p>
-                <p>以下のボタンをクリックして、新しいパスワードを設定してください。</p>
-                
-                <div style="text-align: center;">
-                    <a href="{reset_link}" class="button">パスワードをリセット</a>
-                </div>
-                
-                <div class="info-box">
-                    <strong>⚠️ 重要な注意事項:</strong>
-                    <ul>
-                        <li>このリンクの有効期限は <strong>1時間</strong> です</li>
-                        <li>リンクは <strong>1回のみ</strong> 使用可能です</li>
-                        <li>心当たりがない場合は、このメールを無視してください</li>
-                    </ul>
-                </div>
-                
-                <p style="color: #777; font-size: 14px;">
-                    ボタンが機能しない場合は、以下のURLをコピーしてブラウザに貼り付けてください:<br>
-                    <code style="background-color: #f0f0f0; padding: 5px; display: block; margin-top: 10px; word-break: break-all;">
-                        {reset_link}
-                    </code>
-                </p>
-            </div>
-            
-            <div class="footer">
-                <p>© 2025 Bento Order System. All rights reserved.</p>
-                <p>このメールに心当たりがない場合は、無視してください。</p>
-            </div>
-        </div>
-    </body>
-    </html>
+    return PASSWORD_RESET_SUBJECT, html_content
+
+
+async def send_password_reset_email(email: EmailStr, reset_token: str, base_url: str = "http://localhost:8000"):
+    """
+    パスワードリセットメールを即時送信
+    
+    Args:
+        email: 送信先メールアドレス
+        reset_token: パスワードリセットトークン
+        base_url: アプリケーションのベースURL
     """
+    subject, html_content = build_password_reset_email(reset_token, base_url)
     
     message = MessageSchema(
-        subject="【Bento Order System】パスワードリセットのご案内",
+        subject=subject,
         recipients=[email],
         body=html_content,
         subtype=MessageType.html
     )
     
-    await fast_mail.send_message(message)
+    await get_mail_client().send_message(message)
+
+
+def enqueue_password_reset_email(db: Session, email: str, reset_token: str, base_url: str = "http://localhost:8000") -> EmailOutbox:
+    """
+    パスワードリセットメールを送信待ちとして登録
+    
+    コミットは呼び出し側で行う（リセットトークンと同じトランザクションで書き込むため）。
+    送信はバックグラウンドの送信ジョブ（services.email_outbox）が行う。
+    
+    Args:
+        db: データベースセッション
+        email: 送信先メールアドレス
+        reset_token: パスワードリセットトークン
+        base_url: アプリケーションのベースURL
+        
+    Returns:
+        EmailOutbox: 登録した送信待ちメール
+    """
+    subject, html_content = build_password_reset_email(reset_token, base_url)
+    
+    outbox_entry = EmailOutbox(
+        recipient=email,
+        subject=subject,
+        body=html_content,
+        subtype="html",
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(outbox_entry)
+    return outbox_entry
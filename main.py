@@ -4,14 +4,37 @@ FastAPI メインアプリケーション
 弁当注文管理システムのメインアプリケーション
 """
 
+import asyncio
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from auth import password_hash_pool, token_cache
 from database import Base, engine
 from routers import auth, customer, guest_cart, guest_session, public, store, account
+from services.catalog_cache import catalog_cache
+from services.email_outbox import (
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS,
+    run_periodic_email_outbox_sender,
+)
+from services.guest_session_cleanup import (
+    PURGE_INTERVAL_SECONDS,
+    run_periodic_guest_session_purge,
+)
+from services.login_throttle import login_throttle
+from services.menu_audit import menu_audit_writer
+from services.partitions import (
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+    run_periodic_partition_maintenance,
+)
+from services.sql_capture import SQL_CAPTURE_FILE, sql_capture
+from services.token_revocation import (
+    REVOCATION_PRUNE_INTERVAL_SECONDS,
+    run_periodic_revocation_prune,
+)
 
 # データベーステーブルを作成
 Base.metadata.create_all(bind=engine)
@@ -48,6 +71,61 @@ app.include_router(store.router, prefix="/api")
 app.include_router(account.router)
 
 
+# ===== バックグラウンドジョブ =====
+
+# 起動中の定期ジョブ（シャットダウン時にキャンセルする）
+background_tasks: list[asyncio.Task] = []
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """定期ジョブを起動"""
+    if SQL_CAPTURE_FILE:
+        # インデックスアドバイザー用に実行したSQLを記録
+        sql_capture.start(engine, SQL_CAPTURE_FILE)
+    if not menu_audit_writer.synchronous:
+        menu_audit_writer.start()
+    if PURGE_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodic_guest_session_purge(PURGE_INTERVAL_SECONDS)
+            )
+        )
+    if EMAIL_OUTBOX_POLL_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodic_email_outbox_sender(EMAIL_OUTBOX_POLL_INTERVAL_SECONDS)
+            )
+        )
+    if REVOCATION_PRUNE_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodic_revocation_prune(REVOCATION_PRUNE_INTERVAL_SECONDS)
+            )
+        )
+    if PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodic_partition_maintenance(
+                    PARTITION_MAINTENANCE_INTERVAL_SECONDS
+                )
+            )
+        )
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """定期ジョブを停止"""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    password_hash_pool.shutdown()
+    # 書き込み待ちの監査ログを書き込んでから停止
+    menu_audit_writer.shutdown()
+    sql_capture.stop()
+
+
 # ===== フロントエンド画面ルーティング =====
 
 
@@ -210,6 +288,18 @@ async def health_check():
     return {"status": "healthy", "message": "Bento Order System is running"}
 
 
+@app.get("/health/metrics", summary="内部メトリクス")
+async def health_metrics():
+    """プロセス内のワーカープールやキャッシュのメトリクス"""
+    return {
+        "password_hashing": password_hash_pool.stats(),
+        "login_throttle": login_throttle.stats(),
+        "jwt_cache": token_cache.stats(),
+        "catalog_snapshots": catalog_cache.stats(),
+        "menu_audit": menu_audit_writer.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
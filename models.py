@@ -10,10 +10,13 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     Time,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -36,6 +39,8 @@ class Store(Base):
     description = Column(Text)
     image_url = Column(String(500))
     is_active = Column(Boolean, default=True)
+    # 店舗・カテゴリ・メニューの変更ごとに加算されるバージョン（公開APIのETagに使用）
+    catalog_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -133,8 +138,13 @@ class Menu(Base):
     """メニューテーブル"""
 
     __tablename__ = "menus"
+    __table_args__ = (
+        # 一括インポートの外部キーは店舗内で一意（未設定のメニューは対象外）
+        UniqueConstraint("store_id", "external_id", name="uq_menus_store_external_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(100), nullable=True)  # 一括インポート用の外部キー
     name = Column(String(255), nullable=False)
     price = Column(Integer, nullable=False)
     description = Column(Text)
@@ -164,30 +174,59 @@ class Order(Base):
     """注文テーブル"""
 
     __tablename__ = "orders"
-    __table_args__ = (
-        # 複合インデックス: パフォーマンス最適化
-        # ダッシュボードAPIで頻繁に使用されるクエリパターンに対応
-        {"extend_existing": True}
-    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     menu_id = Column(Integer, ForeignKey("menus.id"), nullable=False)
-    store_id = Column(
-        Integer, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False, index=True
-    )
+    store_id = Column(Integer, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, nullable=False)
     total_price = Column(Integer, nullable=False)
-    status = Column(String(50), default="pending", index=True)  # インデックス追加
+    status = Column(String(50), default="pending")
     delivery_time = Column(Time)
     notes = Column(Text)
     ordered_at = Column(
-        DateTime(timezone=True), server_default=func.now(), index=True
-    )  # インデックス追加
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )  # パーティションキー
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    __table_args__ = (
+        # 店舗別の日付範囲検索（ダッシュボード・注文一覧）
+        Index("ix_orders_store_ordered", store_id, ordered_at),
+        # 全店舗の日付範囲検索。ordered_at は挿入順に増えるため
+        # PostgreSQL では小さく挿入コストの低いBRINにする
+        Index("ix_orders_ordered_at", ordered_at, postgresql_using="brin"),
+        # 注文履歴（get_my_orders）用のカバリングインデックス
+        # （自由記述の notes は索引を肥大化させるため含めず、1ページ分だけテーブルから読む）
+        Index(
+            "ix_orders_user_ordered",
+            user_id,
+            ordered_at.desc(),
+            postgresql_include=[
+                "id",
+                "menu_id",
+                "quantity",
+                "total_price",
+                "status",
+                "delivery_time",
+                "updated_at",
+            ],
+        ),
+        # 売上集計（キャンセル除く）用の部分インデックス
+        Index(
+            "ix_orders_store_ordered_active",
+            store_id,
+            ordered_at,
+            postgresql_include=["menu_id", "quantity", "total_price"],
+            postgresql_where=text("status <> 'cancelled'"),
+            sqlite_where=text("status <> 'cancelled'"),
+        ),
+        # PostgreSQL では ordered_at の月単位でレンジパーティション分割する
+        # （親テーブルはAlembicで作成、将来の月は services.partitions が作成）
+        {"extend_existing": True, "info": {"partition_by_month": "ordered_at"}},
+    )
+
     # リレーションシップ
     store = relationship("Store", back_populates="orders")
     user = relationship("User", back_populates="orders")
@@ -207,6 +246,46 @@ class PasswordResetToken(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class EmailOutbox(Base):
+    """送信待ちメールテーブル（トランザクショナル・アウトボックス）
+
+    業務データと同じトランザクションで書き込み、バックグラウンドの送信ジョブが
+    バッチ単位で送信する
+    - status: pending（送信待ち）/ sending（送信中）/ sent（送信済み）/ failed（再試行上限到達）
+    - next_attempt_at: 送信中の間はリースの期限（過ぎると他のワーカーが再度取得する）
+    """
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String(20), nullable=False, default="html")
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class RevokedToken(Base):
+    """無効化されたリフレッシュトークンテーブル
+
+    トークンID（jti）と有効期限を保持し、期限切れの行は定期的に削除する
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class MenuChangeLog(Base):
     """メニュー変更履歴テーブル（監査ログ）"""
 
@@ -217,7 +296,7 @@ class MenuChangeLog(Base):
         Integer, ForeignKey("menus.id", ondelete="CASCADE"), nullable=False, index=True
     )
     store_id = Column(
-        Integer, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False, index=True
+        Integer, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
     )
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
@@ -229,7 +308,21 @@ class MenuChangeLog(Base):
     old_value = Column(Text, nullable=True)  # 変更前の値（JSON文字列）
     new_value = Column(Text, nullable=True)  # 変更後の値（JSON文字列）
     changes = Column(JSON, nullable=True)  # 全体の変更内容（JSON形式）
-    changed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    changed_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+
+    __table_args__ = (
+        # 店舗ごとの期間指定・新しい順のキーセットページネーション用
+        Index(
+            "ix_menu_change_logs_store_changed_at",
+            store_id,
+            changed_at.desc(),
+            id.desc(),
+        ),
+        # PostgreSQL では changed_at の月単位でレンジパーティション分割する
+        {"info": {"partition_by_month": "changed_at"}},
+    )
 
     # リレーションシップ
     menu = relationship("Menu")
@@ -4,25 +4,44 @@
 ユーザー認証関連のAPIエンドポイント
 """
 
+import math
 import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
+from fastapi import (
+    APIRouter,
+    Cookie,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError
 from sqlalchemy.orm import Session, joinedload
 
 from auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    PasswordHasherBusyError,
     create_access_token,
     create_refresh_token,
-    get_password_hash,
-    verify_password,
+    decode_token,
+    get_password_hash_async,
+    verify_password_async,
 )
 from database import get_db
-from dependencies import get_current_active_user, get_current_user_from_refresh_token
-from mail import send_password_reset_email
+from dependencies import (
+    InvalidCredentialsException,
+    get_current_active_user,
+    get_current_user_from_refresh_token,
+    oauth2_scheme,
+)
+from mail import enqueue_password_reset_email
 from models import PasswordResetToken, User, UserRole
 from schemas import (
+    LogoutRequest,
     PasswordResetConfirm,
     PasswordResetRequest,
     PasswordResetResponse,
@@ -33,6 +52,8 @@ from schemas import (
     UserResponse,
 )
 from services.cart_migration import CartMigrationService
+from services.login_throttle import login_throttle
+from services.token_revocation import revoke_token
 
 router = APIRouter(prefix="/auth", tags=["認証"])
 
@@ -40,24 +61,55 @@ router = APIRouter(prefix="/auth", tags=["認証"])
 password_reset_rate_limit: dict[str, datetime] = {}
 
 
-@router.post("/register", response_model=UserResponse, summary="ユーザー登録")
-def register_user(
-    user: UserCreate,
-    db: Session = Depends(get_db),
-    guest_session_id: Optional[str] = Cookie(None, alias="guest_session_id"),
-):
+def get_role_names(user: User) -> list[str]:
     """
-    新しいユーザーを登録
+    ユーザーのロール名一覧を取得（アクセストークンのクレーム用）
 
-    - **username**: ユーザー名（3-50文字、一意）
-    - **email**: メールアドレス（一意）
-    - **password**: パスワード（6文字以上）
-    - **full_name**: 氏名
-    - **role**: ロール（customer または store）
+    Args:
+        user: user_roles をロード済みのユーザー
 
-    新規登録後、ゲストセッションが存在する場合は自動的にカートが移行されます。
+    Returns:
+        list[str]: ロール名のリスト
     """
-    # ユーザー名の重複チェック
+    return [ur.role.name for ur in user.user_roles if ur.role is not None]
+
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """
+    リフレッシュトークンを無効化リストに登録
+
+    Args:
+        db: データベースセッション
+        token: リフレッシュトークン
+
+    Returns:
+        bool: 新たに無効化した場合True（無効なトークン・jtiを持たない場合・無効化済みの場合はFalse）
+    """
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        return False
+
+    jti = payload.get("jti")
+    if payload.get("type") != "refresh" or jti is None or "exp" not in payload:
+        return False
+
+    return revoke_token(
+        db, jti, datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    )
+
+
+def password_hasher_busy() -> HTTPException:
+    """パスワード処理の待ち行列が満杯の場合のレスポンス"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy. Please try again later.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _check_new_user(db: Session, user: UserCreate) -> None:
+    """ユーザー名・メールアドレスの重複チェック"""
     db_user = db.query(User).filter(User.username == user.username).first()
     if db_user:
         raise HTTPException(
@@ -65,17 +117,42 @@ def register_user(
             detail="Username already registered",
         )
 
-    # メールアドレスの重複チェック
     db_user = db.query(User).filter(User.email == user.email).first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    # パスワードをハッシュ化
-    hashed_password = get_password_hash(user.password)
 
-    # ユーザーを作成
+def _migrate_guest_cart(
+    db: Session, guest_session_id: Optional[str], user_id: int, label: str
+) -> None:
+    """ゲストカートをユーザーカートに移行（失敗しても認証処理はブロックしない）"""
+    if not guest_session_id:
+        return
+    try:
+        cart_migration_service = CartMigrationService(db)
+        migration_result = cart_migration_service.migrate_guest_cart_to_user(
+            session_id=guest_session_id, user_id=user_id
+        )
+        # ログに記録（本番環境では適切なロガーを使用）
+        if migration_result["total_quantity"] > 0:
+            print(
+                f"{label}のカート移行完了: ユーザー{user_id}, "
+                f"移行{migration_result['migrated_items']}件, "
+                f"マージ{migration_result['merged_items']}件"
+            )
+    except Exception as e:
+        print(f"カート移行エラー（{label}: ユーザー{user_id}）: {str(e)}")
+
+
+def _create_user(
+    db: Session,
+    user: UserCreate,
+    hashed_password: str,
+    guest_session_id: Optional[str],
+) -> UserResponse:
+    """ユーザーを作成し、ゲストカートを移行"""
     db_user = User(
         username=user.username,
         email=user.email,
@@ -88,57 +165,61 @@ def register_user(
     db.commit()
     db.refresh(db_user)
 
-    # ゲストカートの移行処理
-    if guest_session_id:
-        try:
-            cart_migration_service = CartMigrationService(db)
-            migration_result = cart_migration_service.migrate_guest_cart_to_user(
-                session_id=guest_session_id, user_id=db_user.id
-            )
-            # ログに記録
-            if migration_result["total_quantity"] > 0:
-                print(
-                    f"新規登録後のカート移行完了: ユーザー{db_user.id}, "
-                    f"移行{migration_result['migrated_items']}件, "
-                    f"マージ{migration_result['merged_items']}件"
-                )
-        except Exception as e:
-            # カート移行エラーは登録をブロックしない
-            print(f"カート移行エラー（新規ユーザー{db_user.id}）: {str(e)}")
+    _migrate_guest_cart(db, guest_session_id, db_user.id, "新規登録")
 
-    return db_user
+    return UserResponse.model_validate(db_user)
 
 
-@router.post("/login", response_model=TokenResponse, summary="ログイン")
-def login_for_access_token(
-    user_credentials: UserLogin,
+@router.post("/register", response_model=UserResponse, summary="ユーザー登録")
+async def register_user(
+    user: UserCreate,
     db: Session = Depends(get_db),
     guest_session_id: Optional[str] = Cookie(None, alias="guest_session_id"),
 ):
     """
-    ユーザーログインしてアクセストークンとリフレッシュトークンを取得
+    新しいユーザーを登録
 
-    - **username**: ユーザー名
-    - **password**: パスワード
+    - **username**: ユーザー名（3-50文字、一意）
+    - **email**: メールアドレス（一意）
+    - **password**: パスワード（6文字以上）
+    - **full_name**: 氏名
+    - **role**: ロール（customer または store）
 
-    成功時は、アクセストークン、リフレッシュトークン、ユーザー情報を返します。
-    ゲストセッションが存在する場合、ゲストカートをユーザーカートに移行します。
+    新規登録後、ゲストセッションが存在する場合は自動的にカートが移行されます。
+    DB処理はスレッドプール、パスワードのハッシュ化は専用ワーカーで実行し、
+    イベントループを塞がない。
     """
-    # ユーザーを検索（user_rolesを明示的にロード）
-    user = (
+    await run_in_threadpool(_check_new_user, db, user)
+
+    # パスワードをハッシュ化（専用ワーカーで実行）
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordHasherBusyError:
+        raise password_hasher_busy()
+
+    return await run_in_threadpool(
+        _create_user, db, user, hashed_password, guest_session_id
+    )
+
+
+def _find_login_user(db: Session, username: str) -> Optional[User]:
+    """ログインするユーザーを検索（user_rolesを明示的にロード）"""
+    return (
         db.query(User)
         .options(joinedload(User.user_roles).joinedload(UserRole.role))
-        .filter(User.username == user_credentials.username)
+        .filter(User.username == username)
         .first()
     )
 
-    # ユーザー存在確認とパスワード検証
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+
+def _complete_login(
+    db: Session, user: User, new_hash: Optional[str], guest_session_id: Optional[str]
+) -> dict:
+    """パスワード検証後のログイン処理（再ハッシュの保存・カート移行・トークン発行）"""
+    # bcryptのコスト設定が変わっている場合は新しいハッシュに置き換える
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
 
     # ユーザーがアクティブか確認
     if not user.is_active:
@@ -146,28 +227,15 @@ def login_for_access_token(
             status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user account"
         )
 
-    # ゲストカートの移行処理
-    if guest_session_id:
-        try:
-            cart_migration_service = CartMigrationService(db)
-            migration_result = cart_migration_service.migrate_guest_cart_to_user(
-                session_id=guest_session_id, user_id=user.id
-            )
-            # ログに記録（本番環境では適切なロガーを使用）
-            if migration_result["total_quantity"] > 0:
-                print(
-                    f"カート移行完了: ユーザー{user.id}, "
-                    f"移行{migration_result['migrated_items']}件, "
-                    f"マージ{migration_result['merged_items']}件"
-                )
-        except Exception as e:
-            # カート移行エラーはログインをブロックしない
-            print(f"カート移行エラー（ユーザー{user.id}）: {str(e)}")
-
-    # アクセストークンを作成
+    _migrate_guest_cart(db, guest_session_id, user.id, "ログイン")
+
+    # アクセストークンを作成（ロールと所属店舗をクレームとして含める）
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username},
+        expires_delta=access_token_expires,
+        roles=get_role_names(user),
+        store_id=user.store_id,
     )
 
     # リフレッシュトークンを作成
@@ -177,23 +245,85 @@ def login_for_access_token(
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer",
-        "user": user,
+        "user": UserResponse.model_validate(user),
     }
 
 
+@router.post("/login", response_model=TokenResponse, summary="ログイン")
+async def login_for_access_token(
+    user_credentials: UserLogin,
+    request: Request,
+    db: Session = Depends(get_db),
+    guest_session_id: Optional[str] = Cookie(None, alias="guest_session_id"),
+):
+    """
+    ユーザーログインしてアクセストークンとリフレッシュトークンを取得
+
+    - **username**: ユーザー名
+    - **password**: パスワード
+
+    成功時は、アクセストークン、リフレッシュトークン、ユーザー情報を返します。
+    ゲストセッションが存在する場合、ゲストカートをユーザーカートに移行します。
+    アカウントまたはIPアドレスごとの試行回数が上限を超えた場合は429を返します。
+    DB処理はスレッドプール、パスワード検証は専用ワーカーで実行し、
+    イベントループを塞がない。
+    """
+    # 試行回数の制限（DB参照・パスワード検証より前に判定する）
+    client_ip = request.client.host if request.client else None
+    retry_after = login_throttle.check(user_credentials.username, client_ip)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 86400))))},
+        )
+
+    user = await run_in_threadpool(_find_login_user, db, user_credentials.username)
+
+    # ユーザー存在確認とパスワード検証（専用ワーカーで実行）
+    password_ok = False
+    new_hash = None
+    if user:
+        try:
+            password_ok, new_hash = await verify_password_async(
+                user_credentials.password, user.hashed_password
+            )
+        except PasswordHasherBusyError:
+            raise password_hasher_busy()
+
+    if not password_ok:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    login_throttle.record_success(user_credentials.username)
+
+    return await run_in_threadpool(
+        _complete_login, db, user, new_hash, guest_session_id
+    )
+
+
 @router.post("/logout", response_model=SuccessResponse, summary="ログアウト")
-def logout(response: Response):
+def logout(
+    response: Response,
+    logout_request: Optional[LogoutRequest] = None,
+    db: Session = Depends(get_db),
+):
     """
     ログアウト
 
-    注意: JWTはステートレスなため、サーバー側では特別な処理は行いません。
-    クライアント側でトークンを削除してください。
+    - **refresh_token**: 無効化するリフレッシュトークン（任意）
 
-    ゲストセッションCookieも削除して、新しいゲストセッションで開始できるようにします。
+    リフレッシュトークンが指定された場合は無効化リストに登録し、以降のトークン更新を拒否します。
+    アクセストークンは有効期限まで有効なため、クライアント側で削除してください。
 
-    将来的にトークン無効化リスト（ブラックリスト）を実装する場合は、
-    ここでリフレッシュトークンを無効化リストに追加します。
+    ゲストセッションCookieも削除して、新しいゲストセッションで開始できるようにします。
     """
+    if logout_request and logout_request.refresh_token:
+        revoke_refresh_token(db, logout_request.refresh_token)
+
     # ゲストセッションCookieを削除
     response.delete_cookie(key="guest_session_id")
     
@@ -203,6 +333,7 @@ def logout(response: Response):
 @router.post("/refresh", response_model=TokenResponse, summary="トークンリフレッシュ")
 def refresh_access_token(
     current_user: User = Depends(get_current_user_from_refresh_token),
+    token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     """
@@ -211,14 +342,21 @@ def refresh_access_token(
     Authorization: Bearer <refresh_token>
 
     成功時は、新しいアクセストークン、リフレッシュトークン、ユーザー情報を返します。
+    使用したリフレッシュトークンは無効化され、再利用できません。
     """
-    # 新しいアクセストークンを作成
+    # 使用済みのトークンを発行前に無効化する（セキュリティのため）
+    # 一意制約により、他ワーカーで同時に使用された場合は一方だけが成功する
+    if not revoke_refresh_token(db, token):
+        raise InvalidCredentialsException()
+
+    # 新しいアクセストークンを作成（最新のロールをクレームとして含める）
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": current_user.username}, expires_delta=access_token_expires
+        data={"sub": current_user.username},
+        expires_delta=access_token_expires,
+        roles=get_role_names(current_user),
+        store_id=current_user.store_id,
     )
-
-    # 新しいリフレッシュトークンも作成（セキュリティのため）
     refresh_token = create_refresh_token(data={"sub": current_user.username})
 
     return {
@@ -256,7 +394,7 @@ def get_current_user_info(
     response_model=PasswordResetResponse,
     summary="パスワードリセット要求",
 )
-async def request_password_reset(
+def request_password_reset(
     request_data: PasswordResetRequest, db: Session = Depends(get_db)
 ):
     """
@@ -306,20 +444,15 @@ async def request_password_reset(
         # トークンの有効期限を設定（1時間後）
         expires_at = now + timedelta(hours=1)
 
-        # トークンをデータベースに保存
+        # トークンと送信待ちメールを同じトランザクションで保存
+        # （メールはバックグラウンドの送信ジョブが送るため、SMTPの遅延はレスポンスに影響しない）
         db_token = PasswordResetToken(
             token=reset_token, email=email, expires_at=expires_at
         )
         db.add(db_token)
+        enqueue_password_reset_email(db, email, reset_token)
         db.commit()
 
-        # パスワードリセットメールを送信
-        try:
-            await send_password_reset_email(email, reset_token)
-        except Exception as e:
-            # メール送信エラーはログに記録するが、ユーザーには成功レスポンスを返す
-            print(f"Failed to send password reset email: {str(e)}")
-
     # レート制限を更新
     password_reset_rate_limit[email] = now
 
@@ -329,27 +462,13 @@ async def request_password_reset(
     )
 
 
-@router.post(
-    "/password-reset-confirm",
-    response_model=PasswordResetResponse,
-    summary="パスワードリセット実行",
-)
-def confirm_password_reset(
-    reset_data: PasswordResetConfirm, db: Session = Depends(get_db)
-):
-    """
-    パスワードリセットトークンを使用してパスワードを変更
-
-    - **token**: パスワードリセットトークン
-    - **new_password**: 新しいパスワード（6文字以上）
-
-    トークンが有効な場合、パスワードを変更します。
-    """
+def _find_password_reset_target(
+    db: Session, token: str
+) -> tuple[PasswordResetToken, User]:
+    """有効なパスワードリセットトークンと対象ユーザーを取得"""
     # トークンを検索
     db_token = (
-        db.query(PasswordResetToken)
-        .filter(PasswordResetToken.token == reset_data.token)
-        .first()
+        db.query(PasswordResetToken).filter(PasswordResetToken.token == token).first()
     )
 
     # トークンが存在しない場合
@@ -359,8 +478,7 @@ def confirm_password_reset(
         )
 
     # トークンの有効期限をチェック
-    now = datetime.now(timezone.utc)
-    if now > db_token.expires_at:
+    if datetime.now(timezone.utc) > db_token.expires_at:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password reset token has expired",
@@ -380,12 +498,44 @@ def confirm_password_reset(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    # パスワードを更新
-    user.hashed_password = get_password_hash(reset_data.new_password)
+    return db_token, user
 
-    # トークンを使用済みにマーク
-    db_token.used_at = now
 
+def _apply_password_reset(
+    db: Session, db_token: PasswordResetToken, user: User, hashed_password: str
+) -> None:
+    """パスワードを更新し、トークンを使用済みにマーク"""
+    user.hashed_password = hashed_password
+    db_token.used_at = datetime.now(timezone.utc)
     db.commit()
 
+
+@router.post(
+    "/password-reset-confirm",
+    response_model=PasswordResetResponse,
+    summary="パスワードリセット実行",
+)
+async def confirm_password_reset(
+    reset_data: PasswordResetConfirm, db: Session = Depends(get_db)
+):
+    """
+    パスワードリセットトークンを使用してパスワードを変更
+
+    - **token**: パスワードリセットトークン
+    - **new_password**: 新しいパスワード（6文字以上）
+
+    トークンが有効な場合、パスワードを変更します。
+    """
+    db_token, user = await run_in_threadpool(
+        _find_password_reset_target, db, reset_data.token
+    )
+
+    # パスワードを更新（専用ワーカーでハッシュ化）
+    try:
+        hashed_password = await get_password_hash_async(reset_data.new_password)
+    except PasswordHasherBusyError:
+        raise password_hasher_busy()
+
+    await run_in_threadpool(_apply_password_reset, db, db_token, user, hashed_password)
+
     return PasswordResetResponse(message="Password has been successfully reset")
@@ -18,6 +18,8 @@ from schemas import (
     OrderHistoryResponse, OrderHistoryItem,
     CartItemCreate, CartResponse, CartItemResponse
 )
+from services.catalog_cache import catalog_cache
+from services.menu_search import search_menus
 
 router = APIRouter(prefix="/customer", tags=["お客様"])
 
@@ -56,7 +58,10 @@ def get_menus(
         query = query.filter(Menu.price <= price_max)
     
     if search:
-        query = query.filter(Menu.name.contains(search))
+        # メニュー名・説明文のn-gramインデックスで検索し、関連度の高い順に並べる
+        query, search_rank = search_menus(query, db, search)
+        if search_rank is not None:
+            query = query.order_by(desc(search_rank), Menu.id)
     
     # 総件数を取得
     total = query.count()
@@ -105,13 +110,11 @@ def create_order(
     - **delivery_time**: 希望受取時間（任意）
     - **notes**: 備考（任意、500文字以内）
     """
-    # メニューの存在確認
-    menu = db.query(Menu).filter(
-        Menu.id == order.menu_id,
-        Menu.is_available == True
-    ).first()
-    
-    if not menu:
+    # メニューの存在確認（店舗のカタログスナップショットから参照）
+    # 価格を確定するため、スナップショットが最新のカタログバージョンか必ず確認する
+    menu = catalog_cache.find_menu(db, order.menu_id, max_staleness=0)
+
+    if not menu or not menu.is_available:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu not found or not available"
@@ -134,6 +137,16 @@ def create_order(
     db.add(db_order)
     db.commit()
     db.refresh(db_order)
+
+    # メニュー・店舗情報はスナップショットから含めて返す
+    order_response = OrderResponse.model_validate(
+        {
+            **{column.key: getattr(db_order, column.key) for column in Order.__table__.columns},
+            "menu": menu,
+            "store": menu.store,
+            "user": current_user,
+        }
+    )
     
     # 注文完了後、カートをクリア
     db.query(UserCartItem).filter(
@@ -141,10 +154,7 @@ def create_order(
     ).delete()
     db.commit()
     
-    # メニュー情報も含めて返す
-    db_order.menu = menu
-    
-    return db_order
+    return order_response
 
 
 @router.get("/orders", response_model=OrderHistoryResponse, summary="注文履歴取得")
@@ -342,8 +352,8 @@ def add_to_user_cart(
     - 既に同じメニューがある場合は数量を増やす
     - メニューの在庫状況を確認
     """
-    # メニューの存在と利用可能性を確認
-    menu = db.query(Menu).filter(Menu.id == item.menu_id).first()
+    # メニューの存在と利用可能性を確認（店舗のカタログスナップショットから参照）
+    menu = catalog_cache.find_menu(db, item.menu_id)
     if not menu:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -5,14 +5,15 @@
 セッションIDに基づいて商品の追加・取得・更新・削除を行います。
 """
 
-from typing import List
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import GuestCartItem, GuestSession, Menu
+from models import GuestCartItem, GuestSession
 from routers.guest_session import require_guest_session
+from services.catalog_cache import catalog_cache
 from schemas import (
     GuestCartItemAdd,
     GuestCartItemResponse,
@@ -23,20 +24,22 @@ from schemas import (
 router = APIRouter(prefix="/guest/cart", tags=["guest-cart"])
 
 
-def calculate_cart_total(cart_items: List[GuestCartItem]) -> int:
+def calculate_cart_total(cart_items: List[GuestCartItem], menus: Dict[int, Any]) -> int:
     """
     カート内の合計金額を計算
 
     Args:
         cart_items: カートアイテムのリスト
+        menus: メニューIDとメニュー（スナップショット）の対応
 
     Returns:
         合計金額
     """
     total = 0
     for item in cart_items:
-        if item.menu:
-            total += item.menu.price * item.quantity
+        menu = menus.get(item.menu_id)
+        if menu:
+            total += menu.price * item.quantity
     return total
 
 
@@ -81,8 +84,12 @@ async def add_to_cart(
             detail="店舗を選択してください。先に店舗選択を行ってください。",
         )
 
-    # メニューの存在と販売可能性を確認
-    menu = db.query(Menu).filter(Menu.id == item.menu_id).first()
+    # メニューの存在と販売可能性を確認（店舗のカタログスナップショットから参照）
+    catalog = catalog_cache.get_catalog(db, session.selected_store_id)
+    menu = catalog.get_menu(item.menu_id) if catalog else None
+    if not menu:
+        # 選択店舗にない場合のみ、他店舗のメニューかどうかを確認する
+        menu = catalog_cache.find_menu(db, item.menu_id)
 
     if not menu:
         raise HTTPException(
@@ -287,13 +294,12 @@ def get_cart_summary(session_id: str, db: Session) -> GuestCartResponse:
         db.query(GuestCartItem).filter(GuestCartItem.session_id == session_id).all()
     )
 
-    # 各アイテムのメニュー情報を読み込む
-    for item in cart_items:
-        db.refresh(item)
+    # 各アイテムのメニュー情報をカタログスナップショットから取得
+    menus = {item.menu_id: catalog_cache.find_menu(db, item.menu_id) for item in cart_items}
 
     # 合計アイテム数と合計金額を計算
     total_items = sum(item.quantity for item in cart_items)
-    total_amount = calculate_cart_total(cart_items)
+    total_amount = calculate_cart_total(cart_items, menus)
 
     # レスポンスを構築
     return GuestCartResponse(
@@ -304,7 +310,7 @@ def get_cart_summary(session_id: str, db: Session) -> GuestCartResponse:
                 menu_id=item.menu_id,
                 quantity=item.quantity,
                 added_at=item.added_at,
-                menu=item.menu,
+                menu=menus.get(item.menu_id),
             )
             for item in cart_items
         ],
@@ -6,12 +6,27 @@
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import Menu, Store
-from schemas import MenuResponse, StorePublicResponse
+from models import Store
+from schemas import (
+    MenuResponse,
+    MenuSuggestion,
+    PublicCatalogCategory,
+    PublicStoreCatalogResponse,
+    StorePublicResponse,
+)
+from services.catalog_cache import catalog_cache
+from services.catalog_version import (
+    cache_headers,
+    etag_matches,
+    get_store_catalog_version,
+    get_stores_list_version,
+    make_etag,
+)
+from services.menu_suggest import MENU_SUGGEST_MAX_STALENESS_SECONDS
 
 router = APIRouter(prefix="/public", tags=["公開API"])
 
@@ -22,8 +37,10 @@ router = APIRouter(prefix="/public", tags=["公開API"])
     summary="公開店舗一覧取得",
 )
 async def get_public_stores(
+    response: Response,
     search: Optional[str] = Query(None, description="店舗名または住所で検索"),
     is_active: bool = Query(True, description="営業中の店舗のみ表示"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
@@ -31,7 +48,16 @@ async def get_public_stores(
 
     - **search**: 店舗名または住所で部分一致検索
     - **is_active**: 営業中の店舗のみ表示（デフォルト: True）
+
+    店舗のカタログバージョンから算出したETagを返し、
+    If-None-Match が一致する場合は一覧を取得せずに304を返します。
     """
+    etag = make_etag("stores", get_stores_list_version(db), search, is_active)
+    headers = cache_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
     query = db.query(Store)
 
     # 営業状態でフィルタ
@@ -58,8 +84,10 @@ async def get_public_stores(
 )
 async def get_store_menus(
     store_id: int,
+    response: Response,
     category_id: Optional[int] = Query(None, description="カテゴリIDでフィルタ"),
     is_available: bool = Query(True, description="販売中のメニューのみ"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
@@ -68,27 +96,120 @@ async def get_store_menus(
     - **store_id**: 店舗ID
     - **category_id**: カテゴリIDでフィルタ（オプション）
     - **is_available**: 販売中のメニューのみ（デフォルト: True）
+
+    店舗のカタログバージョンから算出したETagを返し、
+    If-None-Match が一致する場合はメニューを取得せずに304を返します。
+    """
+    # 店舗の存在確認（カタログバージョンのみ取得）
+    catalog_version = get_store_catalog_version(db, store_id)
+    if catalog_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"店舗ID {store_id} が見つかりません",
+        )
+
+    etag = make_etag("menus", store_id, catalog_version, category_id, is_available)
+    headers = cache_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    # 店舗のカタログスナップショットから取得（メニュー名順）
+    catalog = catalog_cache.get_catalog(db, store_id, version=catalog_version)
+    if catalog is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"店舗ID {store_id} が見つかりません",
+        )
+
+    return list(
+        catalog.list_menus(
+            is_available=True if is_available else None, category_id=category_id
+        )
+    )
+
+
+@router.get(
+    "/stores/{store_id}/menus/suggest",
+    response_model=List[MenuSuggestion],
+    summary="メニュー名の入力候補取得",
+)
+async def suggest_store_menus(
+    store_id: int,
+    prefix: str = Query(..., min_length=1, max_length=50, description="入力中の文字列"),
+    is_available: bool = Query(True, description="販売中のメニューのみ"),
+    limit: int = Query(10, ge=1, le=20, description="最大件数"),
+    db: Session = Depends(get_db),
+):
+    """
+    認証不要でメニュー名の入力候補（前方一致）を取得
+
+    - **prefix**: 入力中の文字列（カタカナ・ひらがな、全角・半角を区別しない）
+    - **is_available**: 販売中のメニューのみ（デフォルト: True）
+    - **limit**: 最大件数（デフォルト: 10）
+
+    店舗のカタログスナップショット上の前方一致インデックスから返すため、
+    通常はDBへの問い合わせを行いません。
     """
-    # 店舗の存在確認
-    store = db.query(Store).filter(Store.id == store_id).first()
-    if not store:
+    catalog = catalog_cache.get_catalog(
+        db, store_id, max_staleness=MENU_SUGGEST_MAX_STALENESS_SECONDS
+    )
+    if catalog is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"店舗ID {store_id} が見つかりません",
         )
 
-    # メニュークエリ
-    query = db.query(Menu).filter(Menu.store_id == store_id)
+    index = catalog.available_prefix_index if is_available else catalog.prefix_index
+    return index.suggest(prefix, limit)
 
-    # 販売状態でフィルタ
-    if is_available:
-        query = query.filter(Menu.is_available.is_(True))
 
-    # カテゴリでフィルタ
-    if category_id is not None:
-        query = query.filter(Menu.category_id == category_id)
+@router.get(
+    "/stores/{store_id}/catalog",
+    response_model=PublicStoreCatalogResponse,
+    summary="店舗の公開カタログ取得",
+)
+async def get_store_catalog(
+    store_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    認証不要で店舗情報・有効なカテゴリ・販売中のメニューを1つのレスポンスで取得
+
+    - **categories**: 有効なカテゴリを表示順で、各カテゴリの販売中メニューをメニュー名順で含む
+    - **uncategorized_menus**: カテゴリ未設定（または無効なカテゴリ）の販売中メニュー
 
-    # メニュー名でソート
-    menus = query.order_by(Menu.name).all()
+    店舗のカタログスナップショットから組み立てるため、DBへの問い合わせは最大2クエリです。
+    カタログバージョンから算出したETagを返し、If-None-Match が一致する場合は304を返します。
+    """
+    catalog = catalog_cache.get_catalog(db, store_id)
+    if catalog is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"店舗ID {store_id} が見つかりません",
+        )
 
-    return menus
+    etag = make_etag("catalog", store_id, catalog.version)
+    headers = cache_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    menus_by_category = catalog.available_menus_by_category
+    return PublicStoreCatalogResponse(
+        store=catalog.store,
+        version=catalog.version,
+        categories=[
+            PublicCatalogCategory(
+                id=category.id,
+                name=category.name,
+                description=category.description,
+                display_order=category.display_order,
+                menus=menus_by_category.get(category.id, ()),
+            )
+            for category in catalog.active_categories
+        ],
+        uncategorized_menus=menus_by_category.get(None, ()),
+    )
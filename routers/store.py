@@ -4,6 +4,7 @@
 店舗スタッフ専用のAPIエンドポイント
 """
 
+import base64
 import json
 import os
 import uuid
@@ -12,22 +13,36 @@ from pathlib import Path
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from sqlalchemy import and_, desc, func, or_
+from sqlalchemy import (
+    Integer,
+    and_,
+    case,
+    column,
+    desc,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.orm import Session
 
 from database import get_db
 from dependencies import get_current_active_user, get_current_store_user, require_role
 from models import Menu, MenuCategory, MenuChangeLog, Order, Store, User
 from schemas import (
+    CatalogCloneResponse,
     DailySalesReport,
     HourlyOrderData,
     MenuBulkAvailabilityUpdate,
     MenuCategoryCreate,
     MenuCategoryListResponse,
+    MenuCategoryOrderUpdate,
     MenuCategoryResponse,
     MenuCategoryUpdate,
     MenuChangeLogListResponse,
     MenuChangeLogResponse,
+    MenuImportResponse,
     MenuCreate,
     MenuListResponse,
     MenuResponse,
@@ -44,6 +59,23 @@ from schemas import (
     StoreUpdate,
     YesterdayComparison,
 )
+from services.catalog_clone import clone_catalog
+from services.catalog_version import bump_catalog_version
+from services.menu_audit import menu_audit_writer
+from services.menu_import import (
+    MenuImportError,
+    detect_format,
+    import_menus,
+    read_rows,
+    validate_rows,
+)
+from services.menu_search import search_menus
+from services.order_archive import (
+    ArchivedSales,
+    OrderArchiveError,
+    archived_until,
+    summarize_archived_sales,
+)
 
 router = APIRouter(prefix="/store", tags=["店舗"])
 
@@ -62,7 +94,15 @@ def user_has_role(user: User, role_name: str) -> bool:
     Returns:
         bool: ロールを持っていればTrue
     """
-    if not user or not user.user_roles:
+    if not user:
+        return False
+
+    # 認証時に取得済みのロール名があればそれを使用（追加のクエリを発行しない）
+    role_names = getattr(user, "role_names", None)
+    if role_names is not None:
+        return role_name in role_names
+
+    if not user.user_roles:
         return False
 
     return any(ur.role and ur.role.name == role_name for ur in user.user_roles)
@@ -83,6 +123,8 @@ def log_menu_change(
     """
     メニュー変更履歴を記録する
 
+    ログは監査ログライターに渡し、メニューの変更がコミットされた後にまとめて書き込む
+
     Args:
         db: データベースセッション
         menu_id: メニューID
@@ -92,68 +134,53 @@ def log_menu_change(
         old_menu: 変更前のMenuオブジェクト（update/deleteの場合）
         new_data: 変更後のデータ（create/updateの場合）
     """
-    try:
-        changes = {}
-
-        if action == "create":
-            # 作成時は新しいデータをそのまま記録
-            changes = new_data or {}
-            change_log = MenuChangeLog(
-                menu_id=menu_id,
-                store_id=store_id,
-                user_id=user_id,
-                action=action,
-                changes=changes,
-            )
-            db.add(change_log)
-
-        elif action == "update" and old_menu and new_data:
-            # 更新時は変更されたフィールドのみ記録
-            for field, new_value in new_data.items():
-                old_value = getattr(old_menu, field, None)
-
-                # 値が変更された場合のみ記録
-                if old_value != new_value:
-                    # 複雑なオブジェクトは文字列に変換
-                    old_str = str(old_value) if old_value is not None else None
-                    new_str = str(new_value) if new_value is not None else None
-
-                    changes[field] = {"old": old_str, "new": new_str}
-
-            # 全体の変更内容を1つのログとして記録
-            if changes:
-                summary_log = MenuChangeLog(
-                    menu_id=menu_id,
-                    store_id=store_id,
-                    user_id=user_id,
-                    action=action,
-                    changes=changes,
-                )
-                db.add(summary_log)
-
-        elif action == "delete" and old_menu:
-            # 削除時は削除されたメニューの情報を記録
-            menu_data = {
-                "name": old_menu.name,
-                "price": old_menu.price,
-                "description": old_menu.description,
-                "is_available": old_menu.is_available,
-            }
-            change_log = MenuChangeLog(
-                menu_id=menu_id,
-                store_id=store_id,
-                user_id=user_id,
-                action=action,
-                changes=menu_data,
-            )
-            db.add(change_log)
+    changes = {}
+
+    if action == "create":
+        # 作成時は新しいデータをそのまま記録
+        changes = new_data or {}
+
+    elif action == "update" and old_menu and new_data:
+        # 更新時は変更されたフィールドのみ記録
+        for field, new_value in new_data.items():
+            old_value = getattr(old_menu, field, None)
+
+            # 値が変更された場合のみ記録
+            if old_value != new_value:
+                # 複雑なオブジェクトは文字列に変換
+                old_str = str(old_value) if old_value is not None else None
+                new_str = str(new_value) if new_value is not None else None
+
+                changes[field] = {"old": old_str, "new": new_str}
+
+        # 変更がない場合は記録しない
+        if not changes:
+            return
+
+    elif action == "delete" and old_menu:
+        # 削除時は削除されたメニューの情報を記録
+        changes = {
+            "name": old_menu.name,
+            "price": old_menu.price,
+            "description": old_menu.description,
+            "is_available": old_menu.is_available,
+        }
 
-        # ログ記録をコミット（メイン処理のコミット前）
-        db.flush()
+    else:
+        return
 
-    except Exception as e:
-        # ログ記録に失敗してもメイン処理は継続
-        print(f"Warning: Failed to log menu change: {e}")
+    menu_audit_writer.record(
+        db,
+        [
+            {
+                "menu_id": menu_id,
+                "store_id": store_id,
+                "user_id": user_id,
+                "action": action,
+                "changes": changes,
+            }
+        ],
+    )
 
 
 # ===== 店舗プロフィール管理 =====
@@ -1039,9 +1066,18 @@ def get_menu_categories(
             detail="User is not associated with any store",
         )
 
-    # クエリ構築
-    query = db.query(MenuCategory).filter(
-        MenuCategory.store_id == current_user.store_id
+    # クエリ構築（各カテゴリのメニュー数は LEFT JOIN + GROUP BY で同時に集計）
+    query = (
+        db.query(MenuCategory, func.count(Menu.id).label("menu_count"))
+        .outerjoin(
+            Menu,
+            and_(
+                Menu.category_id == MenuCategory.id,
+                Menu.store_id == current_user.store_id,
+            ),
+        )
+        .filter(MenuCategory.store_id == current_user.store_id)
+        .group_by(MenuCategory.id)
     )
 
     # フィルタ適用
@@ -1051,19 +1087,8 @@ def get_menu_categories(
     # 表示順でソート
     query = query.order_by(MenuCategory.display_order.asc(), MenuCategory.name.asc())
 
-    categories = query.all()
-
-    # 各カテゴリのメニュー数を取得
     category_responses = []
-    for category in categories:
-        menu_count = (
-            db.query(Menu)
-            .filter(
-                Menu.category_id == category.id, Menu.store_id == current_user.store_id
-            )
-            .count()
-        )
-
+    for category, menu_count in query.all():
         category_dict = {
             "id": category.id,
             "name": category.name,
@@ -1149,6 +1174,74 @@ def create_menu_category(
     return MenuCategoryResponse(**category_dict)
 
 
+@router.put("/menu-categories/order", summary="カテゴリ一括並び替え")
+def update_menu_category_order(
+    order_update: MenuCategoryOrderUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["owner", "manager"])),
+):
+    """
+    カテゴリの表示順を一括更新（自店舗のカテゴリのみ）
+
+    **必要な権限:** owner, manager
+
+    **パラメータ:**
+    - **category_ids**: 表示順に並べたカテゴリIDリスト（先頭が display_order=0）
+
+    **戻り値:**
+    - **updated_count**: 更新されたカテゴリ数
+    - **failed_ids**: 更新に失敗したカテゴリID（存在しない、または他店舗のカテゴリ）
+    """
+    # ユーザーが店舗に所属しているか確認
+    if not current_user.store_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not associated with any store",
+        )
+
+    categories = MenuCategory.__table__
+    positions = list(enumerate(order_update.category_ids))
+    statement = update(categories).where(
+        categories.c.store_id == current_user.store_id
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        # UPDATE ... FROM (VALUES (id, 表示順), ...) で1文で更新
+        new_order = values(
+            column("id", Integer), column("display_order", Integer), name="new_order"
+        ).data([(category_id, order) for order, category_id in positions])
+        statement = statement.where(categories.c.id == new_order.c.id).values(
+            display_order=new_order.c.display_order
+        )
+    else:
+        # FROM句のVALUESに列名を付けられないデータベースではCASE式で1文にする
+        statement = statement.where(
+            categories.c.id.in_(order_update.category_ids)
+        ).values(
+            display_order=case(
+                {category_id: order for order, category_id in positions},
+                value=categories.c.id,
+            )
+        )
+    updated_ids = set(db.execute(statement.returning(categories.c.id)).scalars())
+
+    failed_ids = [
+        category_id
+        for category_id in order_update.category_ids
+        if category_id not in updated_ids
+    ]
+
+    if updated_ids:
+        # フラッシュを経由しない更新のためカタログバージョンを明示的に加算
+        bump_catalog_version(db, [current_user.store_id])
+    db.commit()
+
+    return {
+        "updated_count": len(updated_ids),
+        "failed_ids": failed_ids,
+        "message": f"{len(updated_ids)}件のカテゴリの表示順を更新しました",
+    }
+
+
 @router.put(
     "/menu-categories/{category_id}",
     response_model=MenuCategoryResponse,
@@ -1332,11 +1425,11 @@ def get_all_menus(
         else:
             query = query.filter(Menu.category_id == category_id)
 
-    # キーワード検索（メニュー名または説明文に部分一致）
+    # キーワード検索（メニュー名または説明文のn-gramインデックス）
+    search_rank = None
     if keyword:
-        search_pattern = f"%{keyword}%"
-        query = query.filter(
-            or_(Menu.name.ilike(search_pattern), Menu.description.ilike(search_pattern))
+        query, search_rank = search_menus(
+            query, db, keyword, store_id=current_user.store_id
         )
 
     # ソート処理
@@ -1370,6 +1463,9 @@ def get_all_menus(
             query = query.order_by(desc(sort_column))
         else:
             query = query.order_by(sort_column)
+    elif search_rank is not None:
+        # キーワード検索時のデフォルトソート: 関連度の高い順
+        query = query.order_by(desc(search_rank), Menu.id)
     else:
         # デフォルトソート: IDの昇順（登録順）
         query = query.order_by(Menu.id)
@@ -1406,10 +1502,9 @@ def create_menu(
     db_menu = Menu(**menu.dict(), store_id=current_user.store_id)
 
     db.add(db_menu)
-    db.commit()
-    db.refresh(db_menu)
+    db.flush()
 
-    # 監査ログを記録
+    # 監査ログを記録（コミット後に書き込む）
     log_menu_change(
         db=db,
         menu_id=db_menu.id,
@@ -1419,6 +1514,7 @@ def create_menu(
         new_data=menu.dict(),
     )
     db.commit()
+    db.refresh(db_menu)
 
     return db_menu
 
@@ -1452,28 +1548,81 @@ def bulk_update_menu_availability(
             detail="User is not associated with any store",
         )
 
-    # 自店舗のメニューのみを取得
-    menus = (
-        db.query(Menu)
-        .filter(
-            Menu.id.in_(bulk_update.menu_ids), Menu.store_id == current_user.store_id
+    # 自店舗のメニューを1回のUPDATEで更新し、更新した全IDと更新前の値を受け取る
+    # （RETURNING は更新後の値しか返さないため、更新前の値はUPDATE前に実体化したCTEから読む）
+    previous = (
+        # RETURNING 内で menus の列と取り違えないよう別名を付ける
+        select(Menu.id.label("menu_id"), Menu.is_available.label("was_available"))
+        .where(
+            Menu.store_id == current_user.store_id,
+            Menu.id.in_(bulk_update.menu_ids),
         )
-        .all()
+        .with_for_update()
+        .cte("previous_menus")
+        .prefix_with("MATERIALIZED")
     )
-
-    # 見つかったメニューのIDリスト
-    found_menu_ids = {menu.id for menu in menus}
+    was_available = (
+        select(previous.c.was_available)
+        .where(previous.c.menu_id == Menu.id)
+        .scalar_subquery()
+    )
+    written = db.execute(
+        update(Menu)
+        .add_cte(previous)
+        .where(Menu.id.in_(select(previous.c.menu_id)))
+        .values(
+            is_available=bulk_update.is_available,
+            # 値が変わらない行の更新日時は据え置く
+            updated_at=case(
+                (
+                    Menu.is_available.is_distinct_from(bulk_update.is_available),
+                    func.now(),
+                ),
+                else_=Menu.updated_at,
+            ),
+        )
+        .returning(Menu.id, was_available)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # 既に指定の状態だったメニューも更新済みとして扱う
+    updated_ids = {menu_id for menu_id, _ in written}
+    updated_count = len(updated_ids)
+    changed_ids = {
+        menu_id
+        for menu_id, old_value in written
+        if old_value != bulk_update.is_available
+    }
 
     # 更新に失敗したID（存在しない、または他店舗のメニュー）
     failed_ids = [
-        menu_id for menu_id in bulk_update.menu_ids if menu_id not in found_menu_ids
+        menu_id for menu_id in bulk_update.menu_ids if menu_id not in updated_ids
     ]
 
-    # 一括更新
-    updated_count = 0
-    for menu in menus:
-        menu.is_available = bulk_update.is_available
-        updated_count += 1
+    if changed_ids:
+        # 監査ログを一括で記録（コミット後にまとめて書き込む）
+        # 形式は log_menu_change と同じ {"field": {"old": ..., "new": ...}}
+        changes = {
+            "is_available": {
+                "old": str(not bulk_update.is_available),
+                "new": str(bulk_update.is_available),
+            }
+        }
+        menu_audit_writer.record(
+            db,
+            [
+                {
+                    "menu_id": menu_id,
+                    "store_id": current_user.store_id,
+                    "user_id": current_user.id,
+                    "action": "update",
+                    "changes": changes,
+                }
+                for menu_id in sorted(changed_ids)
+            ],
+        )
+        # フラッシュを経由しない更新のためカタログバージョンを明示的に加算
+        bump_catalog_version(db, [current_user.store_id])
 
     db.commit()
 
@@ -1484,6 +1633,127 @@ def bulk_update_menu_availability(
     }
 
 
+@router.post(
+    "/menus/import", response_model=MenuImportResponse, summary="メニュー一括インポート"
+)
+def import_store_menus(
+    file: UploadFile = File(...),
+    skip_invalid: bool = Query(
+        False, description="エラーのある行を除いてインポートする"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["owner", "manager"])),
+):
+    """
+    CSVまたはJSONからメニューを一括登録・更新（自店舗のみ）
+
+    **必要な権限:** owner, manager
+
+    **ファイル形式:**
+    - CSV: 1行目がヘッダー（external_id, name, price, description, image_url, is_available, category_id）
+    - JSON: 同じ項目を持つオブジェクトの配列
+
+    external_id が同じメニューが既にある場合は更新します。
+    全ての行を1つのトランザクションで登録し、エラーのある行があれば
+    何も登録せずに行ごとのエラーを返します（skip_invalid=true の場合は残りの行を登録）。
+    """
+    # ユーザーが店舗に所属しているか確認
+    if not current_user.store_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not associated with any store",
+        )
+
+    try:
+        file_format = detect_format(file.filename, file.content_type)
+        valid, errors = validate_rows(
+            db, current_user.store_id, read_rows(file.file, file_format)
+        )
+    except MenuImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if errors and not skip_invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "message": f"{len(errors)}行にエラーがあるためインポートしませんでした",
+                "errors": errors,
+            },
+        )
+
+    try:
+        created_count, updated_count = import_menus(
+            db, current_user.store_id, current_user.id, [row for _, row in valid]
+        )
+        db.commit()
+    except MenuImportError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return {
+        "created_count": created_count,
+        "updated_count": updated_count,
+        "unchanged_count": len(valid) - created_count - updated_count,
+        "error_count": len(errors),
+        "errors": errors,
+    }
+
+
+@router.post(
+    "/stores/{store_id}/clone-catalog",
+    response_model=CatalogCloneResponse,
+    summary="メニューカタログ複製（Owner専用）",
+)
+def clone_store_catalog(
+    store_id: int,
+    from_store_id: int = Query(..., alias="from", description="複製元の店舗ID"),
+    share_images: bool = Query(True, description="画像ファイルを複製元と共有する"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role(["owner"])),
+):
+    """
+    Owner専用: 他店舗のカテゴリとメニューを店舗に複製
+
+    **必要な権限:** owner
+
+    複製先に同名のカテゴリがある場合はそれを使い、同名または同じ external_id の
+    メニューは複製しません。1つのトランザクションで実行します。
+
+    **エラー:**
+    - 400: 複製元と複製先が同じ場合
+    - 404: 店舗が見つからない場合
+    """
+    if store_id == from_store_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="複製元と複製先に同じ店舗は指定できません",
+        )
+
+    found = {
+        found_id
+        for (found_id,) in db.query(Store.id).filter(
+            Store.id.in_([store_id, from_store_id])
+        )
+    }
+    for required_id in (from_store_id, store_id):
+        if required_id not in found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"店舗ID {required_id} が見つかりません",
+            )
+
+    result = clone_catalog(
+        db,
+        source_store_id=from_store_id,
+        target_store_id=store_id,
+        user_id=current_user.id,
+        share_images=share_images,
+    )
+    db.commit()
+
+    return {"source_store_id": from_store_id, "target_store_id": store_id, **result}
+
+
 @router.put("/menus/{menu_id}", response_model=MenuResponse, summary="メニュー更新")
 def update_menu(
     menu_id: int,
@@ -1534,10 +1804,7 @@ def update_menu(
     for field, value in update_data.items():
         setattr(menu, field, value)
 
-    db.commit()
-    db.refresh(menu)
-
-    # 監査ログを記録
+    # 監査ログを記録（コミット後に書き込む）
     log_menu_change(
         db=db,
         menu_id=menu.id,
@@ -1548,6 +1815,7 @@ def update_menu(
         new_data=update_data,
     )
     db.commit()
+    db.refresh(menu)
 
     return menu
 
@@ -1603,7 +1871,6 @@ def delete_menu(
     if existing_orders:
         # 論理削除
         menu.is_available = False
-        db.commit()
 
         # 監査ログを記録（論理削除）
         log_menu_change(
@@ -1639,6 +1906,61 @@ def delete_menu(
 # ===== メニュー変更履歴（監査ログ）=====
 
 
+def _encode_change_log_cursor(log: MenuChangeLog) -> str:
+    """変更履歴の続きを取得するためのカーソル（最後の行の日時とID）"""
+    raw = f"{log.changed_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_change_log_cursor(cursor: str):
+    try:
+        changed_at, log_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(changed_at), int(log_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _paginate_change_logs(query, page: int, per_page: int, cursor: Optional[str]):
+    """
+    変更履歴を新しい順に取得
+
+    cursor を指定した場合は (changed_at, id) のキーセットで続きを取得し、
+    OFFSETによる読み飛ばしや総件数の集計を行わない。
+    """
+    if cursor:
+        changed_at, log_id = _decode_change_log_cursor(cursor)
+        total = None
+        query = query.filter(
+            or_(
+                MenuChangeLog.changed_at < changed_at,
+                and_(MenuChangeLog.changed_at == changed_at, MenuChangeLog.id < log_id),
+            )
+        )
+        offset = 0
+    else:
+        # 最初のページのみ総件数を返す（page 指定は従来の互換用）
+        total = query.count()
+        offset = (page - 1) * per_page
+
+    # 日時の降順でソート（新しい順）
+    logs = (
+        query.order_by(desc(MenuChangeLog.changed_at), desc(MenuChangeLog.id))
+        .offset(offset)
+        .limit(per_page + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(logs) > per_page:
+        logs = logs[:per_page]
+        next_cursor = _encode_change_log_cursor(logs[-1])
+
+    return {"logs": logs, "total": total, "next_cursor": next_cursor}
+
+
 @router.get(
     "/menus/{menu_id}/change-logs",
     response_model=MenuChangeLogListResponse,
@@ -1653,6 +1975,7 @@ def get_menu_change_logs(
     ),
     page: int = Query(1, ge=1, description="ページ番号"),
     per_page: int = Query(20, ge=1, le=100, description="1ページあたりの件数"),
+    cursor: Optional[str] = Query(None, description="続きを取得するカーソル"),
 ):
     """
     特定メニューの変更履歴を取得（自店舗のみ）
@@ -1662,8 +1985,9 @@ def get_menu_change_logs(
     **パラメータ:**
     - **menu_id**: メニューID
     - **action**: フィルター: create, update, delete
-    - **page**: ページ番号
+    - **page**: ページ番号（cursor 未指定時）
     - **per_page**: 1ページあたりの件数
+    - **cursor**: 前回のレスポンスの next_cursor（指定時は total を返さない）
     """
     # ユーザーが店舗に所属しているか確認
     if not current_user.store_id:
@@ -1694,17 +2018,7 @@ def get_menu_change_logs(
     if action:
         query = query.filter(MenuChangeLog.action == action)
 
-    # 総件数を取得
-    total = query.count()
-
-    # 日時の降順でソート（新しい順）
-    query = query.order_by(desc(MenuChangeLog.changed_at))
-
-    # ページネーション
-    offset = (page - 1) * per_page
-    logs = query.offset(offset).limit(per_page).all()
-
-    return {"logs": logs, "total": total}
+    return _paginate_change_logs(query, page, per_page, cursor)
 
 
 @router.get(
@@ -1724,6 +2038,7 @@ def get_store_change_logs(
     end_date: Optional[str] = Query(None, description="終了日 (YYYY-MM-DD)"),
     page: int = Query(1, ge=1, description="ページ番号"),
     per_page: int = Query(50, ge=1, le=100, description="1ページあたりの件数"),
+    cursor: Optional[str] = Query(None, description="続きを取得するカーソル"),
 ):
     """
     店舗全体のメニュー変更履歴を取得（自店舗のみ）
@@ -1736,8 +2051,9 @@ def get_store_change_logs(
     - **user_id**: 特定ユーザーによる変更のみ取得
     - **start_date**: 期間フィルター（開始日）
     - **end_date**: 期間フィルター（終了日）
-    - **page**: ページ番号
+    - **page**: ページ番号（cursor 未指定時）
     - **per_page**: 1ページあたりの件数
+    - **cursor**: 前回のレスポンスの next_cursor（指定時は total を返さない）
 
     **注意:**
     - Ownerは全店舗の履歴を閲覧可能
@@ -1771,17 +2087,7 @@ def get_store_change_logs(
     if end_date:
         query = query.filter(MenuChangeLog.changed_at <= end_date)
 
-    # 総件数を取得
-    total = query.count()
-
-    # 日時の降順でソート（新しい順）
-    query = query.order_by(desc(MenuChangeLog.changed_at))
-
-    # ページネーション
-    offset = (page - 1) * per_page
-    logs = query.offset(offset).limit(per_page).all()
-
-    return {"logs": logs, "total": total}
+    return _paginate_change_logs(query, page, per_page, cursor)
 
 
 # ===== メニュー画像アップロード =====
@@ -1795,6 +2101,25 @@ ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
 
 
+def _delete_menu_image_file(db: Session, menu: Menu) -> None:
+    """メニュー画像のファイルを削除（カタログ複製で他のメニューと共有中の場合は残す）"""
+    if not menu.image_url:
+        return
+    shared = (
+        db.query(Menu.id)
+        .filter(Menu.image_url == menu.image_url, Menu.id != menu.id)
+        .first()
+    )
+    if shared:
+        return
+    image_path = Path(menu.image_url.lstrip("/"))
+    if image_path.exists():
+        try:
+            image_path.unlink()
+        except Exception as e:
+            print(f"Failed to delete image: {e}")
+
+
 @router.post(
     "/menus/{menu_id}/image",
     response_model=MenuResponse,
@@ -1863,13 +2188,7 @@ async def upload_menu_image(
         )
 
     # 古い画像ファイルを削除
-    if menu.image_url:
-        old_image_path = Path(menu.image_url.lstrip("/"))
-        if old_image_path.exists():
-            try:
-                old_image_path.unlink()
-            except Exception as e:
-                print(f"Failed to delete old image: {e}")
+    _delete_menu_image_file(db, menu)
 
     # 新しいファイル名を生成（UUID + 拡張子）
     new_filename = f"{uuid.uuid4()}{file_ext}"
@@ -1936,13 +2255,7 @@ def delete_menu_image(
         )
 
     # 画像ファイルを削除
-    if menu.image_url:
-        image_path = Path(menu.image_url.lstrip("/"))
-        if image_path.exists():
-            try:
-                image_path.unlink()
-            except Exception as e:
-                print(f"Failed to delete image: {e}")
+    _delete_menu_image_file(db, menu)
 
     # DBのimage_urlをクリア
     menu.image_url = None
@@ -2008,13 +2321,33 @@ def get_sales_report(
             detail="Invalid date format. Use YYYY-MM-DD",
         )
 
+    # アーカイブ済みの月はコールドストレージ（Parquet）から集計し、
+    # DBからはアーカイブされていない期間のみ取得する
+    archived = ArchivedSales()
+    archive_until = archived_until()
+    db_start_dt = start_dt
+    if archive_until:
+        archive_end_dt = datetime.combine(archive_until, datetime.min.time())
+        if start_dt < archive_end_dt:
+            try:
+                archived = summarize_archived_sales(
+                    None if is_owner else current_user.store_id,
+                    start_dt,
+                    min(end_dt, archive_end_dt - timedelta(microseconds=1)),
+                )
+            except OrderArchiveError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+                )
+            db_start_dt = archive_end_dt
+
     # 指定期間の注文を取得（キャンセル除く）
     # Owner: 全店舗、Manager: 自店舗のみ
     if is_owner:
         # Owner: 全店舗のデータ
         orders_query = db.query(Order).filter(
             and_(
-                Order.ordered_at >= start_dt,
+                Order.ordered_at >= db_start_dt,
                 Order.ordered_at <= end_dt,
                 Order.status != "cancelled",
             )
@@ -2024,7 +2357,7 @@ def get_sales_report(
         orders_query = db.query(Order).filter(
             and_(
                 Order.store_id == current_user.store_id,
-                Order.ordered_at >= start_dt,
+                Order.ordered_at >= db_start_dt,
                 Order.ordered_at <= end_dt,
                 Order.status != "cancelled",
             )
@@ -2039,6 +2372,23 @@ def get_sales_report(
         day_start = datetime.combine(current_date, datetime.min.time())
         day_end = datetime.combine(current_date, datetime.max.time())
 
+        if day_start < db_start_dt:
+            # アーカイブ済みの日はファイルの集計を使う
+            day = archived.daily.get(current_date)
+            quantities = day["menu_quantities"] if day else {}
+            daily_reports.append(
+                {
+                    "date": current_date.strftime("%Y-%m-%d"),
+                    "total_orders": day["orders"] if day else 0,
+                    "total_sales": day["sales"] if day else 0,
+                    "popular_menu": (
+                        max(quantities, key=quantities.get) if quantities else None
+                    ),
+                }
+            )
+            current_date += timedelta(days=1)
+            continue
+
         day_orders = orders_query.filter(
             and_(Order.ordered_at >= day_start, Order.ordered_at <= day_end)
         )
@@ -2130,7 +2480,7 @@ def get_sales_report(
             .join(Order)
             .filter(
                 and_(
-                    Order.ordered_at >= start_dt,
+                    Order.ordered_at >= db_start_dt,
                     Order.ordered_at <= end_dt,
                     Order.status != "cancelled",
                 )
@@ -2151,7 +2501,7 @@ def get_sales_report(
             .filter(
                 and_(
                     Order.store_id == current_user.store_id,
-                    Order.ordered_at >= start_dt,
+                    Order.ordered_at >= db_start_dt,
                     Order.ordered_at <= end_dt,
                     Order.status != "cancelled",
                 )
@@ -2161,25 +2511,30 @@ def get_sales_report(
             .all()
         )
 
-    menu_report_list = [
-        {
-            "menu_id": report.id,
-            "menu_name": report.name,
-            "total_quantity": report.total_quantity,
-            "total_sales": report.total_sales,
-        }
-        for report in menu_reports
-    ]
+    menu_report_map = {
+        menu_id: {"menu_id": menu_id, **menu} for menu_id, menu in archived.menus.items()
+    }
+    for report in menu_reports:
+        menu_report = menu_report_map.setdefault(
+            report.id,
+            {"menu_id": report.id, "total_quantity": 0, "total_sales": 0},
+        )
+        menu_report["menu_name"] = report.name
+        menu_report["total_quantity"] += report.total_quantity
+        menu_report["total_sales"] += report.total_sales
+    menu_report_list = sorted(
+        menu_report_map.values(), key=lambda report: report["total_sales"], reverse=True
+    )
 
     # 合計集計（Owner: 全店舗、Manager: 自店舗のみ）
-    total_orders = orders_query.count()
+    total_orders = orders_query.count() + archived.total_orders
 
     if is_owner:
         total_sales = (
             db.query(func.sum(Order.total_price))
             .filter(
                 and_(
-                    Order.ordered_at >= start_dt,
+                    Order.ordered_at >= db_start_dt,
                     Order.ordered_at <= end_dt,
                     Order.status != "cancelled",
                 )
@@ -2193,7 +2548,7 @@ def get_sales_report(
             .filter(
                 and_(
                     Order.store_id == current_user.store_id,
-                    Order.ordered_at >= start_dt,
+                    Order.ordered_at >= db_start_dt,
                     Order.ordered_at <= end_dt,
                     Order.status != "cancelled",
                 )
@@ -2201,6 +2556,7 @@ def get_sales_report(
             .scalar()
             or 0
         )
+    total_sales += archived.total_sales
 
     return {
         "period": period,
@@ -147,6 +147,12 @@ class TokenResponse(BaseModel):
 # ===== パスワードリセット関連 =====
 
 
+class LogoutRequest(BaseModel):
+    """ログアウト要求（リフレッシュトークンを指定すると無効化する）"""
+
+    refresh_token: Optional[str] = None
+
+
 class PasswordResetRequest(BaseModel):
     """パスワードリセット要求"""
 
@@ -425,6 +431,22 @@ class MenuCategoryUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class MenuCategoryOrderUpdate(BaseModel):
+    """メニューカテゴリ並び替えのリクエスト"""
+
+    category_ids: List[int] = Field(
+        ..., min_length=1, description="表示順に並べたカテゴリIDリスト"
+    )
+
+    @field_validator("category_ids")
+    @classmethod
+    def validate_category_ids(cls, v):
+        """カテゴリIDの重複をチェック"""
+        if len(v) != len(set(v)):
+            raise ValueError("重複したカテゴリIDが含まれています")
+        return v
+
+
 class MenuCategoryResponse(MenuCategoryBase):
     """メニューカテゴリのレスポンス"""
 
@@ -445,11 +467,48 @@ class MenuCategoryListResponse(BaseModel):
     total: int
 
 
+class MenuImportRow(MenuCreate):
+    """メニュー一括インポートの1行（external_id で既存メニューを更新）"""
+
+    external_id: str = Field(..., min_length=1, max_length=100)
+
+
+class MenuImportRowError(BaseModel):
+    """メニュー一括インポートの行ごとのエラー"""
+
+    row: int = Field(..., description="行番号（ヘッダーを除き1始まり）")
+    external_id: Optional[str] = None
+    errors: List[str]
+
+
+class MenuImportResponse(BaseModel):
+    """メニュー一括インポートの結果"""
+
+    created_count: int
+    updated_count: int
+    unchanged_count: int
+    error_count: int
+    errors: List[MenuImportRowError] = []
+
+
+class CatalogCloneResponse(BaseModel):
+    """カタログ複製の結果"""
+
+    source_store_id: int
+    target_store_id: int
+    categories_created: int
+    menus_created: int
+    menus_skipped: int = Field(
+        ..., description="複製先に同名・同じexternal_idのメニューがあり複製しなかった数"
+    )
+
+
 class MenuResponse(MenuBase):
     """メニュー情報のレスポンス"""
 
     id: int
     store_id: int
+    external_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -496,7 +555,8 @@ class MenuChangeLogListResponse(BaseModel):
     """メニュー変更履歴一覧のレスポンス"""
 
     logs: List[MenuChangeLogResponse]
-    total: int
+    total: Optional[int] = None  # cursor 指定時は集計しない
+    next_cursor: Optional[str] = None  # 続きがない場合はNone
 
 
 # ===== 注文関連 =====
@@ -796,6 +856,53 @@ class StorePublicResponse(BaseModel):
         from_attributes = True
 
 
+class PublicCatalogMenu(BaseModel):
+    """公開カタログ内のメニュー"""
+
+    id: int
+    name: str
+    price: int
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    is_available: bool
+    category_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PublicCatalogCategory(BaseModel):
+    """公開カタログ内のカテゴリ（販売中のメニューを含む）"""
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    display_order: int
+    menus: List[PublicCatalogMenu]
+
+
+class MenuSuggestion(BaseModel):
+    """メニュー名の入力候補"""
+
+    id: int
+    name: str
+    price: int
+    image_url: Optional[str] = None
+    category_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PublicStoreCatalogResponse(BaseModel):
+    """店舗の公開カタログ（店舗・カテゴリ・メニューを1つにまとめたレスポンス）"""
+
+    store: StorePublicResponse
+    version: int
+    categories: List[PublicCatalogCategory]
+    uncategorized_menus: List[PublicCatalogMenu]
+
+
 # ===== ゲストセッション =====
 
 
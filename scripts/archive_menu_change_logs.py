@@ -0,0 +1,99 @@
+"""
+メニュー変更履歴アーカイブスクリプト
+
+保持期間より古い月の監査ログをgzip圧縮のJSON Linesに書き出して削除し、
+将来の月パーティションを作成します（PostgreSQLのみ）。
+毎月1回実行してください。
+
+使用方法:
+    python scripts/archive_menu_change_logs.py
+    python scripts/archive_menu_change_logs.py --retention-months 12 --dry-run
+    python scripts/archive_menu_change_logs.py --ensure-only
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# ルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import engine
+from services.change_log_partitions import (
+    MENU_CHANGE_LOG_ARCHIVE_DIR,
+    MENU_CHANGE_LOG_RETENTION_MONTHS,
+    PARENT_TABLE,
+    archive_old_months,
+)
+from services.partitions import PARTITION_MONTHS_AHEAD, ensure_partitions
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="メニュー変更履歴アーカイブスクリプト")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=MENU_CHANGE_LOG_RETENTION_MONTHS,
+        help=f"保持する月数 (デフォルト: {MENU_CHANGE_LOG_RETENTION_MONTHS})",
+    )
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=PARTITION_MONTHS_AHEAD,
+        help=f"先行作成する月パーティション数 (デフォルト: {PARTITION_MONTHS_AHEAD})",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=MENU_CHANGE_LOG_ARCHIVE_DIR,
+        help=f"アーカイブの出力先 (デフォルト: {MENU_CHANGE_LOG_ARCHIVE_DIR})",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="対象の月を表示するだけで削除しない"
+    )
+    parser.add_argument(
+        "--ensure-only", action="store_true", help="月パーティションの作成のみ行う"
+    )
+    args = parser.parse_args()
+
+    if args.retention_months < 1:
+        parser.error("--retention-months は1以上を指定してください")
+
+    print("=" * 60)
+    print("メニュー変更履歴アーカイブ")
+    print("=" * 60)
+
+    try:
+        if not args.dry_run:
+            with engine.begin() as conn:
+                created = ensure_partitions(
+                    conn, PARENT_TABLE, months_ahead=args.months_ahead
+                )
+            for name in created:
+                print(f"✓ パーティション作成: {name}")
+        if args.ensure_only:
+            return
+        # 月ごとに書き出しと削除を別のトランザクションで行う
+        archived = archive_old_months(
+            engine,
+            Path(args.output_dir),
+            retention_months=args.retention_months,
+            dry_run=args.dry_run,
+        )
+    except Exception as e:
+        print(f"✗ アーカイブに失敗しました: {e}")
+        sys.exit(1)
+
+    if not archived:
+        print("アーカイブ対象の月はありません")
+        return
+
+    for month in archived:
+        if args.dry_run:
+            print(f"  {month.month:%Y-%m}: {month.rows}件（dry-run）")
+        else:
+            print(f"✓ {month.month:%Y-%m}: {month.rows}件 → {month.path}")
+
+
+if __name__ == "__main__":
+    main()
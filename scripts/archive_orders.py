@@ -0,0 +1,85 @@
+"""
+注文アーカイブスクリプト
+
+保持期間より古い注文を店舗・月ごとのParquetファイル（コールドストレージ）に
+書き出してから、バッチ単位で削除します。売上レポートはアーカイブ済みの月を
+ファイルから集計します。毎月1回実行してください。
+
+使用方法:
+    python scripts/archive_orders.py
+    python scripts/archive_orders.py --retention-months 24 --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# ルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.order_archive import (
+    ORDER_ARCHIVE_BATCH_SIZE,
+    ORDER_ARCHIVE_DIR,
+    ORDER_ARCHIVE_RETENTION_MONTHS,
+    archive_orders,
+)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="注文アーカイブスクリプト")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=ORDER_ARCHIVE_RETENTION_MONTHS,
+        help=f"オンラインで保持する月数 (デフォルト: {ORDER_ARCHIVE_RETENTION_MONTHS})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=ORDER_ARCHIVE_BATCH_SIZE,
+        help=f"1回に取得・削除する行数 (デフォルト: {ORDER_ARCHIVE_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=ORDER_ARCHIVE_DIR,
+        help=f"アーカイブの出力先 (デフォルト: {ORDER_ARCHIVE_DIR})",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="対象の件数を表示するだけで書き出し・削除しない",
+    )
+    args = parser.parse_args()
+
+    if args.retention_months < 1 or args.batch_size < 1:
+        parser.error("--retention-months と --batch-size は1以上を指定してください")
+
+    print("=" * 60)
+    print("注文アーカイブ")
+    print("=" * 60)
+
+    try:
+        result = archive_orders(
+            archive_dir=Path(args.output_dir),
+            retention_months=args.retention_months,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    except Exception as e:
+        print(f"✗ アーカイブに失敗しました: {e}")
+        sys.exit(1)
+
+    print(f"  対象: {result['cutoff']:%Y-%m} より前の注文")
+    for archived in result["files"]:
+        label = f"店舗{archived.store_id} {archived.month:%Y-%m}: {archived.rows}件"
+        if args.dry_run:
+            print(f"  {label}（dry-run）")
+        else:
+            print(f"✓ {label} → {archived.path}")
+    if not args.dry_run:
+        print(f"✓ 注文削除: {result['deleted']}件")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+注文テーブルのインデックス構成ベンチマーク
+
+変更前（単一列 B-tree）と変更後（BRIN・カバリング・部分インデックス）の
+インデックス構成で、挿入スループットとホットクエリの応答時間を比較する。
+本番テーブルには触れず、作業用テーブル orders_index_bench を作成して測定する。
+
+BRIN・INCLUDE は PostgreSQL のみ有効（SQLite では通常の B-tree として作成される）。
+
+使用方法:
+    python scripts/benchmark_order_indexes.py
+    python scripts/benchmark_order_indexes.py --rows 500000 --iterations 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, time as dt_time, timedelta
+from pathlib import Path
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    Time,
+    create_engine,
+    text,
+)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+BENCH_TABLE = "orders_index_bench"
+
+STATUSES = ["pending", "confirmed", "preparing", "ready", "completed", "cancelled"]
+
+ACTIVE_PREDICATE = "status <> 'cancelled'"
+
+
+def build_table(metadata: MetaData, index_set: str) -> Table:
+    """作業用の注文テーブルと、指定した構成のインデックスを定義"""
+    table = Table(
+        BENCH_TABLE,
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, nullable=False),
+        Column("menu_id", Integer, nullable=False),
+        Column("store_id", Integer, nullable=False),
+        Column("quantity", Integer, nullable=False),
+        Column("total_price", Integer, nullable=False),
+        Column("status", String(50)),
+        Column("delivery_time", Time),
+        Column("notes", Text),
+        Column("ordered_at", DateTime(timezone=True), nullable=False),
+        Column("updated_at", DateTime(timezone=True)),
+    )
+    c = table.c
+    Index(f"ix_{BENCH_TABLE}_store_ordered", c.store_id, c.ordered_at)
+    if index_set == "before":
+        Index(f"ix_{BENCH_TABLE}_store_id", c.store_id)
+        Index(f"ix_{BENCH_TABLE}_status", c.status)
+        Index(f"ix_{BENCH_TABLE}_ordered_at", c.ordered_at)
+    else:
+        Index(f"ix_{BENCH_TABLE}_ordered_at", c.ordered_at, postgresql_using="brin")
+        Index(
+            f"ix_{BENCH_TABLE}_user_ordered",
+            c.user_id,
+            c.ordered_at.desc(),
+            postgresql_include=[
+                "id",
+                "menu_id",
+                "quantity",
+                "total_price",
+                "status",
+                "delivery_time",
+                "updated_at",
+            ],
+        )
+        Index(
+            f"ix_{BENCH_TABLE}_store_ordered_active",
+            c.store_id,
+            c.ordered_at,
+            postgresql_include=["menu_id", "quantity", "total_price"],
+            postgresql_where=text(ACTIVE_PREDICATE),
+            sqlite_where=text(ACTIVE_PREDICATE),
+        )
+    return table
+
+
+def generate_rows(args, start: datetime):
+    """注文が時刻順に到着する想定のテストデータ（シード固定で毎回同じ）"""
+    rng = random.Random(args.seed)
+    step = timedelta(days=args.days) / args.rows
+    for i in range(args.rows):
+        ordered_at = start + step * i
+        quantity = rng.randint(1, 3)
+        yield {
+            "user_id": rng.randint(1, args.users),
+            "menu_id": rng.randint(1, args.menus),
+            "store_id": rng.randint(1, args.stores),
+            "quantity": quantity,
+            "total_price": quantity * rng.choice([480, 550, 680, 780]),
+            "status": rng.choices(STATUSES, weights=[5, 5, 5, 5, 70, 10])[0],
+            "delivery_time": dt_time(12, rng.choice([0, 15, 30, 45])),
+            "notes": rng.choice([None, "", "大盛り", "ご飯少なめ"]),
+            "ordered_at": ordered_at,
+            "updated_at": ordered_at,
+        }
+
+
+def measure_inserts(engine, table: Table, args, start: datetime) -> float:
+    """バッチ単位で挿入し、1秒あたりの挿入行数を返す"""
+    insert = table.insert()
+    batch = []
+    elapsed = 0.0
+    for row in generate_rows(args, start):
+        batch.append(row)
+        if len(batch) < args.batch_size:
+            continue
+        elapsed += _insert_batch(engine, insert, batch)
+        batch = []
+    if batch:
+        elapsed += _insert_batch(engine, insert, batch)
+    return args.rows / elapsed
+
+
+def _insert_batch(engine, insert, batch) -> float:
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert, batch)
+    return time.perf_counter() - started
+
+
+def analyze(engine) -> None:
+    """統計情報を更新（PostgreSQL は Index Only Scan 用に可視性マップも更新）"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"VACUUM ANALYZE {BENCH_TABLE}"))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+
+def hot_queries(args, start: datetime):
+    """アプリのホットクエリ（名前, SQL, パラメータ生成関数）"""
+    rng = random.Random(args.seed + 1)
+    end = start + timedelta(days=args.days)
+
+    def day_range():
+        day = start + timedelta(days=rng.randint(0, args.days - 1))
+        return day, day + timedelta(days=1)
+
+    def month_range():
+        month_start = start + timedelta(days=rng.randint(0, max(args.days - 30, 0)))
+        return month_start, min(month_start + timedelta(days=30), end)
+
+    def customer_history():
+        return {"user_id": rng.randint(1, args.users)}
+
+    def store_revenue():
+        range_start, range_end = month_range()
+        return {
+            "store_id": rng.randint(1, args.stores),
+            "start": range_start,
+            "end": range_end,
+        }
+
+    def store_today():
+        day_start, day_end = day_range()
+        return {"store_id": rng.randint(1, args.stores), "start": day_start, "end": day_end}
+
+    def owner_day():
+        day_start, day_end = day_range()
+        return {"start": day_start, "end": day_end}
+
+    return [
+        (
+            "注文履歴（get_my_orders）",
+            f"SELECT id, menu_id, quantity, total_price, status, delivery_time, notes, "
+            f"ordered_at, updated_at FROM {BENCH_TABLE} WHERE user_id = :user_id "
+            f"ORDER BY ordered_at DESC LIMIT 20",
+            customer_history,
+        ),
+        (
+            "店舗売上（月間・キャンセル除く）",
+            f"SELECT count(*), sum(total_price) FROM {BENCH_TABLE} "
+            f"WHERE store_id = :store_id AND ordered_at >= :start AND ordered_at <= :end "
+            f"AND status <> 'cancelled'",
+            store_revenue,
+        ),
+        (
+            "店舗メニュー別売上（月間）",
+            f"SELECT menu_id, sum(quantity), sum(total_price) FROM {BENCH_TABLE} "
+            f"WHERE store_id = :store_id AND ordered_at >= :start AND ordered_at <= :end "
+            f"AND status <> 'cancelled' GROUP BY menu_id",
+            store_revenue,
+        ),
+        (
+            "店舗ダッシュボード（当日・全ステータス）",
+            f"SELECT status, count(*) FROM {BENCH_TABLE} "
+            f"WHERE store_id = :store_id AND ordered_at >= :start AND ordered_at < :end "
+            f"GROUP BY status",
+            store_today,
+        ),
+        (
+            "全店舗売上（当日・オーナー）",
+            f"SELECT count(*), sum(total_price) FROM {BENCH_TABLE} "
+            f"WHERE ordered_at >= :start AND ordered_at < :end AND status <> 'cancelled'",
+            owner_day,
+        ),
+    ]
+
+
+def measure_queries(engine, args, start: datetime) -> dict:
+    """各クエリの応答時間の中央値（ms）"""
+    results = {}
+    with engine.connect() as conn:
+        for name, sql, params in hot_queries(args, start):
+            statement = text(sql)
+            timings = []
+            for _ in range(args.iterations):
+                values = params()
+                started = time.perf_counter()
+                conn.execute(statement, values).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+
+def index_sizes(engine) -> dict:
+    """インデックスのサイズ（KB）。PostgreSQL 以外は取得しない"""
+    if engine.dialect.name != "postgresql":
+        return {}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) "
+                "FROM pg_index WHERE indrelid = CAST(:table AS regclass)"
+            ),
+            {"table": BENCH_TABLE},
+        ).all()
+    return {name: size // 1024 for name, size in rows}
+
+
+def run(engine, index_set: str, args, start: datetime) -> dict:
+    metadata = MetaData()
+    table = build_table(metadata, index_set)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    try:
+        rows_per_second = measure_inserts(engine, table, args, start)
+        analyze(engine)
+        return {
+            "inserts": rows_per_second,
+            "queries": measure_queries(engine, args, start),
+            "sizes": index_sizes(engine),
+        }
+    finally:
+        if not args.keep:
+            metadata.drop_all(engine)
+
+
+def print_report(before: dict, after: dict, args, dialect: str) -> None:
+    print(f"\n{'=' * 78}")
+    print("注文インデックス構成ベンチマーク結果")
+    print(f"実行時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"データベース: {dialect} / 行数: {args.rows:,} / 試行回数: {args.iterations}回")
+    print(f"{'=' * 78}")
+    print(f"{'項目':<36} {'変更前':>12} {'変更後':>12} {'比率':>8}")
+    print(f"{'-' * 78}")
+    print(
+        f"{'挿入スループット (行/秒)':<36} {before['inserts']:>12,.0f} "
+        f"{after['inserts']:>12,.0f} {after['inserts'] / before['inserts']:>7.2f}x"
+    )
+    for name, before_ms in before["queries"].items():
+        after_ms = after["queries"][name]
+        speedup = before_ms / after_ms if after_ms else 0
+        print(f"{name + ' (ms)':<36} {before_ms:>12.3f} {after_ms:>12.3f} {speedup:>7.2f}x")
+
+    for label, result in (("変更前", before), ("変更後", after)):
+        if not result["sizes"]:
+            continue
+        print(f"\nインデックスサイズ（{label}）")
+        for name, size in sorted(result["sizes"].items()):
+            print(f"  {name:<50} {size:>10,} KB")
+        print(f"  {'合計':<50} {sum(result['sizes'].values()):>10,} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="注文テーブルのインデックス構成ベンチマーク")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL"),
+        help="測定するデータベース（省略時は環境変数 DATABASE_URL）",
+    )
+    parser.add_argument("--rows", type=int, default=200000, help="挿入する注文数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="1回の挿入の行数")
+    parser.add_argument("--iterations", type=int, default=30, help="各クエリの試行回数")
+    parser.add_argument("--days", type=int, default=180, help="注文日時の分布日数")
+    parser.add_argument("--users", type=int, default=5000, help="顧客数")
+    parser.add_argument("--stores", type=int, default=20, help="店舗数")
+    parser.add_argument("--menus", type=int, default=40, help="メニュー数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    parser.add_argument(
+        "--keep", action="store_true", help="測定後に作業用テーブルを削除しない"
+    )
+    args = parser.parse_args()
+
+    if not args.database_url:
+        print("❌ DATABASE_URL が設定されていません")
+        sys.exit(1)
+
+    engine = create_engine(args.database_url)
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(
+        days=args.days
+    )
+
+    results = {}
+    for index_set in ("before", "after"):
+        print(f"測定中: {'変更前' if index_set == 'before' else '変更後'}のインデックス構成...")
+        results[index_set] = run(engine, index_set, args, start)
+
+    print_report(results["before"], results["after"], args, engine.dialect.name)
+
+
+if __name__ == "__main__":
+    main()
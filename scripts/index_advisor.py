@@ -0,0 +1,142 @@
+"""
+インデックスアドバイザー
+
+アプリが実行したSQL（SQL_CAPTURE_FILE で記録）を EXPLAIN にかけ、
+大きなテーブルへの逐次スキャン・使われていないインデックス・
+他のインデックスの先頭列と重複するインデックスを報告し、
+候補のAlembicマイグレーションを生成する。
+
+SQLの記録方法:
+    SQL_CAPTURE_FILE=captures/sql.jsonl uvicorn main:app
+    python scripts/benchmark_dashboard.py    # 別のターミナルでホットなAPIを実行
+
+使用方法:
+    python scripts/index_advisor.py captures/sql.jsonl
+    python scripts/index_advisor.py captures/sql.jsonl --min-rows 10000
+    python scripts/index_advisor.py captures/sql.jsonl \\
+        --output alembic/versions/xxxx_index_advisor_candidates.py
+
+記録時と同じ種類のデータベース（ローカルの PostgreSQL または SQLite）に対して実行する。
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.index_advisor import (
+    DEFAULT_MIN_ROWS,
+    AdvisorReport,
+    alembic_heads,
+    analyze_workload,
+    render_migration,
+)
+from services.sql_capture import load_captured_statements
+
+VERSIONS_DIR = Path(__file__).parent.parent / "alembic" / "versions"
+
+
+def _shorten(statement: str, width: int = 100) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= width else statement[: width - 3] + "..."
+
+
+def print_report(report: AdvisorReport, min_rows: int) -> None:
+    print(f"\n{'=' * 70}")
+    print("インデックスアドバイザー結果")
+    print(f"{'=' * 70}")
+    print(f"分析したSQL: {report.explained}件")
+    if report.skipped:
+        print(f"種類の異なるデータベースで記録したため対象外: {report.skipped}件")
+
+    print(f"\n■ 大きなテーブル（{min_rows:,}行以上）への逐次スキャン")
+    if not report.seq_scans:
+        print("  なし")
+    for finding in report.seq_scans:
+        print(
+            f"  {finding.table}（約{finding.rows:,}行）: "
+            f"{finding.statements}文 / {finding.executions}回"
+        )
+        if not finding.candidate:
+            print("    候補: なし（絞り込み条件がありません）")
+        elif finding.covered_by:
+            print(
+                f"    候補 {finding.candidate} は既存の {finding.covered_by} で賄えます"
+                "（統計情報・条件の型を確認してください）"
+            )
+        else:
+            print(f"    候補: {finding.index_name} {finding.candidate}")
+        print(f"    例: {_shorten(finding.sample)}")
+
+    print("\n■ 使われていないインデックス")
+    if not report.unused:
+        print("  なし")
+    for index in report.unused:
+        print(f"  {index.table}.{index.name} {index.columns}")
+
+    print("\n■ 他のインデックスの先頭列と重複するインデックス")
+    if not report.redundant:
+        print("  なし")
+    for item in report.redundant:
+        print(
+            f"  {item.index.table}.{item.index.name} {item.index.columns}"
+            f" → {item.covered_by.name} {item.covered_by.columns}"
+        )
+
+    if report.failed:
+        print(f"\n■ EXPLAIN に失敗したSQL: {len(report.failed)}件")
+        for statement, error in report.failed:
+            print(f"  {_shorten(statement)}")
+            print(f"    {error.splitlines()[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="記録したSQLの実行計画からインデックスの過不足を分析"
+    )
+    parser.add_argument("capture", help="SQL_CAPTURE_FILE で記録したファイル")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL"),
+        help="分析するデータベース（省略時は環境変数 DATABASE_URL）",
+    )
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=DEFAULT_MIN_ROWS,
+        help="逐次スキャンを報告するテーブルの最小行数",
+    )
+    parser.add_argument(
+        "--output",
+        help="候補のマイグレーションの出力先（省略時は標準出力に表示）",
+    )
+    args = parser.parse_args()
+
+    if not args.database_url:
+        print("❌ DATABASE_URL が設定されていません")
+        sys.exit(1)
+
+    statements = load_captured_statements(Path(args.capture))
+    print(f"記録したSQL: {len(statements)}種類")
+
+    engine = create_engine(args.database_url)
+    report = analyze_workload(engine, statements, min_rows=args.min_rows)
+    print_report(report, args.min_rows)
+
+    migration = render_migration(report, alembic_heads(VERSIONS_DIR))
+    if args.output:
+        Path(args.output).write_text(migration, encoding="utf-8")
+        print(f"\n✓ 候補のマイグレーションを書き出しました: {args.output}")
+    else:
+        print(f"\n{'=' * 70}")
+        print("候補のマイグレーション")
+        print(f"{'=' * 70}")
+        print(migration)
+
+
+if __name__ == "__main__":
+    main()
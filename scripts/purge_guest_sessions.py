@@ -0,0 +1,61 @@
+"""
+期限切れゲストセッション削除スクリプト
+
+有効期限切れかつ未変換のゲストセッションとカートをバッチ単位で削除します
+
+使用方法:
+    python scripts/purge_guest_sessions.py
+    python scripts/purge_guest_sessions.py --batch-size 500 --max-batches 10
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# ルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.guest_session_cleanup import (
+    PURGE_BATCH_SIZE,
+    purge_expired_guest_sessions,
+)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="期限切れゲストセッション削除スクリプト")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=PURGE_BATCH_SIZE,
+        help=f"1バッチあたりの削除件数 (デフォルト: {PURGE_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=None,
+        help="最大バッチ数 (デフォルト: 対象がなくなるまで)",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("期限切れゲストセッション削除")
+    print("=" * 60)
+
+    try:
+        result = purge_expired_guest_sessions(
+            batch_size=args.batch_size, max_batches=args.max_batches
+        )
+    except Exception as e:
+        print(f"✗ 削除に失敗しました: {e}")
+        sys.exit(1)
+
+    print(f"✓ セッション削除: {result['sessions_deleted']}件")
+    print(f"✓ カートアイテム削除: {result['cart_items_deleted']}件")
+    print(f"  バッチ数: {result['batches']}")
+    print(f"  所要時間: {result['elapsed_seconds']}秒")
+    print(f"  削除速度: {result['rows_per_second']}行/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+メニュー検索インデックス再構築スクリプト
+
+全メニューからn-gram検索インデックス（menu_search_index）を作り直します
+（マイグレーションを経由せずにテーブルを作成した場合や、一括更新の後などに使用）
+
+使用方法:
+    python scripts/rebuild_menu_search_index.py
+"""
+
+import sys
+from pathlib import Path
+
+# ルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import Base, engine
+from services.menu_search import rebuild_menu_search_index
+
+
+def main():
+    """メイン処理"""
+    print("=" * 60)
+    print("メニュー検索インデックス再構築")
+    print("=" * 60)
+
+    try:
+        # 検索インデックスのテーブルが無い場合は作成する
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            count = rebuild_menu_search_index(conn)
+    except Exception as e:
+        print(f"✗ 再構築に失敗しました: {e}")
+        sys.exit(1)
+
+    print(f"✓ {count}件のメニューを登録しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+送信待ちメール送信スクリプト
+
+email_outbox テーブルの送信待ちメールを1回分送信します
+（docker-compose の MailHog に対して動作確認する場合などに使用）
+
+使用方法:
+    python scripts/send_email_outbox.py
+    python scripts/send_email_outbox.py --batch-size 100
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# ルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.email_outbox import EMAIL_OUTBOX_BATCH_SIZE, send_pending_emails
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="送信待ちメール送信スクリプト")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMAIL_OUTBOX_BATCH_SIZE,
+        help=f"1回で送信する最大件数 (デフォルト: {EMAIL_OUTBOX_BATCH_SIZE})",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("送信待ちメール送信")
+    print("=" * 60)
+
+    try:
+        result = send_pending_emails(batch_size=args.batch_size)
+    except Exception as e:
+        print(f"✗ 送信に失敗しました: {e}")
+        sys.exit(1)
+
+    print(f"✓ 送信: {result['sent']}件")
+    print(f"  再試行予約: {result['retried']}件")
+    print(f"  失敗確定: {result['failed']}件")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""In-process, versioned per-store menu catalog snapshots."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from datetime import datetime, time as dt_time
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Menu, MenuCategory, Store
+from services.catalog_version import get_store_catalog_version
+from services.menu_suggest import MenuPrefixIndex
+
+# 保持する店舗数の上限（超過時は最も古く使われた店舗のスナップショットから削除）
+CATALOG_SNAPSHOT_MAX_STORES = int(os.getenv("CATALOG_SNAPSHOT_MAX_STORES", "256"))
+
+# DB上のカタログバージョンを再確認するまでの秒数。
+# 同一プロセス内の書き込みはコミット時に即座に破棄されるため、他ワーカーでの変更が反映されるまでの最大遅延となる
+CATALOG_SNAPSHOT_RECHECK_SECONDS = float(
+    os.getenv("CATALOG_SNAPSHOT_RECHECK_SECONDS", "2")
+)
+
+
+@dataclass(frozen=True)
+class StoreSnapshot:
+    """店舗の読み取り専用スナップショット"""
+
+    id: int
+    name: str
+    address: str
+    phone_number: str
+    email: str
+    opening_time: Optional[dt_time]
+    closing_time: Optional[dt_time]
+    description: Optional[str]
+    image_url: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, store: Store) -> "StoreSnapshot":
+        return cls(
+            id=store.id,
+            name=store.name,
+            address=store.address,
+            phone_number=store.phone_number,
+            email=store.email,
+            opening_time=store.opening_time,
+            closing_time=store.closing_time,
+            description=store.description,
+            image_url=store.image_url,
+            is_active=bool(store.is_active),
+            created_at=store.created_at,
+            updated_at=store.updated_at,
+        )
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    """メニューカテゴリの読み取り専用スナップショット"""
+
+    id: int
+    store_id: int
+    name: str
+    description: Optional[str]
+    display_order: int
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, category: MenuCategory) -> "CategorySnapshot":
+        return cls(
+            id=category.id,
+            store_id=category.store_id,
+            name=category.name,
+            description=category.description,
+            display_order=category.display_order or 0,
+            is_active=bool(category.is_active),
+            created_at=category.created_at,
+            updated_at=category.updated_at,
+        )
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """メニューの読み取り専用スナップショット（MenuResponse と同じ属性を持つ）"""
+
+    id: int
+    store_id: int
+    name: str
+    price: int
+    description: Optional[str]
+    image_url: Optional[str]
+    is_available: bool
+    category_id: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    store: StoreSnapshot
+    category: Optional[CategorySnapshot]
+
+    @classmethod
+    def from_row(
+        cls,
+        menu: Menu,
+        store: StoreSnapshot,
+        categories: Mapping[int, CategorySnapshot],
+    ) -> "MenuSnapshot":
+        return cls(
+            id=menu.id,
+            store_id=menu.store_id,
+            name=menu.name,
+            price=menu.price,
+            description=menu.description,
+            image_url=menu.image_url,
+            is_available=bool(menu.is_available),
+            category_id=menu.category_id,
+            created_at=menu.created_at,
+            updated_at=menu.updated_at,
+            store=store,
+            category=categories.get(menu.category_id),
+        )
+
+
+@dataclass(frozen=True)
+class StoreCatalog:
+    """
+    店舗のカタログ（メニュー・カテゴリ）の不変スナップショット
+
+    作成後は変更されないため、ロックなしで複数リクエストから参照できる
+    """
+
+    store_id: int
+    version: int
+    store: StoreSnapshot
+    menus: Mapping[int, MenuSnapshot]
+    categories: Mapping[int, CategorySnapshot]
+    # メニュー名順（公開メニュー一覧の並び順）
+    menus_by_name: Tuple[MenuSnapshot, ...]
+
+    @classmethod
+    def build(cls, db: Session, store_id: int) -> Optional["StoreCatalog"]:
+        """
+        DBから店舗・メニュー・カテゴリを読み込んで作成
+
+        店舗とカテゴリを1クエリ、メニューを1クエリの計2クエリで読み込む
+
+        Returns:
+            Optional[StoreCatalog]: カタログ（店舗が存在しない場合はNone）
+        """
+        rows = (
+            db.query(Store, MenuCategory)
+            .outerjoin(MenuCategory, MenuCategory.store_id == Store.id)
+            .filter(Store.id == store_id)
+            .all()
+        )
+        if not rows:
+            return None
+        store = rows[0][0]
+        store_snapshot = StoreSnapshot.from_row(store)
+        categories = {
+            category.id: CategorySnapshot.from_row(category)
+            for _, category in rows
+            if category is not None
+        }
+        menus = [
+            MenuSnapshot.from_row(menu, store_snapshot, categories)
+            for menu in db.query(Menu).filter(Menu.store_id == store_id)
+        ]
+        return cls(
+            store_id=store_id,
+            version=store.catalog_version,
+            store=store_snapshot,
+            menus=MappingProxyType({menu.id: menu for menu in menus}),
+            categories=MappingProxyType(categories),
+            menus_by_name=tuple(sorted(menus, key=lambda menu: menu.name)),
+        )
+
+    def get_menu(self, menu_id: int) -> Optional[MenuSnapshot]:
+        return self.menus.get(menu_id)
+
+    def list_menus(
+        self,
+        is_available: Optional[bool] = None,
+        category_id: Optional[int] = None,
+    ) -> Tuple[MenuSnapshot, ...]:
+        """条件に合うメニューをメニュー名順で返す"""
+        return tuple(
+            menu
+            for menu in self.menus_by_name
+            if (is_available is None or menu.is_available == is_available)
+            and (category_id is None or menu.category_id == category_id)
+        )
+
+    @cached_property
+    def prefix_index(self) -> MenuPrefixIndex:
+        """全メニューの名前の前方一致インデックス（初回参照時に作成）"""
+        return MenuPrefixIndex(self.menus_by_name)
+
+    @cached_property
+    def available_prefix_index(self) -> MenuPrefixIndex:
+        """販売中メニューの名前の前方一致インデックス（初回参照時に作成）"""
+        return MenuPrefixIndex(self.list_menus(is_available=True))
+
+    @cached_property
+    def active_categories(self) -> Tuple[CategorySnapshot, ...]:
+        """有効なカテゴリを表示順で返す"""
+        return tuple(
+            sorted(
+                (c for c in self.categories.values() if c.is_active),
+                key=lambda c: (c.display_order, c.id),
+            )
+        )
+
+    @cached_property
+    def available_menus_by_category(self) -> Mapping[Optional[int], Tuple[MenuSnapshot, ...]]:
+        """
+        販売中のメニューを有効なカテゴリごとに分類して返す（メニュー名順）
+
+        カテゴリ未設定・無効なカテゴリのメニューはキー None にまとめる
+        """
+        active_ids = {c.id for c in self.active_categories}
+        grouped: Dict[Optional[int], list] = {}
+        for menu in self.menus_by_name:
+            if not menu.is_available:
+                continue
+            key = menu.category_id if menu.category_id in active_ids else None
+            grouped.setdefault(key, []).append(menu)
+        return MappingProxyType({key: tuple(menus) for key, menus in grouped.items()})
+
+
+class CatalogCache:
+    """店舗ごとのカタログスナップショットのLRUキャッシュ"""
+
+    def __init__(
+        self,
+        max_stores: int = CATALOG_SNAPSHOT_MAX_STORES,
+        recheck_seconds: float = CATALOG_SNAPSHOT_RECHECK_SECONDS,
+    ):
+        self.max_stores = max_stores
+        self.recheck_seconds = recheck_seconds
+        # 店舗ID -> (スナップショット, 最後にバージョンを確認した時刻)
+        self._entries: "OrderedDict[int, Tuple[StoreCatalog, float]]" = OrderedDict()
+        # メニューID -> 店舗ID（読み込み済みの店舗のみ）
+        self._store_by_menu: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_catalog(
+        self,
+        db: Session,
+        store_id: int,
+        max_staleness: Optional[float] = None,
+        version: Optional[int] = None,
+    ) -> Optional[StoreCatalog]:
+        """
+        店舗のカタログを取得
+
+        Args:
+            db: データベースセッション
+            store_id: 店舗ID
+            max_staleness: バージョンを再確認せずに使う最大秒数（デフォルト: CATALOG_SNAPSHOT_RECHECK_SECONDS）
+            version: 呼び出し側で取得済みのカタログバージョン（指定時は再確認のクエリを省略）
+
+        Returns:
+            Optional[StoreCatalog]: カタログ（店舗が存在しない場合はNone）
+        """
+        if max_staleness is None:
+            max_staleness = self.recheck_seconds
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(store_id)
+            if entry is not None:
+                self._entries.move_to_end(store_id)
+        if entry is not None and version is None and now - entry[1] < max_staleness:
+            self.hits += 1
+            return entry[0]
+
+        # 未読込の店舗はバージョンを確認せずに読み込む（店舗の行からバージョンを取得する）
+        if entry is not None and version is None:
+            version = get_store_catalog_version(db, store_id)
+            if version is None:
+                self.invalidate([store_id])
+                return None
+
+        if entry is not None and entry[0].version == version:
+            with self._lock:
+                if store_id in self._entries:
+                    self._entries[store_id] = (entry[0], now)
+            self.hits += 1
+            return entry[0]
+
+        # バージョンが変わった（または未読込）場合は新しいスナップショットを作成して差し替える
+        self.misses += 1
+        catalog = StoreCatalog.build(db, store_id)
+        if catalog is None:
+            self.invalidate([store_id])
+            return None
+        self._put(catalog, now)
+        return catalog
+
+    def find_menu(
+        self, db: Session, menu_id: int, max_staleness: Optional[float] = None
+    ) -> Optional[MenuSnapshot]:
+        """
+        メニューIDからメニューのスナップショットを取得
+
+        店舗が未読込の場合のみ、メニューの店舗IDをDBから取得する
+
+        Returns:
+            Optional[MenuSnapshot]: メニュー（存在しない場合はNone）
+        """
+        store_id = self._store_by_menu.get(menu_id)
+        if store_id is not None:
+            catalog = self.get_catalog(db, store_id, max_staleness=max_staleness)
+            menu = catalog.get_menu(menu_id) if catalog else None
+            if menu is not None:
+                return menu
+
+        # 未読込、または削除・店舗移動されたメニュー
+        store_id = db.query(Menu.store_id).filter(Menu.id == menu_id).scalar()
+        if store_id is None:
+            return None
+        catalog = self.get_catalog(db, store_id, max_staleness=0)
+        return catalog.get_menu(menu_id) if catalog else None
+
+    def invalidate(self, store_ids: Iterable[int]) -> None:
+        """店舗のスナップショットを破棄"""
+        with self._lock:
+            for store_id in store_ids:
+                self._remove_locked(store_id)
+
+    def clear(self) -> None:
+        """全スナップショットを破棄"""
+        with self._lock:
+            self._entries.clear()
+            self._store_by_menu.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """メトリクスを取得"""
+        total = self.hits + self.misses
+        return {
+            "stores": len(self._entries),
+            "menus": len(self._store_by_menu),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _put(self, catalog: StoreCatalog, checked_at: float) -> None:
+        with self._lock:
+            current = self._entries.get(catalog.store_id)
+            if current is not None and current[0].version > catalog.version:
+                # 並行して読み込まれた新しいスナップショットを古いもので上書きしない
+                return
+            self._remove_locked(catalog.store_id)
+            self._entries[catalog.store_id] = (catalog, checked_at)
+            for menu_id in catalog.menus:
+                self._store_by_menu[menu_id] = catalog.store_id
+            while len(self._entries) > self.max_stores:
+                oldest_store_id = next(iter(self._entries))
+                self._remove_locked(oldest_store_id)
+
+    def _remove_locked(self, store_id: int) -> None:
+        entry = self._entries.pop(store_id, None)
+        if entry is None:
+            return
+        for menu_id in entry[0].menus:
+            if self._store_by_menu.get(menu_id) == store_id:
+                del self._store_by_menu[menu_id]
+
+
+catalog_cache = CatalogCache()
+
+
+# ===== 同一プロセス内の書き込みでの即時破棄 =====
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_bumped_stores(session):
+    # ロールバック時もトランザクション内で読み込んだ未確定のスナップショットが残らないよう破棄する
+    bumped: Optional[Set[int]] = session.info.pop("catalog_bumped_stores", None)
+    if bumped:
+        catalog_cache.invalidate(bumped)
@@ -0,0 +1,160 @@
+"""Server-side copy of a store's menu catalog with set-based INSERT ... SELECT."""
+
+from typing import Dict
+
+from sqlalchemy import exists, func, insert, literal, null, or_, select
+from sqlalchemy.orm import Session
+
+from models import Menu, MenuCategory
+from services.catalog_version import bump_catalog_version
+from services.menu_audit import menu_audit_writer
+from services.menu_search import index_menus
+
+_categories = MenuCategory.__table__
+_menus = Menu.__table__
+
+# 複製する列（store_id は複製先に置き換える）
+_CATEGORY_COLUMNS = ("name", "description", "display_order", "is_active")
+_MENU_COLUMNS = ("external_id", "name", "price", "description", "is_available")
+
+
+def clone_catalog(
+    db: Session,
+    source_store_id: int,
+    target_store_id: int,
+    user_id: int,
+    share_images: bool = True,
+) -> Dict[str, int]:
+    """
+    店舗のカテゴリとメニューを別の店舗に複製（コミットは呼び出し側で行う）
+
+    カタログの件数に関わらず一定回数のSQLで複製する。
+    複製先に同名のカテゴリがある場合はそれを使い、同名または同じ external_id の
+    メニューがある場合は複製しないため、営業中の店舗に対して何度実行してもよい。
+
+    Args:
+        db: データベースセッション
+        source_store_id: 複製元の店舗ID
+        target_store_id: 複製先の店舗ID
+        user_id: 実行したユーザーのID（監査ログ用）
+        share_images: 画像ファイルを複製元と共有する（Falseの場合は画像なし）
+
+    Returns:
+        Dict[str, int]: 作成したカテゴリ数・メニュー数、既存のため複製しなかったメニュー数
+    """
+    # カテゴリ: 複製元の名前ごとに1件、複製先にない名前のみ作成
+    source_category = _categories.alias("source_category")
+    target_category = _categories.alias("target_category")
+    first_per_name = (
+        select(func.min(source_category.c.id))
+        .where(source_category.c.store_id == source_store_id)
+        .group_by(source_category.c.name)
+    )
+    new_categories = (
+        select(
+            *(_categories.c[column] for column in _CATEGORY_COLUMNS),
+            literal(target_store_id),
+        )
+        .where(
+            _categories.c.id.in_(first_per_name),
+            ~exists().where(
+                target_category.c.store_id == target_store_id,
+                target_category.c.name == _categories.c.name,
+            ),
+        )
+        .order_by(_categories.c.id)
+    )
+    categories_created = len(
+        db.execute(
+            insert(_categories)
+            .from_select([*_CATEGORY_COLUMNS, "store_id"], new_categories)
+            .returning(_categories.c.id)
+        ).all()
+    )
+
+    # メニュー: カテゴリは名前で複製先のカテゴリに対応付ける
+    target_category_id = (
+        select(func.min(target_category.c.id))
+        .select_from(
+            source_category.join(
+                target_category, target_category.c.name == source_category.c.name
+            )
+        )
+        .where(
+            source_category.c.id == _menus.c.category_id,
+            target_category.c.store_id == target_store_id,
+        )
+        .scalar_subquery()
+    )
+    existing = _menus.alias("existing_menu")
+    new_menus = (
+        select(
+            *(_menus.c[column] for column in _MENU_COLUMNS),
+            _menus.c.image_url if share_images else null(),
+            target_category_id,
+            literal(target_store_id),
+        )
+        .where(
+            _menus.c.store_id == source_store_id,
+            ~exists().where(
+                existing.c.store_id == target_store_id,
+                or_(
+                    existing.c.name == _menus.c.name,
+                    existing.c.external_id == _menus.c.external_id,
+                ),
+            ),
+        )
+        .order_by(_menus.c.id)
+    )
+    created = db.execute(
+        insert(_menus)
+        .from_select(
+            [*_MENU_COLUMNS, "image_url", "category_id", "store_id"], new_menus
+        )
+        .returning(
+            _menus.c.id,
+            _menus.c.store_id,
+            _menus.c.name,
+            _menus.c.price,
+            _menus.c.description,
+            _menus.c.is_available,
+            _menus.c.category_id,
+        )
+    ).all()
+
+    source_menu_count = db.execute(
+        select(func.count()).where(_menus.c.store_id == source_store_id)
+    ).scalar_one()
+
+    if created:
+        menu_audit_writer.record(
+            db,
+            [
+                {
+                    "menu_id": menu.id,
+                    "store_id": target_store_id,
+                    "user_id": user_id,
+                    "action": "create",
+                    "changes": {
+                        "name": menu.name,
+                        "price": menu.price,
+                        "description": menu.description,
+                        "is_available": menu.is_available,
+                        "category_id": menu.category_id,
+                        "cloned_from_store_id": source_store_id,
+                    },
+                }
+                for menu in created
+            ],
+        )
+        # フラッシュを経由しない書き込みのため検索インデックスを明示的に更新
+        index_menus(db.connection(), created)
+
+    if categories_created or created:
+        bump_catalog_version(db, [target_store_id])
+
+    return {
+        "categories_created": categories_created,
+        "menus_created": len(created),
+        "menus_skipped": source_menu_count - len(created),
+    }
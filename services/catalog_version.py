@@ -0,0 +1,141 @@
+"""Per-store catalog versions and HTTP cache validators for public endpoints."""
+
+import hashlib
+import os
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session, attributes
+
+from models import Menu, MenuCategory, Store
+
+# 公開APIレスポンスの Cache-Control max-age（秒）。0の場合は毎回ETagで再検証させる
+PUBLIC_CATALOG_MAX_AGE_SECONDS = int(os.getenv("PUBLIC_CATALOG_MAX_AGE_SECONDS", "0"))
+
+
+def bump_catalog_version(db: Session, store_ids: Iterable[int]) -> None:
+    """
+    店舗のカタログバージョンを加算
+
+    ORMのフラッシュを経由する変更は自動で加算されるため、
+    一括UPDATEなどフラッシュを経由しない書き込みの後に呼び出す。
+
+    Args:
+        db: データベースセッション
+        store_ids: 対象の店舗ID
+    """
+    ids = sorted({store_id for store_id in store_ids if store_id is not None})
+    if not ids:
+        return
+    db.connection().execute(
+        update(Store.__table__)
+        .where(Store.__table__.c.id.in_(ids))
+        .values(catalog_version=Store.__table__.c.catalog_version + 1)
+    )
+    # コミット時にプロセス内のカタログスナップショットを破棄するために記録
+    db.info.setdefault("catalog_bumped_stores", set()).update(ids)
+
+
+def get_store_catalog_version(db: Session, store_id: int) -> Optional[int]:
+    """
+    店舗のカタログバージョンを取得
+
+    Returns:
+        Optional[int]: バージョン（店舗が存在しない場合はNone）
+    """
+    return (
+        db.query(Store.catalog_version).filter(Store.id == store_id).scalar()
+    )
+
+
+def get_stores_list_version(db: Session) -> str:
+    """
+    店舗一覧全体のバージョンを取得
+
+    各店舗のバージョンは単調増加するため、件数・最大ID・合計値の組で変更を検出できる
+    """
+    count, max_id, total = db.query(
+        func.count(Store.id),
+        func.coalesce(func.max(Store.id), 0),
+        func.coalesce(func.sum(Store.catalog_version), 0),
+    ).one()
+    return f"{count}.{max_id}.{total}"
+
+
+def make_etag(*parts: object) -> str:
+    """バージョンとクエリ条件から強いETagを作成"""
+    digest = hashlib.sha1(
+        "|".join(str(part) for part in parts).encode("utf-8")
+    ).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーがETagに一致するか判定（弱い比較）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str) -> dict:
+    """公開APIレスポンス用のキャッシュヘッダー"""
+    if PUBLIC_CATALOG_MAX_AGE_SECONDS > 0:
+        cache_control = f"public, max-age={PUBLIC_CATALOG_MAX_AGE_SECONDS}"
+    else:
+        cache_control = "public, no-cache"
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+# ===== 書き込み時のバージョン加算 =====
+
+
+def _store_ids_of(obj) -> Set[int]:
+    if isinstance(obj, Store):
+        return {obj.id} if obj.id is not None else set()
+
+    # 店舗を移動した場合は移動元・移動先の両方を対象にする
+    history = attributes.get_history(obj, "store_id")
+    ids = set(history.added or ()) | set(history.unchanged or ()) | set(
+        history.deleted or ()
+    )
+    if obj.store_id is not None:
+        ids.add(obj.store_id)
+    return {store_id for store_id in ids if store_id is not None}
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_stores(session, flush_context, instances):
+    changed = session.info.setdefault("catalog_changed_stores", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (Store, Menu, MenuCategory)):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Store) and obj in session.new:
+            # 新規店舗はバージョン0から始まる
+            continue
+        changed.update(_store_ids_of(obj))
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _bump_changed_stores(session, flush_context):
+    changed = session.info.pop("catalog_changed_stores", None)
+    if changed:
+        bump_catalog_version(session, changed)
+        # セッション内の店舗オブジェクトは古い値を保持しているため次回アクセス時に再読込させる
+        for key, obj in list(session.identity_map.items()):
+            if isinstance(obj, Store) and key[1][0] in changed:
+                session.expire(obj, ["catalog_version"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_stores(session):
+    session.info.pop("catalog_changed_stores", None)
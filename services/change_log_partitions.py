@@ -0,0 +1,245 @@
+"""Archival of old months of the menu_change_logs table.
+
+On PostgreSQL the table is range-partitioned by changed_at (see
+services.partitions). Old months are archived by streaming the
+partition's rows to gzip-compressed JSON Lines, then detaching and
+dropping it. Other databases keep a single table and archive with DELETE.
+"""
+
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from database import engine
+from services.partitions import (
+    add_months,
+    default_partition_name,
+    has_default_partition,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+
+# パーティション分割する監査ログのテーブル名
+PARENT_TABLE = "menu_change_logs"
+
+# 監査ログを保持する月数（これより古い月はアーカイブ対象）
+MENU_CHANGE_LOG_RETENTION_MONTHS = int(
+    os.getenv("MENU_CHANGE_LOG_RETENTION_MONTHS", "24")
+)
+
+# アーカイブファイルの出力先
+MENU_CHANGE_LOG_ARCHIVE_DIR = os.getenv(
+    "MENU_CHANGE_LOG_ARCHIVE_DIR", "archives/menu_change_logs"
+)
+
+# 書き出し時に1回に取得する行数
+MENU_CHANGE_LOG_ARCHIVE_BATCH_SIZE = int(
+    os.getenv("MENU_CHANGE_LOG_ARCHIVE_BATCH_SIZE", "5000")
+)
+
+
+@dataclass
+class ArchivedMonth:
+    """アーカイブした月"""
+
+    month: date
+    rows: int
+    path: Optional[Path]
+
+
+# ===== アーカイブ =====
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _month_datetime(month: date) -> datetime:
+    return datetime.combine(month, datetime.min.time())
+
+
+# 1か月分の行の条件（パラメータは _month_params）
+IN_MONTH = "changed_at >= :start AND changed_at < :end"
+
+
+def _month_params(month: date) -> dict:
+    return {
+        "start": _month_datetime(month),
+        "end": _month_datetime(add_months(month, 1)),
+    }
+
+
+def _write_archive(
+    output_dir: Path, month: date, rows: Iterable, table: str = PARENT_TABLE
+) -> Tuple[Path, int]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{table}_{month:%Y-%m}.jsonl.gz"
+    count = 0
+    # 書き込み途中のファイルを残さないよう一時ファイルに書いてから置き換える
+    temporary = path.with_suffix(".tmp")
+    with gzip.open(temporary, "wt", encoding="utf-8") as f:
+        for row in rows:
+            record = dict(row._mapping)
+            if isinstance(record.get("changes"), str):
+                record["changes"] = json.loads(record["changes"])
+            f.write(json.dumps(record, ensure_ascii=False, default=_json_default))
+            f.write("\n")
+            count += 1
+    temporary.replace(path)
+    return path, count
+
+
+def _export(
+    bind: Engine,
+    output_dir: Path,
+    month: date,
+    table: str,
+    batch_size: int,
+    archive_name: Optional[str] = None,
+) -> Tuple[Path, int]:
+    """
+    1か月分の監査ログをファイルに書き出す（ファイル名は archive_name、省略時はテーブル名）
+
+    stream_results: PostgreSQL ではサーバーサイドカーソルで batch_size 行ずつ取得し、
+    1か月分をメモリに載せない。読み取りのみのためロックは ACCESS SHARE だけ。
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(
+            text(f"SELECT * FROM {table} WHERE {IN_MONTH} ORDER BY changed_at, id"),
+            _month_params(month),
+        )
+        return _write_archive(output_dir, month, result, archive_name or table)
+
+
+def _oldest_month(bind: Engine, table: str, cutoff: date) -> Optional[date]:
+    with bind.connect() as conn:
+        oldest = conn.execute(
+            text(f"SELECT min(changed_at) FROM {table} WHERE changed_at < :cutoff"),
+            {"cutoff": _month_datetime(cutoff)},
+        ).scalar()
+    if oldest is None:
+        return None
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+    return month_start(oldest)
+
+
+def _archive_rows_by_month(
+    bind: Engine,
+    table: str,
+    output_dir: Path,
+    cutoff: date,
+    dry_run: bool,
+    batch_size: int,
+) -> List[ArchivedMonth]:
+    """テーブルの cutoff より古い行を月ごとに書き出してから DELETE する"""
+    archived = []
+    month = _oldest_month(bind, table, cutoff)
+    while month is not None and month < cutoff:
+        params = _month_params(month)
+        if dry_run:
+            with bind.connect() as conn:
+                count = conn.execute(
+                    text(f"SELECT count(*) FROM {table} WHERE {IN_MONTH}"), params
+                ).scalar()
+            if count:
+                archived.append(ArchivedMonth(month, count, None))
+        else:
+            path, count = _export(bind, output_dir, month, table, batch_size)
+            if count:
+                with bind.begin() as conn:
+                    conn.execute(text(f"DELETE FROM {table} WHERE {IN_MONTH}"), params)
+                archived.append(ArchivedMonth(month, count, path))
+            else:
+                path.unlink()
+        month = add_months(month, 1)
+    return archived
+
+
+def archive_old_months(
+    bind: Engine = engine,
+    output_dir: Optional[Path] = None,
+    retention_months: int = MENU_CHANGE_LOG_RETENTION_MONTHS,
+    today: Optional[date] = None,
+    dry_run: bool = False,
+    batch_size: int = MENU_CHANGE_LOG_ARCHIVE_BATCH_SIZE,
+) -> List[ArchivedMonth]:
+    """
+    保持期間より古い月の監査ログをファイルに書き出して削除
+
+    月ごとに、書き出し（読み取りのみ）と削除（短いトランザクション）を分けて実行する。
+    PostgreSQL では切り離す前のパーティションから書き出し、書き出しが終わってから
+    DETACH と DROP だけを1つのトランザクションで行うため、親テーブルの
+    ACCESS EXCLUSIVE ロックは書き出しの間は保持しない。
+    DEFAULTパーティションに残っている古い行も月ごとに書き出して削除する。
+    書き出しに失敗した月は削除せず、それ以降の月も処理しない。
+
+    Args:
+        bind: DBエンジン
+        output_dir: 書き出し先のディレクトリ
+        retention_months: 保持する月数（今月を含む）
+        today: 基準日（テスト用）
+        dry_run: 対象の月を返すだけで書き出し・削除を行わない
+        batch_size: 書き出し時に1回に取得する行数
+
+    Returns:
+        List[ArchivedMonth]: アーカイブした月（DEFAULTパーティションの分は
+        menu_change_logs_default_YYYY-MM.jsonl.gz に書き出す）
+    """
+    output_dir = Path(output_dir or MENU_CHANGE_LOG_ARCHIVE_DIR)
+    cutoff = add_months(month_start(today or date.today()), -(retention_months - 1))
+
+    with bind.connect() as conn:
+        partitioned = is_partitioned(conn, PARENT_TABLE)
+        partitions = list_partitions(conn, PARENT_TABLE) if partitioned else []
+        has_default = partitioned and has_default_partition(conn, PARENT_TABLE)
+
+    if not partitioned:
+        # パーティションのないデータベースでは月ごとに書き出してから DELETE する
+        return _archive_rows_by_month(
+            bind, PARENT_TABLE, output_dir, cutoff, dry_run, batch_size
+        )
+
+    archived = []
+    for name, month in partitions:
+        if month >= cutoff:
+            break
+        if dry_run:
+            with bind.connect() as conn:
+                count = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            archived.append(ArchivedMonth(month, count, None))
+            continue
+        # 保持期間を過ぎた月には新しい行が入らないため、切り離す前に書き出せる
+        path, count = _export(
+            bind, output_dir, month, name, batch_size, archive_name=PARENT_TABLE
+        )
+        with bind.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+        archived.append(ArchivedMonth(month, count, path))
+
+    if has_default:
+        # 月パーティションがなかった期間の行はDEFAULTパーティションに残っている
+        archived.extend(
+            _archive_rows_by_month(
+                bind,
+                default_partition_name(PARENT_TABLE),
+                output_dir,
+                cutoff,
+                dry_run,
+                batch_size,
+            )
+        )
+    return archived
@@ -0,0 +1,277 @@
+"""Batched SMTP sender that drains the email outbox table."""
+
+import asyncio
+import os
+import smtplib
+import ssl
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from mail import EmailConfig
+from models import EmailOutbox
+
+# 1回の送信で処理する最大件数（1つのSMTP接続を使い回す単位）
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+
+# 送信ジョブの実行間隔（秒）。0以下で無効化
+EMAIL_OUTBOX_POLL_INTERVAL_SECONDS = int(
+    os.getenv("EMAIL_OUTBOX_POLL_INTERVAL_SECONDS", "5")
+)
+
+# 送信を試みる最大回数（超過したメールは failed として残す）
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+
+# 再試行の待ち時間の基準値（秒）。試行ごとに2倍にし、上限で打ち切る
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = int(
+    os.getenv("EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", "3600")
+)
+
+# 送信中として確保したメールのリース期間（秒）。ワーカーが送信途中で停止した場合、
+# この時間が過ぎると他のワーカーが再度取得する（バッチ全体の送信時間より長くする）
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "600"))
+
+# SMTP接続のタイムアウト（秒）
+EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS = float(
+    os.getenv("EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS", "10")
+)
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """
+    メール設定（EmailConfig）に従ってSMTP接続を開く
+
+    docker-compose の MailHog（ポート1025、TLS・認証なし）にもそのまま接続できる
+    """
+    context = ssl.create_default_context()
+    if not EmailConfig.MAIL_VALIDATE_CERTS:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if EmailConfig.MAIL_SSL_TLS:
+        smtp = smtplib.SMTP_SSL(
+            EmailConfig.MAIL_SERVER,
+            EmailConfig.MAIL_PORT,
+            timeout=EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS,
+            context=context,
+        )
+    else:
+        smtp = smtplib.SMTP(
+            EmailConfig.MAIL_SERVER,
+            EmailConfig.MAIL_PORT,
+            timeout=EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS,
+        )
+        if EmailConfig.MAIL_STARTTLS:
+            smtp.starttls(context=context)
+
+    if EmailConfig.MAIL_USE_CREDENTIALS:
+        smtp.login(EmailConfig.MAIL_USERNAME, EmailConfig.MAIL_PASSWORD)
+    return smtp
+
+
+def build_message(entry: EmailOutbox) -> EmailMessage:
+    """送信待ちメールからMIMEメッセージを作成"""
+    message = EmailMessage()
+    message["Subject"] = entry.subject
+    message["From"] = formataddr((EmailConfig.MAIL_FROM_NAME, EmailConfig.MAIL_FROM))
+    message["To"] = entry.recipient
+    message.set_content(entry.body, subtype=entry.subtype or "plain")
+    return message
+
+
+def backoff_seconds(attempts: int) -> int:
+    """試行回数に応じた再試行までの待ち時間（指数バックオフ）"""
+    return min(
+        EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)),
+        EMAIL_OUTBOX_MAX_BACKOFF_SECONDS,
+    )
+
+
+class EmailOutboxSender:
+    """送信待ちメールをバッチ単位で送信するサービス"""
+
+    def __init__(
+        self,
+        db: Session,
+        smtp_factory: Callable[[], smtplib.SMTP] = open_smtp_connection,
+    ):
+        """
+        Args:
+            db: データベースセッション
+            smtp_factory: SMTP接続を開く関数（テストでは差し替える）
+        """
+        self.db = db
+        self.smtp_factory = smtp_factory
+
+    def _claim_due_entries(
+        self, batch_size: int, now: datetime
+    ) -> List[Tuple[int, EmailMessage]]:
+        """
+        送信時刻に達したメールを送信中として確保し、コミットする
+
+        行ロックはこの短いトランザクションの間だけ保持する（SMTP送信中は保持しない）。
+        送信中の間は next_attempt_at をリースの期限として使い、期限までに結果が
+        記録されなかったメール（送信途中で停止したワーカーの分）は再度取得する。
+        """
+        # 複数ワーカーで同時に確保しないよう、取得した行はロックして他ワーカーはスキップする
+        entries = (
+            self.db.query(EmailOutbox)
+            .filter(
+                EmailOutbox.status.in_(("pending", "sending")),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        lease_expires_at = now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS)
+        claimed = []
+        for entry in entries:
+            entry.status = "sending"
+            entry.next_attempt_at = lease_expires_at
+            claimed.append((entry.id, build_message(entry)))
+        self.db.commit()
+        return claimed
+
+    def _send(
+        self, claimed: List[Tuple[int, EmailMessage]]
+    ) -> Dict[int, Optional[str]]:
+        """
+        確保したメールを1つのSMTP接続で送信する（DBには触れない）
+
+        Returns:
+            Dict[int, Optional[str]]: メールID -> エラー内容（送信できた場合はNone）
+        """
+        try:
+            smtp = self.smtp_factory()
+        except Exception as e:
+            # 接続自体に失敗した場合はバッチ全体を再試行に回す
+            return {
+                entry_id: f"SMTP connection failed: {e}" for entry_id, _ in claimed
+            }
+
+        errors: Dict[int, Optional[str]] = {}
+        try:
+            for entry_id, message in claimed:
+                try:
+                    smtp.send_message(message)
+                except smtplib.SMTPServerDisconnected as e:
+                    errors[entry_id] = str(e)
+                    # 切断された場合は接続し直して続行する
+                    smtp = self.smtp_factory()
+                except Exception as e:
+                    errors[entry_id] = str(e)
+                else:
+                    errors[entry_id] = None
+        except Exception as e:
+            # 再接続に失敗した場合は未処理のメールを再試行に回す
+            for entry_id, _ in claimed:
+                errors.setdefault(entry_id, f"SMTP connection failed: {e}")
+        finally:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+        return errors
+
+    def _record_failure(self, entry: EmailOutbox, error: str, now: datetime) -> None:
+        entry.attempts += 1
+        entry.last_error = error[:1000]
+        if entry.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+            entry.status = "failed"
+        else:
+            entry.status = "pending"
+            entry.next_attempt_at = now + timedelta(
+                seconds=backoff_seconds(entry.attempts)
+            )
+
+    def send_pending(
+        self,
+        batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """
+        送信時刻に達した送信待ちメールを1つのSMTP接続でまとめて送信する
+
+        確保（コミット）→ 送信 → 結果の記録（新しいトランザクション）の順に行い、
+        SMTP送信中はトランザクションを開いたままにしない。
+        送信に失敗したメールは指数バックオフで再試行を予約し、
+        最大試行回数に達したものは failed とする。
+
+        Args:
+            batch_size: 1回で送信する最大件数
+            now: 現在時刻（テスト用）
+
+        Returns:
+            Dict[str, int]: sent（送信件数）、retried（再試行予約件数）、failed（失敗確定件数）
+        """
+        now = now or datetime.now(timezone.utc)
+        result = {"sent": 0, "retried": 0, "failed": 0}
+
+        claimed = self._claim_due_entries(batch_size, now)
+        if not claimed:
+            return result
+
+        errors = self._send(claimed)
+
+        entries = (
+            self.db.query(EmailOutbox)
+            .filter(EmailOutbox.id.in_(errors), EmailOutbox.status == "sending")
+            .all()
+        )
+        for entry in entries:
+            error = errors[entry.id]
+            if error is None:
+                entry.status = "sent"
+                entry.sent_at = now
+                entry.last_error = None
+                result["sent"] += 1
+                continue
+            self._record_failure(entry, error, now)
+            if entry.status == "failed":
+                result["failed"] += 1
+            else:
+                result["retried"] += 1
+
+        self.db.commit()
+        return result
+
+
+def send_pending_emails(batch_size: int = EMAIL_OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """
+    新しいDBセッションで送信待ちメールを送信する
+
+    CLIスクリプトやアプリ内定期ジョブから呼び出す。
+    """
+    db = SessionLocal()
+    try:
+        return EmailOutboxSender(db).send_pending(batch_size=batch_size)
+    finally:
+        db.close()
+
+
+async def run_periodic_email_outbox_sender(
+    interval_seconds: int = EMAIL_OUTBOX_POLL_INTERVAL_SECONDS,
+) -> None:
+    """送信待ちメールの送信を一定間隔で実行し続ける（アプリ起動時にタスクとして登録）
+
+    SMTP送信は同期I/Oのため、イベントループをブロックしないようスレッドで実行する。
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await asyncio.to_thread(send_pending_emails)
+            if result["sent"] or result["retried"] or result["failed"]:
+                print(
+                    f"メール送信: 送信{result['sent']}件, "
+                    f"再試行予約{result['retried']}件, 失敗{result['failed']}件"
+                )
+        except Exception as e:
+            # 送信に失敗しても次回の実行は継続
+            print(f"メール送信ジョブエラー: {str(e)}")
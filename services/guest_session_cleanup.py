@@ -0,0 +1,168 @@
+"""Guest session cleanup service for purging expired guest sessions."""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import GuestCartItem, GuestSession
+
+# 1バッチあたりの削除件数（ロック保持時間を短く保つため小さめに設定）
+PURGE_BATCH_SIZE = int(os.getenv("GUEST_SESSION_PURGE_BATCH_SIZE", "1000"))
+
+# アプリ内定期ジョブの実行間隔（秒）。0以下で無効化
+PURGE_INTERVAL_SECONDS = int(os.getenv("GUEST_SESSION_PURGE_INTERVAL_SECONDS", "3600"))
+
+
+class GuestSessionCleanupService:
+    """期限切れゲストセッションとカートの削除を担当するサービス."""
+
+    def __init__(self, db: Session):
+        """Initialize the guest session cleanup service.
+
+        Args:
+            db: Database session
+        """
+        self.db = db
+
+    def purge_expired_sessions(
+        self,
+        batch_size: int = PURGE_BATCH_SIZE,
+        max_batches: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, float]:
+        """期限切れかつ未変換のゲストセッションをバッチ単位で削除する.
+
+        主キー順に batch_size 件ずつ対象IDを取得し、カートアイテムと
+        セッションを削除してバッチごとにコミットする。1トランザクションが
+        扱う行数を制限することで、長時間のロック保持を避ける。
+
+        Args:
+            batch_size: 1バッチあたりに削除するセッション数
+            max_batches: 最大バッチ数（None の場合は対象がなくなるまで）
+            now: 期限判定の基準時刻（デフォルト: 現在時刻）
+
+        Returns:
+            削除結果を含む辞書 {
+                'sessions_deleted': int,    # 削除したセッション数
+                'cart_items_deleted': int,  # 削除したカートアイテム数
+                'batches': int,             # 実行したバッチ数
+                'elapsed_seconds': float,   # 所要時間（秒）
+                'rows_per_second': float    # 1秒あたりの削除行数
+            }
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        cutoff = now or datetime.utcnow()
+        result = {
+            "sessions_deleted": 0,
+            "cart_items_deleted": 0,
+            "batches": 0,
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0,
+        }
+        started = time.perf_counter()
+
+        while max_batches is None or result["batches"] < max_batches:
+            # 主キー順に1バッチ分の対象を取得
+            rows = (
+                self.db.query(GuestSession.id, GuestSession.session_id)
+                .filter(
+                    GuestSession.expires_at < cutoff,
+                    GuestSession.converted_to_user_id.is_(None),
+                )
+                .order_by(GuestSession.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            ids = [row.id for row in rows]
+            session_ids = [row.session_id for row in rows]
+
+            try:
+                # カートアイテムを明示的に削除（ON DELETE CASCADE非対応のDBでも整合性を保つ）
+                cart_items_deleted = (
+                    self.db.query(GuestCartItem)
+                    .filter(GuestCartItem.session_id.in_(session_ids))
+                    .delete(synchronize_session=False)
+                )
+                sessions_deleted = (
+                    self.db.query(GuestSession)
+                    .filter(GuestSession.id.in_(ids))
+                    .delete(synchronize_session=False)
+                )
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            result["sessions_deleted"] += sessions_deleted
+            result["cart_items_deleted"] += cart_items_deleted
+            result["batches"] += 1
+
+            if len(rows) < batch_size:
+                break
+
+        elapsed = time.perf_counter() - started
+        total_rows = result["sessions_deleted"] + result["cart_items_deleted"]
+        result["elapsed_seconds"] = round(elapsed, 3)
+        result["rows_per_second"] = round(total_rows / elapsed, 1) if elapsed > 0 else 0.0
+
+        return result
+
+
+def purge_expired_guest_sessions(
+    batch_size: int = PURGE_BATCH_SIZE, max_batches: Optional[int] = None
+) -> Dict[str, float]:
+    """新しいDBセッションで期限切れゲストセッションを削除する.
+
+    CLIスクリプトやアプリ内定期ジョブから呼び出す。
+
+    Args:
+        batch_size: 1バッチあたりに削除するセッション数
+        max_batches: 最大バッチ数
+
+    Returns:
+        GuestSessionCleanupService.purge_expired_sessions の結果
+    """
+    db = SessionLocal()
+    try:
+        return GuestSessionCleanupService(db).purge_expired_sessions(
+            batch_size=batch_size, max_batches=max_batches
+        )
+    finally:
+        db.close()
+
+
+async def run_periodic_guest_session_purge(
+    interval_seconds: int = PURGE_INTERVAL_SECONDS,
+) -> None:
+    """ゲストセッション削除を一定間隔で実行し続ける（アプリ起動時にタスクとして登録）.
+
+    削除処理は同期I/Oのため、イベントループをブロックしないよう
+    スレッドで実行する。
+
+    Args:
+        interval_seconds: 実行間隔（秒）
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await asyncio.to_thread(purge_expired_guest_sessions)
+            if result["sessions_deleted"] > 0:
+                print(
+                    f"期限切れゲストセッション削除: "
+                    f"セッション{result['sessions_deleted']}件, "
+                    f"カート{result['cart_items_deleted']}件, "
+                    f"{result['rows_per_second']}行/秒"
+                )
+        except Exception as e:
+            # 削除に失敗しても次回の実行は継続
+            print(f"ゲストセッション削除エラー: {str(e)}")
@@ -0,0 +1,551 @@
+"""Index advice from captured application SQL.
+
+The statements recorded by services.sql_capture are replayed through
+EXPLAIN (EXPLAIN QUERY PLAN on SQLite), without executing them. The plans
+are used to find:
+
+- sequential scans on large tables, with a candidate index built from the
+  statement's equality and range predicates,
+- indexes no captured statement ever chose,
+- indexes whose columns are a leading prefix of another index.
+
+The findings are rendered as a candidate Alembic migration that has to be
+reviewed before it is applied.
+"""
+
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from services.sql_capture import CapturedStatement
+
+# 逐次スキャンを問題とみなすテーブルの行数
+DEFAULT_MIN_ROWS = 1000
+
+# 候補インデックスの最大列数
+MAX_CANDIDATE_COLUMNS = 3
+
+# PostgreSQL の識別子の最大長
+MAX_IDENTIFIER_LENGTH = 63
+
+# テーブル名の直後に来ても別名ではないキーワード
+SQL_KEYWORDS = set(
+    "AS ON WHERE JOIN LEFT RIGHT INNER OUTER FULL CROSS GROUP ORDER LIMIT OFFSET "
+    "HAVING UNION SET FOR USING NATURAL LATERAL WINDOW RETURNING".split()
+)
+
+_TABLE_REFERENCE_RE = re.compile(
+    r'(?:\bFROM\b|\bJOIN\b|\bUPDATE\b|,)\s*"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?',
+    re.IGNORECASE,
+)
+# 列 演算子 の形の条件（!=・<>・IS NOT・LIKE は索引で絞り込めないため対象外）
+_LEFT_PREDICATE_RE = re.compile(
+    r'(?:"?(\w+)"?\.)?"?(\w+)"?\s*'
+    r"(<=|>=|<(?!>)|>|(?<![!<>])=|\bIN\b|\bIS\b(?!\s+NOT)|\bBETWEEN\b)",
+    re.IGNORECASE,
+)
+# 結合条件の右辺の列（menus.id = orders.menu_id の orders.menu_id）
+_RIGHT_PREDICATE_RE = re.compile(r'(?<![!<>])=\s*"?(\w+)"?\."?(\w+)"?')
+_SQLITE_PLAN_RE = re.compile(
+    r"^(SCAN|SEARCH) (\S+)"
+    r"(?: USING (AUTOMATIC )?(?:PARTIAL )?(?:COVERING )?INDEX (\S+))?"
+)
+
+EQUALITY_OPERATORS = {"=", "IN", "IS"}
+
+
+@dataclass
+class IndexInfo:
+    """既存のインデックス"""
+
+    table: str
+    name: str
+    columns: List[str]
+    unique: bool = False
+    method: str = "btree"
+    partial: bool = False
+
+
+@dataclass
+class PlanSummary:
+    """1文の実行計画の要約"""
+
+    seq_scans: Set[str] = field(default_factory=set)
+    indexes: Set[str] = field(default_factory=set)
+    tables: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class SeqScanFinding:
+    """大きなテーブルへの逐次スキャン"""
+
+    table: str
+    rows: int
+    candidate: List[str]
+    covered_by: Optional[str] = None
+    statements: int = 0
+    executions: int = 0
+    sample: str = ""
+
+    @property
+    def index_name(self) -> str:
+        return index_name(self.table, self.candidate)
+
+
+@dataclass
+class RedundantIndex:
+    """他のインデックスの先頭列と重複するインデックス"""
+
+    index: IndexInfo
+    covered_by: IndexInfo
+
+
+@dataclass
+class AdvisorReport:
+    """アドバイザーの結果"""
+
+    seq_scans: List[SeqScanFinding] = field(default_factory=list)
+    unused: List[IndexInfo] = field(default_factory=list)
+    redundant: List[RedundantIndex] = field(default_factory=list)
+    explained: int = 0
+    skipped: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def new_indexes(self) -> List[SeqScanFinding]:
+        """作成を提案するインデックス（既存のインデックスで賄えるものを除く）"""
+        return [
+            finding
+            for finding in self.seq_scans
+            if finding.candidate and finding.covered_by is None
+        ]
+
+
+def index_name(table: str, columns: List[str]) -> str:
+    """候補インデックスの名前（ix_<table>_<columns>）"""
+    return f"ix_{table}_{'_'.join(columns)}"[:MAX_IDENTIFIER_LENGTH]
+
+
+# ===== 実行計画 =====
+
+
+def table_aliases(statement: str, tables: Iterable[str]) -> Dict[str, str]:
+    """SQL中のテーブル名・別名から実テーブル名への対応"""
+    known = set(tables)
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE_RE.findall(statement):
+        if table not in known:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _inheritance_roots(conn: Connection) -> Dict[str, str]:
+    """パーティション（テーブル・インデックス）から親の名前への対応"""
+    parents = dict(
+        conn.execute(
+            text(
+                "SELECT child.relname, parent.relname FROM pg_inherits i "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "JOIN pg_class parent ON parent.oid = i.inhparent"
+            )
+        ).all()
+    )
+    roots = {}
+    for child in parents:
+        root = child
+        while root in parents:
+            root = parents[root]
+        roots[child] = root
+    return roots
+
+
+def _walk_postgresql_plan(node: dict, roots: Dict[str, str], summary: PlanSummary):
+    node_type = node.get("Node Type", "")
+    relation = node.get("Relation Name")
+    if relation:
+        summary.tables.add(roots.get(relation, relation))
+    if node_type == "Seq Scan" and relation:
+        summary.seq_scans.add(relation)
+    if node.get("Index Name"):
+        summary.indexes.add(roots.get(node["Index Name"], node["Index Name"]))
+    for child in node.get("Plans", []):
+        _walk_postgresql_plan(child, roots, summary)
+
+
+def explain_postgresql(
+    conn: Connection, captured: CapturedStatement, roots: Dict[str, str]
+) -> PlanSummary:
+    """EXPLAIN (FORMAT JSON) の結果を要約（逐次スキャンはパーティション名のまま）"""
+    plan = conn.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {captured.statement}", captured.parameters or None
+    ).scalar()
+    summary = PlanSummary()
+    for entry in plan:
+        _walk_postgresql_plan(entry["Plan"], roots, summary)
+    return summary
+
+
+def explain_sqlite(
+    conn: Connection, captured: CapturedStatement, tables: Iterable[str]
+) -> PlanSummary:
+    """EXPLAIN QUERY PLAN の結果を要約（別名はテーブル名に戻す）"""
+    aliases = table_aliases(captured.statement, tables)
+    rows = conn.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {captured.statement}", captured.parameters or None
+    ).all()
+    summary = PlanSummary()
+    for row in rows:
+        match = _SQLITE_PLAN_RE.match(row[-1])
+        if not match:
+            continue
+        operation, name, automatic, index = match.groups()
+        table = aliases.get(name, name)
+        if table not in aliases.values():
+            continue
+        summary.tables.add(table)
+        if automatic or (operation == "SCAN" and index is None):
+            # AUTOMATIC INDEX は索引がないため実行時に一時的に作成したもの
+            summary.seq_scans.add(table)
+        elif index:
+            summary.indexes.add(index)
+    return summary
+
+
+# ===== テーブル・インデックスの情報 =====
+
+
+def relation_rows(conn: Connection, relation: str) -> int:
+    """テーブル（パーティション）の行数（PostgreSQL は統計情報の推定値）"""
+    if conn.dialect.name == "postgresql":
+        estimate = conn.execute(
+            text("SELECT reltuples FROM pg_class WHERE relname = :name"),
+            {"name": relation},
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return conn.execute(text(f'SELECT count(*) FROM "{relation}"')).scalar()
+
+
+def load_indexes(conn: Connection, tables: Iterable[str]) -> Dict[str, List[IndexInfo]]:
+    """テーブルごとのインデックス（主キー・式インデックスを除く）"""
+    inspector = inspect(conn)
+    result = {}
+    for table in tables:
+        indexes = []
+        for index in inspector.get_indexes(table):
+            columns = index["column_names"]
+            if not columns or None in columns or index.get("expressions"):
+                continue
+            options = index.get("dialect_options", {})
+            indexes.append(
+                IndexInfo(
+                    table=table,
+                    name=index["name"],
+                    columns=list(columns),
+                    unique=bool(index["unique"]),
+                    method=options.get("postgresql_using", "btree"),
+                    partial="postgresql_where" in options or "sqlite_where" in options,
+                )
+            )
+        result[table] = indexes
+    return result
+
+
+def find_redundant_indexes(
+    indexes: Dict[str, List[IndexInfo]]
+) -> List[RedundantIndex]:
+    """
+    列が他のインデックスの先頭列と一致するインデックス
+
+    一意制約・部分インデックス・B-tree 以外は、置き換えると意味が変わるため対象外。
+    """
+    redundant = []
+    for table_indexes in indexes.values():
+        plain = [
+            index
+            for index in table_indexes
+            if index.method == "btree" and not index.partial
+        ]
+        for index in plain:
+            if index.unique:
+                continue
+            for other in plain:
+                if other is index or len(other.columns) < len(index.columns):
+                    continue
+                if other.columns[: len(index.columns)] != index.columns:
+                    continue
+                # 同じ列のインデックスが重複している場合は名前順で後のものを残す
+                if len(other.columns) == len(index.columns) and other.name < index.name:
+                    continue
+                redundant.append(RedundantIndex(index, other))
+                break
+    return redundant
+
+
+def candidate_columns(
+    statement: str, table: str, columns: Iterable[str], aliases: Dict[str, str]
+) -> List[str]:
+    """
+    逐次スキャンされたテーブルの候補インデックスの列
+
+    等価条件（=・IN・IS）の列を先に、範囲条件の列を最後に1つ並べる。
+    """
+    valid = set(columns)
+    names = {name for name, target in aliases.items() if target == table}
+    single_table = set(aliases.values()) == {table}
+    # SELECT句の CASE WHEN などを除くため FROM 以降だけを見る
+    body = statement[statement.upper().find(" FROM ") + 1 :]
+
+    equality: List[str] = []
+    ranges: List[str] = []
+
+    def add(qualifier: Optional[str], column: str, operator: str):
+        if qualifier and qualifier not in names:
+            return
+        if not qualifier and not single_table:
+            return
+        if column not in valid:
+            return
+        target = equality if operator.upper() in EQUALITY_OPERATORS else ranges
+        if column not in equality and column not in target:
+            target.append(column)
+
+    for qualifier, column, operator in _LEFT_PREDICATE_RE.findall(body):
+        add(qualifier, column, operator)
+    for qualifier, column in _RIGHT_PREDICATE_RE.findall(body):
+        add(qualifier, column, "=")
+
+    candidate = equality + [column for column in ranges if column not in equality][:1]
+    return candidate[:MAX_CANDIDATE_COLUMNS]
+
+
+def _covering_index(candidate: List[str], indexes: List[IndexInfo]) -> Optional[str]:
+    """候補と同じ列で始まる既存のインデックス"""
+    if not candidate:
+        return None
+    for index in indexes:
+        if index.partial or index.method != "btree":
+            continue
+        if set(index.columns[: len(candidate)]) == set(candidate):
+            return index.name
+    return None
+
+
+# ===== 分析 =====
+
+
+def analyze_workload(
+    engine: Engine,
+    statements: List[CapturedStatement],
+    min_rows: int = DEFAULT_MIN_ROWS,
+) -> AdvisorReport:
+    """
+    記録したSQLの実行計画からインデックスの過不足を分析
+
+    Args:
+        engine: 分析するデータベース（記録時と同じ種類のもの）
+        statements: services.sql_capture で記録したSQL
+        min_rows: 逐次スキャンを報告するテーブルの最小行数
+
+    Returns:
+        AdvisorReport: 分析結果
+    """
+    report = AdvisorReport()
+    dialect = engine.dialect.name
+    plans: List[Tuple[CapturedStatement, PlanSummary]] = []
+
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        tables = inspector.get_table_names()
+        roots = _inheritance_roots(conn) if dialect == "postgresql" else {}
+        for captured in statements:
+            if captured.dialect != dialect:
+                report.skipped += 1
+                continue
+            try:
+                if dialect == "postgresql":
+                    summary = explain_postgresql(conn, captured, roots)
+                else:
+                    summary = explain_sqlite(conn, captured, tables)
+            except Exception as e:
+                conn.rollback()
+                report.failed.append((captured.statement, str(e)))
+                continue
+            report.explained += 1
+            plans.append((captured, summary))
+
+        touched = sorted({table for _, summary in plans for table in summary.tables})
+        indexes = load_indexes(conn, touched)
+        rows_cache: Dict[str, int] = {}
+        findings: Dict[Tuple[str, Tuple[str, ...]], SeqScanFinding] = {}
+
+        for captured, summary in plans:
+            for relation in summary.seq_scans:
+                if relation not in rows_cache:
+                    rows_cache[relation] = relation_rows(conn, relation)
+                if rows_cache[relation] < min_rows:
+                    continue
+                table = roots.get(relation, relation)
+                columns = [column["name"] for column in inspector.get_columns(table)]
+                aliases = table_aliases(captured.statement, tables)
+                candidate = candidate_columns(
+                    captured.statement, table, columns, aliases
+                )
+                key = (table, tuple(candidate))
+                finding = findings.get(key)
+                if finding is None:
+                    finding = findings[key] = SeqScanFinding(
+                        table=table,
+                        rows=rows_cache[relation],
+                        candidate=candidate,
+                        covered_by=_covering_index(candidate, indexes.get(table, [])),
+                        sample=captured.statement,
+                    )
+                finding.rows = max(finding.rows, rows_cache[relation])
+                finding.statements += 1
+                finding.executions += captured.count
+
+    used = {index for _, summary in plans for index in summary.indexes}
+    report.seq_scans = sorted(findings.values(), key=lambda f: -f.executions)
+    report.redundant = find_redundant_indexes(indexes)
+    redundant_names = {item.index.name for item in report.redundant}
+    report.unused = [
+        index
+        for table in touched
+        for index in indexes.get(table, [])
+        if index.name not in used
+        and not index.unique
+        and index.name not in redundant_names
+    ]
+    return report
+
+
+# ===== マイグレーションの生成 =====
+
+
+def _literal(value) -> str:
+    """マイグレーションに書き出す文字列・リストのリテラル（ダブルクォート）"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def alembic_heads(versions_dir: Path) -> List[str]:
+    """マイグレーションファイルから現在の head のリビジョンを取得"""
+    revisions = set()
+    parents = set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = re.search(
+            r"^revision(?::[^=]+)?\s*=\s*['\"](\w+)['\"]", source, re.MULTILINE
+        )
+        if not revision:
+            continue
+        revisions.add(revision.group(1))
+        down = re.search(r"^down_revision(?::[^=]+)?\s*=\s*(.+)$", source, re.MULTILINE)
+        if down:
+            parents.update(re.findall(r"['\"](\w+)['\"]", down.group(1)))
+    return sorted(revisions - parents)
+
+
+def render_migration(
+    report: AdvisorReport,
+    down_revision: List[str],
+    revision: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> str:
+    """
+    分析結果から候補のAlembicマイグレーションを生成
+
+    逐次スキャン対策のインデックス作成と重複インデックスの削除を行う。
+    使われていないインデックスは記録したSQL以外で使われている可能性があるため、
+    削除をコメントとして書き出すだけにする。
+    """
+    revision = revision or uuid.uuid4().hex[:12]
+    now = now or datetime.now()
+    if len(down_revision) == 1:
+        down_literal = _literal(down_revision[0])
+    elif down_revision:
+        down_literal = f"({', '.join(_literal(head) for head in down_revision)})"
+    else:
+        down_literal = "None"
+
+    upgrade: List[str] = []
+    downgrade: List[str] = []
+
+    def create_index(name: str, table: str, columns: List[str]) -> str:
+        return (
+            f"op.create_index({_literal(name)}, {_literal(table)}, "
+            f"{_literal(columns)})"
+        )
+
+    def drop_index(name: str, table: str) -> str:
+        return f"op.drop_index({_literal(name)}, table_name={_literal(table)})"
+
+    for finding in report.new_indexes:
+        upgrade.append(
+            f"    # 逐次スキャン: {finding.table}（約{finding.rows:,}行）"
+            f" {finding.statements}文 / {finding.executions}回"
+        )
+        upgrade.append(
+            f"    {create_index(finding.index_name, finding.table, finding.candidate)}"
+        )
+        downgrade.insert(0, f"    {drop_index(finding.index_name, finding.table)}")
+    for item in report.redundant:
+        index = item.index
+        upgrade.append(
+            f"    # {item.covered_by.name} {item.covered_by.columns} の先頭列と重複"
+        )
+        upgrade.append(f"    {drop_index(index.name, index.table)}")
+        downgrade.insert(
+            0, f"    {create_index(index.name, index.table, index.columns)}"
+        )
+    if report.unused:
+        upgrade.append(
+            "    # 記録したSQLでは使われていない"
+            "（他の処理で使われていないか確認してから削除）"
+        )
+        for index in report.unused:
+            upgrade.append(f"    # {drop_index(index.name, index.table)}")
+
+    if not report.new_indexes and not report.redundant:
+        upgrade.append("    pass")
+    upgrade_body = "\n".join(upgrade)
+    downgrade_body = "\n".join(downgrade) or "    pass"
+
+    return f'''"""index_advisor_candidates
+
+Revision ID: {revision}
+Revises: {", ".join(down_revision)}
+Create Date: {now.strftime("%Y-%m-%d %H:%M:%S.%f")}
+
+scripts/index_advisor.py が記録したSQLの実行計画から生成した候補。
+内容を確認してから適用すること。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = {_literal(revision)}
+down_revision: Union[str, Sequence[str], None] = {down_literal}
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+{upgrade_body}
+
+
+def downgrade() -> None:
+{downgrade_body}
+'''
@@ -0,0 +1,164 @@
+"""Login throttling with per-account and per-IP token buckets."""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# アカウントごとの制限（バースト許容回数と1分あたりの回復量）
+LOGIN_THROTTLE_USER_CAPACITY = int(os.getenv("LOGIN_THROTTLE_USER_CAPACITY", "5"))
+LOGIN_THROTTLE_USER_REFILL_PER_MINUTE = float(
+    os.getenv("LOGIN_THROTTLE_USER_REFILL_PER_MINUTE", "5")
+)
+
+# IPアドレスごとの制限
+LOGIN_THROTTLE_IP_CAPACITY = int(os.getenv("LOGIN_THROTTLE_IP_CAPACITY", "30"))
+LOGIN_THROTTLE_IP_REFILL_PER_MINUTE = float(
+    os.getenv("LOGIN_THROTTLE_IP_REFILL_PER_MINUTE", "30")
+)
+
+# 保持する最大キー数（超過時は最も古く使われたキーから削除）
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "10000"))
+
+
+class TokenBucketLimiter:
+    """
+    キーごとのトークンバケット
+
+    各キーは (トークン残量, 最終更新時刻) のタプルのみを保持し、
+    最大キー数を超えた場合はLRUで削除する。
+    """
+
+    def __init__(self, capacity: int, refill_per_minute: float, max_keys: int):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _current_tokens(self, key: str, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return float(self.capacity)
+        tokens, updated_at = entry
+        return min(
+            float(self.capacity), tokens + (now - updated_at) * self.refill_per_second
+        )
+
+    def try_acquire(self, key: str) -> float:
+        """
+        トークンを1つ消費する
+
+        Returns:
+            float: 0の場合は許可、正の値の場合は再試行までの待ち秒数
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._current_tokens(key, now)
+            if tokens < 1:
+                if self.refill_per_second <= 0:
+                    return math.inf
+                return (1 - tokens) / self.refill_per_second
+
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def refund(self, key: str) -> None:
+        """消費したトークンを1つ戻す"""
+        now = time.monotonic()
+        with self._lock:
+            if key in self._buckets:
+                tokens = self._current_tokens(key, now)
+                self._buckets[key] = (min(float(self.capacity), tokens + 1), now)
+
+    def reset(self, key: str) -> None:
+        """キーの状態を削除（満タンに戻す）"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self) -> None:
+        """全キーの状態を削除"""
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginThrottle:
+    """アカウントとIPアドレスの両方でログイン試行を制限する"""
+
+    def __init__(
+        self,
+        user_limiter: Optional[TokenBucketLimiter] = None,
+        ip_limiter: Optional[TokenBucketLimiter] = None,
+    ):
+        if user_limiter is None:
+            user_limiter = TokenBucketLimiter(
+                LOGIN_THROTTLE_USER_CAPACITY,
+                LOGIN_THROTTLE_USER_REFILL_PER_MINUTE,
+                LOGIN_THROTTLE_MAX_KEYS,
+            )
+        if ip_limiter is None:
+            ip_limiter = TokenBucketLimiter(
+                LOGIN_THROTTLE_IP_CAPACITY,
+                LOGIN_THROTTLE_IP_REFILL_PER_MINUTE,
+                LOGIN_THROTTLE_MAX_KEYS,
+            )
+        self.user_limiter = user_limiter
+        self.ip_limiter = ip_limiter
+        self.rejected = 0
+
+    def check(self, username: str, client_ip: Optional[str]) -> float:
+        """
+        ログイン試行を許可するか判定する
+
+        Args:
+            username: ログインしようとしているユーザー名
+            client_ip: クライアントのIPアドレス
+
+        Returns:
+            float: 0の場合は許可、正の値の場合は再試行までの待ち秒数
+        """
+        user_key = username.lower()
+        ip_key = client_ip or "unknown"
+
+        retry_after = self.ip_limiter.try_acquire(ip_key)
+        if retry_after > 0:
+            self.rejected += 1
+            return retry_after
+
+        retry_after = self.user_limiter.try_acquire(user_key)
+        if retry_after > 0:
+            # アカウント側で拒否された場合はIP側の消費を取り消す
+            self.ip_limiter.refund(ip_key)
+            self.rejected += 1
+            return retry_after
+
+        return 0.0
+
+    def record_success(self, username: str) -> None:
+        """ログイン成功時にアカウントの制限をリセット"""
+        self.user_limiter.reset(username.lower())
+
+    def clear(self) -> None:
+        """全ての状態を削除"""
+        self.user_limiter.clear()
+        self.ip_limiter.clear()
+        self.rejected = 0
+
+    def stats(self) -> dict:
+        """メトリクスを取得"""
+        return {
+            "tracked_users": len(self.user_limiter),
+            "tracked_ips": len(self.ip_limiter),
+            "rejected": self.rejected,
+        }
+
+
+login_throttle = LoginThrottle()
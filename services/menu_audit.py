@@ -0,0 +1,224 @@
+"""Menu audit log writer that batches change events off the request path."""
+
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Menu, MenuChangeLog
+
+# 書き込み待ちの監査ログの上限件数（超過時はコミットしたリクエスト内で直接書き込む）
+MENU_AUDIT_QUEUE_SIZE = int(os.getenv("MENU_AUDIT_QUEUE_SIZE", "10000"))
+
+# 1回のINSERTで書き込む最大件数
+MENU_AUDIT_BATCH_SIZE = int(os.getenv("MENU_AUDIT_BATCH_SIZE", "500"))
+
+# 書き込み待ちのログをまとめる最大待ち時間（秒）
+MENU_AUDIT_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("MENU_AUDIT_FLUSH_INTERVAL_SECONDS", "1")
+)
+
+# trueの場合はメニューの変更と同じトランザクションで書き込む（テスト用）
+MENU_AUDIT_SYNC = os.getenv("MENU_AUDIT_SYNC", "false").lower() == "true"
+
+# コミット待ちの監査ログを保持する Session.info のキー
+_PENDING_KEY = "pending_menu_audit_events"
+
+# ワーカースレッドの停止指示
+_STOP = object()
+
+
+class MenuAuditWriter:
+    """
+    メニュー監査ログのバッチ書き込み
+
+    record() で受け取ったログはメニューの変更がコミットされた時点で待ち行列に入り、
+    バックグラウンドのスレッドが複数行INSERTでまとめて書き込む。
+    ロールバックされた変更のログは書き込まない。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_queue: int = MENU_AUDIT_QUEUE_SIZE,
+        batch_size: int = MENU_AUDIT_BATCH_SIZE,
+        flush_interval: float = MENU_AUDIT_FLUSH_INTERVAL_SECONDS,
+        synchronous: bool = MENU_AUDIT_SYNC,
+    ):
+        """
+        Args:
+            session_factory: 書き込みに使うセッションを作成する関数
+            max_queue: 書き込み待ちの上限件数
+            batch_size: 1回のINSERTで書き込む最大件数
+            flush_interval: ログをまとめる最大待ち時間（秒）
+            synchronous: メニューの変更と同じトランザクションで書き込む
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.overflow = 0
+
+    # ===== 記録 =====
+
+    def record(self, db: Session, events: Iterable[Dict]) -> None:
+        """
+        監査ログを記録（書き込みはコミット後）
+
+        Args:
+            db: メニューを変更したセッション
+            events: menu_id, store_id, user_id, action, changes を持つログ
+        """
+        now = datetime.now(timezone.utc)
+        rows = [{"changed_at": now, **event} for event in events]
+        if not rows:
+            return
+        if self.synchronous:
+            rows = self._existing_menu_rows(db, rows)
+            if rows:
+                db.execute(insert(MenuChangeLog.__table__), rows)
+            return
+        db.info.setdefault(_PENDING_KEY, []).extend(rows)
+
+    def enqueue(self, rows: List[Dict]) -> None:
+        """コミット済みの監査ログを書き込み待ちにする"""
+        self.start()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                # 待ち行列があふれた場合は書き込みが追いつくまで呼び出し元で直接書き込む
+                with self._lock:
+                    self.overflow += len(rows) - index
+                self._write(rows[index:])
+                return
+
+    # ===== 書き込み =====
+
+    def _existing_menu_rows(self, session: Session, rows: List[Dict]) -> List[Dict]:
+        """
+        既に削除されたメニューのログを除く
+
+        メニューを削除したリクエストの delete ログなどは menu_id の外部キーに
+        違反するため（削除時にログもCASCADEで消える）、1回のSELECTで確認して書き込まない。
+        """
+        menu_ids = {row["menu_id"] for row in rows}
+        existing = set(
+            session.execute(select(Menu.id).where(Menu.id.in_(menu_ids))).scalars()
+        )
+        kept = [row for row in rows if row["menu_id"] in existing]
+        if len(kept) < len(rows):
+            with self._lock:
+                self.skipped += len(rows) - len(kept)
+        return kept
+
+    def _write(self, rows: List[Dict]) -> None:
+        try:
+            with self.session_factory() as session:
+                rows = self._existing_menu_rows(session, rows)
+                if rows:
+                    session.execute(insert(MenuChangeLog.__table__), rows)
+                    session.commit()
+            with self._lock:
+                self.written += len(rows)
+        except Exception as e:
+            if len(rows) > 1:
+                # 書き込めない行だけを除くため1行ずつ再試行
+                for row in rows:
+                    self._write([row])
+                return
+            # 監査ログの書き込みに失敗してもメニューの操作には影響させない
+            with self._lock:
+                self.failed += 1
+            print(f"Warning: Failed to log menu change: {e}")
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                row = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            done = 1
+            if row is _STOP:
+                stopping = True
+            else:
+                batch.append(row)
+            # 待ち行列に溜まっている分をまとめて書き込む
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                done += 1
+                if row is _STOP:
+                    stopping = True
+                else:
+                    batch.append(row)
+            if batch:
+                self._write(batch)
+            for _ in range(done):
+                self._queue.task_done()
+
+    def start(self) -> None:
+        """書き込みスレッドを起動（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="menu-audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        """書き込み待ちのログを全て書き込むまで待つ"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """書き込み待ちのログを書き込んでからスレッドを停止"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        """書き込みのメトリクスを取得"""
+        with self._lock:
+            return {
+                "synchronous": self.synchronous,
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "overflow": self.overflow,
+            }
+
+
+menu_audit_writer = MenuAuditWriter()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_events(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        menu_audit_writer.enqueue(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session):
+    session.info.pop(_PENDING_KEY, None)
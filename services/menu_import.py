@@ -0,0 +1,277 @@
+"""Bulk menu import (CSV / JSON) upserted by external key in chunked statements."""
+
+import codecs
+import csv
+import json
+import os
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Menu, MenuCategory
+from schemas import MenuImportRow
+from services.catalog_version import bump_catalog_version
+from services.menu_audit import menu_audit_writer
+from services.menu_search import index_menus
+
+# 1回のインポートで受け付ける最大行数
+MENU_IMPORT_MAX_ROWS = int(os.getenv("MENU_IMPORT_MAX_ROWS", "2000"))
+
+# 1回のINSERT文で登録する行数
+MENU_IMPORT_CHUNK_SIZE = int(os.getenv("MENU_IMPORT_CHUNK_SIZE", "200"))
+
+# インポートで更新する列（external_id・store_id 以外）
+IMPORT_FIELDS = (
+    "name",
+    "price",
+    "description",
+    "image_url",
+    "is_available",
+    "category_id",
+)
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class MenuImportError(Exception):
+    """インポートファイル全体を処理できない場合のエラー"""
+
+
+# ===== ファイルの読み込み =====
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """ファイル名・Content-Type からインポート形式（csv / json）を判定"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith(".json") or "json" in content_type:
+        return "json"
+    raise MenuImportError("CSVまたはJSONファイルを指定してください")
+
+
+def read_rows(file: BinaryIO, file_format: str) -> Iterator[Dict[str, Any]]:
+    """
+    インポートファイルを1行ずつ読み込む
+
+    CSVは1行目をヘッダーとして逐次読み込み、空欄は未指定として扱う。
+    JSONはメニューのオブジェクトの配列を受け付ける。
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+        try:
+            for record in reader:
+                yield {
+                    key.strip(): value.strip()
+                    for key, value in record.items()
+                    if key and isinstance(value, str) and value.strip()
+                }
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise MenuImportError(f"CSVを読み込めません: {e}")
+        return
+
+    try:
+        data = json.load(file)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise MenuImportError(f"JSONを読み込めません: {e}")
+    if not isinstance(data, list):
+        raise MenuImportError("JSONはメニューの配列で指定してください")
+    for record in data:
+        yield record if isinstance(record, dict) else {}
+
+
+# ===== 検証 =====
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    messages = []
+    for detail in error.errors():
+        field = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{field}: {detail['msg']}" if field else detail["msg"])
+    return messages
+
+
+def validate_rows(
+    db: Session, store_id: int, records: Iterable[Dict[str, Any]]
+) -> Tuple[List[Tuple[int, MenuImportRow]], List[Dict[str, Any]]]:
+    """
+    インポート行を検証
+
+    Returns:
+        Tuple: (行番号と検証済みの行のリスト, 行ごとのエラーのリスト)
+    """
+    valid: List[Tuple[int, MenuImportRow]] = []
+    errors: List[Dict[str, Any]] = []
+    seen_keys = set()
+
+    for row_number, record in enumerate(records, start=1):
+        if row_number > MENU_IMPORT_MAX_ROWS:
+            raise MenuImportError(
+                f"インポートできるのは{MENU_IMPORT_MAX_ROWS}行までです"
+            )
+        try:
+            row = MenuImportRow.model_validate(record)
+        except ValidationError as e:
+            external_id = record.get("external_id")
+            errors.append(
+                {
+                    "row": row_number,
+                    "external_id": str(external_id) if external_id is not None else None,
+                    "errors": _format_errors(e),
+                }
+            )
+            continue
+        if row.external_id in seen_keys:
+            errors.append(
+                {
+                    "row": row_number,
+                    "external_id": row.external_id,
+                    "errors": ["external_id: ファイル内で重複しています"],
+                }
+            )
+            continue
+        seen_keys.add(row.external_id)
+        valid.append((row_number, row))
+
+    # 他店舗・存在しないカテゴリを指定した行を除外（1回のクエリで確認）
+    category_ids = {row.category_id for _, row in valid if row.category_id is not None}
+    if category_ids:
+        own_category_ids = {
+            category_id
+            for (category_id,) in db.query(MenuCategory.id).filter(
+                MenuCategory.store_id == store_id, MenuCategory.id.in_(category_ids)
+            )
+        }
+        checked = []
+        for row_number, row in valid:
+            if row.category_id is not None and row.category_id not in own_category_ids:
+                errors.append(
+                    {
+                        "row": row_number,
+                        "external_id": row.external_id,
+                        "errors": ["category_id: カテゴリが見つかりません"],
+                    }
+                )
+            else:
+                checked.append((row_number, row))
+        valid = checked
+
+    errors.sort(key=lambda error: error["row"])
+    return valid, errors
+
+
+# ===== 登録 =====
+
+
+def _changes(existing, values: Dict[str, Any]) -> Dict[str, Dict[str, Optional[str]]]:
+    changes = {}
+    for field in IMPORT_FIELDS:
+        old_value = getattr(existing, field)
+        new_value = values[field]
+        if old_value != new_value:
+            changes[field] = {
+                "old": str(old_value) if old_value is not None else None,
+                "new": str(new_value) if new_value is not None else None,
+            }
+    return changes
+
+
+def _upsert_chunk(
+    db: Session, store_id: int, user_id: int, rows: List[MenuImportRow]
+) -> Tuple[int, int]:
+    dialect = db.get_bind().dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise MenuImportError(f"未対応のデータベースです: {dialect}")
+
+    # 既存メニューを外部キーでまとめて取得（変更のない行は書き込まない）
+    existing = {
+        menu.external_id: menu
+        for menu in db.query(
+            Menu.id,
+            Menu.external_id,
+            *(getattr(Menu, field) for field in IMPORT_FIELDS),
+        ).filter(
+            Menu.store_id == store_id,
+            Menu.external_id.in_([row.external_id for row in rows]),
+        )
+    }
+
+    values = []
+    logs = []
+    created = updated = 0
+    for row in rows:
+        row_values = row.model_dump(include=set(IMPORT_FIELDS))
+        current = existing.get(row.external_id)
+        if current is None:
+            created += 1
+            logs.append(("create", row.external_id, row.model_dump()))
+        else:
+            changes = _changes(current, row_values)
+            if not changes:
+                continue
+            updated += 1
+            logs.append(("update", row.external_id, changes))
+        values.append({**row_values, "external_id": row.external_id, "store_id": store_id})
+
+    if not values:
+        return created, updated
+
+    table = Menu.__table__
+    statement = _DIALECT_INSERTS[dialect](table).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.store_id, table.c.external_id],
+        set_={
+            **{field: statement.excluded[field] for field in IMPORT_FIELDS},
+            "updated_at": func.now(),
+        },
+    ).returning(
+        table.c.id, table.c.external_id, table.c.store_id, table.c.name, table.c.description
+    )
+    written = db.execute(statement).all()
+    menu_ids = {row.external_id: row.id for row in written}
+
+    menu_audit_writer.record(
+        db,
+        [
+            {
+                "menu_id": menu_ids[external_id],
+                "store_id": store_id,
+                "user_id": user_id,
+                "action": action,
+                "changes": changes,
+            }
+            for action, external_id, changes in logs
+        ],
+    )
+    # フラッシュを経由しない書き込みのため検索インデックスを明示的に更新
+    index_menus(db.connection(), written)
+    return created, updated
+
+
+def import_menus(
+    db: Session, store_id: int, user_id: int, rows: List[MenuImportRow]
+) -> Tuple[int, int]:
+    """
+    検証済みの行を external_id で登録・更新（コミットは呼び出し側で行う）
+
+    MENU_IMPORT_CHUNK_SIZE 行ごとに複数行INSERT（重複時は更新）を発行し、
+    監査ログもチャンクごとに一括で記録する。
+
+    Returns:
+        Tuple[int, int]: (作成件数, 更新件数)
+    """
+    created = updated = 0
+    for start in range(0, len(rows), MENU_IMPORT_CHUNK_SIZE):
+        chunk_created, chunk_updated = _upsert_chunk(
+            db, store_id, user_id, rows[start : start + MENU_IMPORT_CHUNK_SIZE]
+        )
+        created += chunk_created
+        updated += chunk_updated
+
+    if created or updated:
+        bump_catalog_version(db, [store_id])
+    return created, updated
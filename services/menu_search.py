@@ -0,0 +1,352 @@
+"""N-gram full text search over menu names and descriptions.
+
+PostgreSQL stores the n-grams as a weighted tsvector with a GIN index;
+SQLite (tests / local development) uses an FTS5 virtual table. Other
+databases fall back to a partial match with ILIKE.
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DDL, Float, Integer, event, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session, attributes
+from sqlalchemy.sql.elements import ColumnElement
+
+from database import Base
+from models import Menu
+
+# 検索インデックスのテーブル名
+SEARCH_INDEX_TABLE = "menu_search_index"
+
+# 説明文のn-gramの開始位置（メニュー名とまたがってフレーズ一致しないよう離す）
+DESCRIPTION_POSITION_OFFSET = 1000
+
+# tsvector の位置の上限（PostgreSQL の仕様）
+MAX_TSVECTOR_POSITION = 16383
+
+# SQLite FTS5 の bm25 の列ごとの重み（store_id, name_ngrams, description_ngrams）
+FTS5_COLUMN_WEIGHTS = (0.0, 4.0, 1.0)
+
+# n-gramに含める文字以外（空白・記号）で単語を区切る
+_WORD_SPLIT_PATTERN = re.compile(r"[\W_]+")
+
+# 名前・説明文の変更時のみインデックスを更新する
+_INDEXED_ATTRIBUTES = ("name", "description", "store_id")
+
+_POSTGRESQL_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} (
+        menu_id INTEGER PRIMARY KEY REFERENCES menus(id) ON DELETE CASCADE,
+        store_id INTEGER NOT NULL,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_INDEX_TABLE}_document "
+    f"ON {SEARCH_INDEX_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_INDEX_TABLE}_store_id "
+    f"ON {SEARCH_INDEX_TABLE} (store_id)",
+)
+
+_SQLITE_DDL = (
+    # rowid をメニューIDとして使う
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5(
+        store_id UNINDEXED,
+        name_ngrams,
+        description_ngrams,
+        tokenize = 'unicode61 remove_diacritics 0'
+    )
+    """,
+)
+
+
+def index_ddl(dialect_name: str) -> Sequence[str]:
+    """検索インデックスを作成するDDL（未対応のデータベースでは空）"""
+    if dialect_name == "postgresql":
+        return _POSTGRESQL_DDL
+    if dialect_name == "sqlite":
+        return _SQLITE_DDL
+    return ()
+
+
+def is_supported(dialect_name: str) -> bool:
+    """n-gramインデックスに対応したデータベースか"""
+    return dialect_name in ("postgresql", "sqlite")
+
+
+# ===== テキストの正規化とn-gram =====
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """
+    検索用にテキストを正規化
+
+    全角英数・半角カナの統一（NFKC）、大文字小文字の統一、カタカナのひらがな化を行う
+    """
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return "".join(
+        chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in value
+    )
+
+
+def split_words(value: Optional[str]) -> List[str]:
+    """正規化したテキストを空白・記号で単語に分割"""
+    return [word for word in _WORD_SPLIT_PATTERN.split(normalize_text(value)) if word]
+
+
+def word_ngrams(word: str) -> List[str]:
+    """
+    単語をbigramに分割
+
+    1文字の検索語を前方一致で探せるよう、末尾の1文字も含める
+    （例: "弁当屋" -> ["弁当", "当屋", "屋"]）
+    """
+    return [word[i : i + 2] for i in range(len(word) - 1)] + [word[-1]]
+
+
+def text_ngrams(value: Optional[str]) -> List[str]:
+    """テキスト全体のn-gram（単語ごと、出現順）"""
+    ngrams: List[str] = []
+    for word in split_words(value):
+        ngrams.extend(word_ngrams(word))
+    return ngrams
+
+
+def _tsvector_literal(name: Optional[str], description: Optional[str]) -> str:
+    lexemes = []
+    for offset, weight, value in (
+        (0, "A", name),
+        (DESCRIPTION_POSITION_OFFSET, "B", description),
+    ):
+        for position, ngram in enumerate(text_ngrams(value), start=offset + 1):
+            position = min(position, MAX_TSVECTOR_POSITION)
+            lexemes.append(f"'{_quote_lexeme(ngram)}':{position}{weight}")
+    return " ".join(lexemes)
+
+
+def _quote_lexeme(lexeme: str) -> str:
+    return lexeme.replace("\\", "\\\\").replace("'", "''")
+
+
+def _tsquery_literal(words: Sequence[str]) -> str:
+    parts = []
+    for word in words:
+        if len(word) == 1:
+            parts.append(f"'{_quote_lexeme(word)}':*")
+        else:
+            bigrams = word_ngrams(word)[:-1]
+            parts.append(
+                "(" + " <-> ".join(f"'{_quote_lexeme(b)}'" for b in bigrams) + ")"
+            )
+    return " & ".join(parts)
+
+
+def _fts5_query(words: Sequence[str]) -> str:
+    parts = []
+    for word in words:
+        if len(word) == 1:
+            parts.append(f'"{word}"*')
+        else:
+            bigrams = word_ngrams(word)[:-1]
+            parts.append('"' + " ".join(bigrams).replace('"', '""') + '"')
+    return " AND ".join(parts)
+
+
+# ===== インデックスの更新 =====
+
+
+def index_menus(conn: Connection, menus: Iterable) -> None:
+    """
+    メニューを検索インデックスに登録（登録済みの場合は更新）
+
+    Args:
+        conn: DB接続
+        menus: id, store_id, name, description を持つオブジェクト（Menu・行）
+    """
+    dialect = conn.dialect.name
+    rows = [
+        {
+            "menu_id": menu.id,
+            "store_id": menu.store_id,
+            "name": menu.name,
+            "description": menu.description,
+        }
+        for menu in menus
+    ]
+    if not rows or not is_supported(dialect):
+        return
+
+    if dialect == "postgresql":
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO {SEARCH_INDEX_TABLE} (menu_id, store_id, document)
+                VALUES (:menu_id, :store_id, CAST(:document AS tsvector))
+                ON CONFLICT (menu_id) DO UPDATE
+                SET store_id = EXCLUDED.store_id, document = EXCLUDED.document
+                """
+            ),
+            [
+                {
+                    "menu_id": row["menu_id"],
+                    "store_id": row["store_id"],
+                    "document": _tsvector_literal(row["name"], row["description"]),
+                }
+                for row in rows
+            ],
+        )
+    else:
+        remove_menus(conn, [row["menu_id"] for row in rows])
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO {SEARCH_INDEX_TABLE}
+                    (rowid, store_id, name_ngrams, description_ngrams)
+                VALUES (:menu_id, :store_id, :name_ngrams, :description_ngrams)
+                """
+            ),
+            [
+                {
+                    "menu_id": row["menu_id"],
+                    "store_id": row["store_id"],
+                    "name_ngrams": " ".join(text_ngrams(row["name"])),
+                    "description_ngrams": " ".join(text_ngrams(row["description"])),
+                }
+                for row in rows
+            ],
+        )
+
+
+def remove_menus(conn: Connection, menu_ids: Iterable[int]) -> None:
+    """メニューを検索インデックスから削除"""
+    ids = [menu_id for menu_id in menu_ids if menu_id is not None]
+    if not ids or not is_supported(conn.dialect.name):
+        return
+    key = "menu_id" if conn.dialect.name == "postgresql" else "rowid"
+    conn.execute(
+        text(f"DELETE FROM {SEARCH_INDEX_TABLE} WHERE {key} = :menu_id"),
+        [{"menu_id": menu_id} for menu_id in ids],
+    )
+
+
+def rebuild_menu_search_index(conn: Connection, batch_size: int = 1000) -> int:
+    """
+    全メニューから検索インデックスを作り直す
+
+    Returns:
+        int: 登録したメニュー数
+    """
+    if not is_supported(conn.dialect.name):
+        return 0
+    conn.execute(text(f"DELETE FROM {SEARCH_INDEX_TABLE}"))
+    result = conn.execute(
+        text("SELECT id, store_id, name, description FROM menus ORDER BY id")
+    )
+    total = 0
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        index_menus(conn, rows)
+        total += len(rows)
+    return total
+
+
+# ===== 検索 =====
+
+
+def search_menus(
+    query: Query, db: Session, keyword: str, store_id: Optional[int] = None
+) -> Tuple[Query, Optional[ColumnElement]]:
+    """
+    メニューのクエリにキーワード検索を適用
+
+    キーワードを空白で区切った全ての語を名前または説明文に含むメニューに絞り込む。
+    名前での一致は説明文での一致より関連度が高くなる。
+
+    Args:
+        query: Menu を対象とするクエリ
+        db: データベースセッション
+        keyword: 検索キーワード
+        store_id: 検索対象の店舗ID（指定時はインデックス上で店舗を絞り込む）
+
+    Returns:
+        Tuple[Query, Optional[ColumnElement]]: 絞り込んだクエリと関連度の列
+        （値が大きいほど関連度が高い。インデックスを使えない場合はNone）
+    """
+    dialect = db.get_bind().dialect.name
+    words = split_words(keyword)
+    if not words or not is_supported(dialect):
+        pattern = f"%{keyword}%"
+        return (
+            query.filter(or_(Menu.name.ilike(pattern), Menu.description.ilike(pattern))),
+            None,
+        )
+
+    store_filter = " AND store_id = :menu_search_store_id" if store_id is not None else ""
+    if dialect == "postgresql":
+        statement = text(
+            f"""
+            SELECT menu_id, ts_rank(document, CAST(:menu_search_query AS tsquery)) AS rank
+            FROM {SEARCH_INDEX_TABLE}
+            WHERE document @@ CAST(:menu_search_query AS tsquery){store_filter}
+            """
+        ).bindparams(menu_search_query=_tsquery_literal(words))
+    else:
+        weights = ", ".join(str(weight) for weight in FTS5_COLUMN_WEIGHTS)
+        statement = text(
+            f"""
+            SELECT rowid AS menu_id, -bm25({SEARCH_INDEX_TABLE}, {weights}) AS rank
+            FROM {SEARCH_INDEX_TABLE}
+            WHERE {SEARCH_INDEX_TABLE} MATCH :menu_search_query{store_filter}
+            """
+        ).bindparams(menu_search_query=_fts5_query(words))
+    if store_id is not None:
+        statement = statement.bindparams(menu_search_store_id=store_id)
+
+    matches = statement.columns(menu_id=Integer, rank=Float).subquery("menu_search")
+    return query.join(matches, matches.c.menu_id == Menu.id), matches.c.rank
+
+
+# ===== スキーマとインデックスの自動更新 =====
+
+
+for _dialect_name in ("postgresql", "sqlite"):
+    for _statement in index_ddl(_dialect_name):
+        event.listen(
+            Base.metadata,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect_name),
+        )
+    event.listen(
+        Base.metadata,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {SEARCH_INDEX_TABLE}").execute_if(
+            dialect=_dialect_name
+        ),
+    )
+
+
+def _needs_reindex(menu: Menu) -> bool:
+    return any(
+        attributes.get_history(menu, name).has_changes() for name in _INDEXED_ATTRIBUTES
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session, flush_context):
+    changed = [
+        obj
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Menu) and (obj in session.new or _needs_reindex(obj))
+    ]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Menu)]
+    if not changed and not deleted:
+        return
+    conn = session.connection()
+    remove_menus(conn, deleted)
+    index_menus(conn, changed)
@@ -0,0 +1,75 @@
+"""In-memory prefix index over menu names for type-ahead suggestions."""
+
+import os
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
+
+from services.menu_search import split_words
+
+# 候補表示で使うカタログスナップショットのバージョン再確認間隔（秒）。
+# 同一プロセス内の書き込みはコミット時に即座に反映される
+MENU_SUGGEST_MAX_STALENESS_SECONDS = float(
+    os.getenv("MENU_SUGGEST_MAX_STALENESS_SECONDS", "30")
+)
+
+
+class MenuPrefixIndex:
+    """
+    メニュー名の前方一致インデックス（ソート済み配列）
+
+    正規化したメニュー名全体と、名前中の各単語の先頭からの文字列をキーとして持つ。
+    カタカナ・ひらがな、全角・半角の違いは正規化で吸収する。
+    """
+
+    def __init__(self, menus: Iterable):
+        """
+        Args:
+            menus: id と name を持つメニュー（MenuSnapshot）
+        """
+        # (キー, 名前全体の先頭からの一致なら0・単語の途中からなら1, メニュー)
+        entries: List[Tuple[str, int, object]] = []
+        for menu in menus:
+            words = split_words(menu.name)
+            for i in range(len(words)):
+                entries.append(("".join(words[i:]), 0 if i == 0 else 1, menu))
+        entries.sort(key=lambda entry: (entry[0], entry[1], entry[2].id))
+        self._keys = [entry[0] for entry in entries]
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List:
+        """
+        前方一致するメニューを返す
+
+        名前の先頭から一致するものを優先し、同順位では短い名前から並べる
+
+        Args:
+            prefix: 入力中の文字列
+            limit: 最大件数
+
+        Returns:
+            List: メニューのリスト
+        """
+        key = "".join(split_words(prefix))
+        if not key:
+            return []
+
+        matches = []
+        for i in range(bisect_left(self._keys, key), len(self._keys)):
+            if not self._keys[i].startswith(key):
+                break
+            matches.append(self._entries[i])
+        matches.sort(key=lambda entry: (entry[1], len(entry[2].name), entry[2].name))
+
+        results = []
+        seen = set()
+        for _, _, menu in matches:
+            if menu.id in seen:
+                continue
+            seen.add(menu.id)
+            results.append(menu)
+            if len(results) >= limit:
+                break
+        return results
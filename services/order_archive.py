@@ -0,0 +1,437 @@
+"""Cold-storage archive of old orders as per-store monthly Parquet files.
+
+Orders older than the retention window are streamed out with a
+server-side cursor into one zstd-compressed Parquet file per store and
+month::
+
+    <ORDER_ARCHIVE_DIR>/store_id=<id>/<YYYY-MM>.parquet
+
+Once every file is written, a watermark file records the first month
+that is still kept online. After that the archived rows are deleted in
+batches. Reports read months before the watermark only from the files
+and later months only from the database. A run that stops part-way
+therefore never counts an order twice, and running it again finishes
+the deletes.
+
+Months and days are cut in ORDER_ARCHIVE_TIMEZONE, not in the database
+session's time zone. Naive timestamps (SQLite) are read as wall-clock
+times in that zone, and the files store UTC.
+
+pyarrow is imported lazily. Without it the application still runs; it
+just cannot archive or read archived months.
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Engine
+
+from database import engine
+from models import Menu, Order
+from services.partitions import add_months, month_start
+
+# アーカイブファイルの出力先
+ORDER_ARCHIVE_DIR = os.getenv("ORDER_ARCHIVE_DIR", "archives/orders")
+
+# オンラインで保持する月数（今月を除く。これより古い月はアーカイブ対象）
+ORDER_ARCHIVE_RETENTION_MONTHS = int(os.getenv("ORDER_ARCHIVE_RETENTION_MONTHS", "12"))
+
+# 月・日の区切りに使うタイムゾーン（タイムゾーンなしの日時もこのタイムゾーンの時刻とみなす）
+ORDER_ARCHIVE_TIMEZONE = os.getenv("ORDER_ARCHIVE_TIMEZONE", "Asia/Tokyo")
+
+# サーバーサイドカーソルで1回に取得する行数・1回のDELETEで削除する行数
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "5000"))
+
+# オンラインに残っている最初の月を記録するファイル
+_WATERMARK_FILE = "_archived_until"
+
+# アーカイブする列（menu_name はアーカイブ時点のメニュー名）
+ARCHIVE_COLUMNS = (
+    "id",
+    "user_id",
+    "menu_id",
+    "menu_name",
+    "store_id",
+    "quantity",
+    "total_price",
+    "status",
+    "delivery_time",
+    "notes",
+    "ordered_at",
+    "updated_at",
+)
+
+
+class OrderArchiveError(Exception):
+    """アーカイブの書き出し・読み込みができない場合のエラー"""
+
+
+@dataclass
+class ArchivedOrderFile:
+    """書き出したアーカイブファイル"""
+
+    store_id: int
+    month: date
+    rows: int
+    path: Optional[Path]
+
+
+@dataclass
+class ArchivedSales:
+    """アーカイブ済みの注文の売上集計（キャンセル除く）"""
+
+    # 日付 -> {"orders", "sales", "menu_quantities": {メニュー名: 数量}}
+    daily: Dict[date, Dict] = field(default_factory=dict)
+    # メニューID -> {"menu_name", "total_quantity", "total_sales"}
+    menus: Dict[int, Dict] = field(default_factory=dict)
+
+    @property
+    def total_orders(self) -> int:
+        return sum(day["orders"] for day in self.daily.values())
+
+    @property
+    def total_sales(self) -> int:
+        return sum(day["sales"] for day in self.daily.values())
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise OrderArchiveError("注文アーカイブには pyarrow が必要です")
+    return pyarrow
+
+
+def _schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("menu_id", pa.int64()),
+            ("menu_name", pa.string()),
+            ("store_id", pa.int64()),
+            ("quantity", pa.int32()),
+            ("total_price", pa.int64()),
+            ("status", pa.string()),
+            ("delivery_time", pa.time64("us")),
+            ("notes", pa.string()),
+            # タイムゾーン付きの値はUTCに揃えて保存
+            ("ordered_at", pa.timestamp("us")),
+            ("updated_at", pa.timestamp("us")),
+        ]
+    )
+
+
+def _zone() -> ZoneInfo:
+    return ZoneInfo(ORDER_ARCHIVE_TIMEZONE)
+
+
+def _utc_naive(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_zone())
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _local_date(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(_zone())
+    return value.date()
+
+
+def _month_datetime(month: date) -> datetime:
+    return datetime.combine(month, time.min, tzinfo=_zone())
+
+
+# ===== アーカイブの配置 =====
+
+
+def archive_path(archive_dir: Path, store_id: int, month: date) -> Path:
+    """店舗・月ごとのアーカイブファイルのパス"""
+    return archive_dir / f"store_id={store_id}" / f"{month:%Y-%m}.parquet"
+
+
+def archived_until(archive_dir: Optional[Path] = None) -> Optional[date]:
+    """アーカイブ済みでない最初の月（これより前の月はファイルから読む）"""
+    path = Path(archive_dir or ORDER_ARCHIVE_DIR) / _WATERMARK_FILE
+    try:
+        return date.fromisoformat(path.read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _set_archived_until(archive_dir: Path, month: date) -> None:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / _WATERMARK_FILE
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(month.isoformat())
+    temporary.replace(path)
+
+
+def archive_cutoff(
+    today: Optional[date] = None,
+    retention_months: int = ORDER_ARCHIVE_RETENTION_MONTHS,
+) -> date:
+    """この月より前の注文をアーカイブする"""
+    return add_months(
+        month_start(today or datetime.now(_zone()).date()), -retention_months
+    )
+
+
+# ===== 書き出し =====
+
+
+def _export_month(
+    bind: Engine, archive_dir: Path, month: date, batch_size: int
+) -> List[ArchivedOrderFile]:
+    """1か月分の注文を店舗ごとのParquetファイルに書き出す"""
+    pa = _pyarrow()
+    schema = _schema(pa)
+    columns = [
+        Menu.name.label(column) if column == "menu_name" else Order.__table__.c[column]
+        for column in ARCHIVE_COLUMNS
+    ]
+    statement = (
+        select(*columns)
+        .join(Menu, Menu.id == Order.menu_id)
+        .where(
+            Order.ordered_at >= _month_datetime(month),
+            Order.ordered_at < _month_datetime(add_months(month, 1)),
+        )
+        .order_by(Order.store_id, Order.ordered_at, Order.id)
+    )
+
+    files: List[ArchivedOrderFile] = []
+    writer = None
+    current: Optional[ArchivedOrderFile] = None
+
+    def close_current():
+        writer.close()
+        # 書き込み途中のファイルを残さないよう一時ファイルから置き換える
+        temporary = current.path.with_name(current.path.name + ".tmp")
+        temporary.replace(current.path)
+        files.append(current)
+
+    # stream_results: PostgreSQL ではサーバーサイドカーソルで batch_size 行ずつ取得
+    with bind.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(statement)
+        try:
+            for rows in result.partitions():
+                for store_id, store_rows in groupby(rows, key=lambda row: row.store_id):
+                    if current is None or current.store_id != store_id:
+                        if current is not None:
+                            close_current()
+                        path = archive_path(archive_dir, store_id, month)
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        current = ArchivedOrderFile(store_id, month, 0, path)
+                        writer = pa.parquet.ParquetWriter(
+                            path.with_name(path.name + ".tmp"),
+                            schema,
+                            compression="zstd",
+                        )
+                    store_rows = list(store_rows)
+                    data = {
+                        column: [_utc_naive(row._mapping[column]) for row in store_rows]
+                        for column in ARCHIVE_COLUMNS
+                    }
+                    writer.write_table(pa.Table.from_pydict(data, schema=schema))
+                    current.rows += len(store_rows)
+            if current is not None:
+                close_current()
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            raise
+    return files
+
+
+def _count_month(bind: Engine, month: date) -> List[ArchivedOrderFile]:
+    with bind.connect() as conn:
+        counts = conn.execute(
+            select(Order.store_id, func.count())
+            .where(
+                Order.ordered_at >= _month_datetime(month),
+                Order.ordered_at < _month_datetime(add_months(month, 1)),
+            )
+            .group_by(Order.store_id)
+            .order_by(Order.store_id)
+        ).all()
+    return [ArchivedOrderFile(store_id, month, count, None) for store_id, count in counts]
+
+
+def delete_archived_orders(
+    bind: Engine = engine,
+    archive_dir: Optional[Path] = None,
+    batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+) -> int:
+    """
+    アーカイブ済みの月の注文をバッチ単位で削除（バッチごとにコミット）
+
+    Returns:
+        int: 削除した注文数
+    """
+    until = archived_until(archive_dir)
+    if until is None:
+        return 0
+    cutoff = _month_datetime(until)
+    deleted = 0
+    while True:
+        with bind.begin() as conn:
+            batch = (
+                select(Order.id)
+                .where(Order.ordered_at < cutoff)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            # ordered_at の条件はパーティションの絞り込み用
+            count = conn.execute(
+                delete(Order).where(Order.ordered_at < cutoff, Order.id.in_(batch))
+            ).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def archive_orders(
+    bind: Engine = engine,
+    archive_dir: Optional[Path] = None,
+    retention_months: int = ORDER_ARCHIVE_RETENTION_MONTHS,
+    batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+    today: Optional[date] = None,
+    dry_run: bool = False,
+) -> Dict:
+    """
+    保持期間より古い注文をParquetファイルに書き出してから削除
+
+    Args:
+        bind: 注文を読み書きするDBエンジン
+        archive_dir: 書き出し先のディレクトリ
+        retention_months: オンラインで保持する月数（今月を除く）
+        batch_size: 1回に取得・削除する行数
+        today: 基準日（テスト用）
+        dry_run: 対象の件数を返すだけで書き出し・削除を行わない
+
+    Returns:
+        Dict: cutoff（この月より前をアーカイブ）、files（書き出したファイル）、deleted（削除した注文数）
+    """
+    archive_dir = Path(archive_dir or ORDER_ARCHIVE_DIR)
+    cutoff = archive_cutoff(today, retention_months)
+    done = archived_until(archive_dir)
+    files: List[ArchivedOrderFile] = []
+
+    if done is None or done < cutoff:
+        # 前回アーカイブした月より後、cutoff より前の月を書き出す
+        conditions = [Order.ordered_at < _month_datetime(cutoff)]
+        if done is not None:
+            conditions.append(Order.ordered_at >= _month_datetime(done))
+        with bind.connect() as conn:
+            oldest = conn.execute(select(func.min(Order.ordered_at)).where(*conditions)).scalar()
+        if oldest is not None:
+            month = month_start(_local_date(oldest))
+            while month < cutoff:
+                if dry_run:
+                    files.extend(_count_month(bind, month))
+                else:
+                    files.extend(_export_month(bind, archive_dir, month, batch_size))
+                month = add_months(month, 1)
+        if not dry_run:
+            _set_archived_until(archive_dir, cutoff)
+
+    deleted = 0 if dry_run else delete_archived_orders(bind, archive_dir, batch_size)
+    return {"cutoff": cutoff, "files": files, "deleted": deleted}
+
+
+# ===== 読み込み =====
+
+
+def summarize_archived_sales(
+    store_id: Optional[int],
+    start: datetime,
+    end: datetime,
+    archive_dir: Optional[Path] = None,
+) -> ArchivedSales:
+    """
+    アーカイブ済みの注文を日別・メニュー別に集計（キャンセル除く）
+
+    対象の店舗・月のファイルだけを読み、必要な列のみを期間で絞り込んで集計する。
+
+    Args:
+        store_id: 店舗ID（Noneの場合は全店舗）
+        start: 期間の開始日時
+        end: 期間の終了日時（この日時を含む）
+        archive_dir: アーカイブのディレクトリ
+    """
+    archive_dir = Path(archive_dir or ORDER_ARCHIVE_DIR)
+    summary = ArchivedSales()
+    until = archived_until(archive_dir)
+    if until is None or _utc_naive(start) >= _utc_naive(_month_datetime(until)):
+        return summary
+
+    if store_id is None:
+        store_dirs = sorted(archive_dir.glob("store_id=*"))
+    else:
+        store_dirs = [archive_dir / f"store_id={store_id}"]
+    months = []
+    month = month_start(_local_date(start))
+    while month < until and month <= _local_date(end):
+        months.append(month)
+        month = add_months(month, 1)
+    paths = [
+        path
+        for store_dir in store_dirs
+        for path in (store_dir / f"{month:%Y-%m}.parquet" for month in months)
+        if path.exists()
+    ]
+    if not paths:
+        return summary
+
+    pa = _pyarrow()
+    start, end = _utc_naive(start), _utc_naive(end)
+    for path in paths:
+        table = pa.parquet.read_table(
+            path,
+            columns=["id", "menu_id", "menu_name", "quantity", "total_price", "ordered_at"],
+            filters=[
+                ("ordered_at", ">=", start),
+                ("ordered_at", "<=", end),
+                ("status", "!=", "cancelled"),
+            ],
+        )
+        if table.num_rows == 0:
+            continue
+        # UTCで保存した日時をアーカイブのタイムゾーンの日付に変換して集計
+        local = pa.compute.local_timestamp(
+            table["ordered_at"].cast(pa.timestamp("us", tz=ORDER_ARCHIVE_TIMEZONE))
+        )
+        table = table.append_column("day", pa.compute.cast(local, pa.date32()))
+        grouped = table.group_by(["day", "menu_id", "menu_name"]).aggregate(
+            [("id", "count"), ("quantity", "sum"), ("total_price", "sum")]
+        )
+        for row in grouped.to_pylist():
+            day = summary.daily.setdefault(
+                row["day"], {"orders": 0, "sales": 0, "menu_quantities": {}}
+            )
+            day["orders"] += row["id_count"]
+            day["sales"] += row["total_price_sum"]
+            quantities = day["menu_quantities"]
+            quantities[row["menu_name"]] = (
+                quantities.get(row["menu_name"], 0) + row["quantity_sum"]
+            )
+            menu = summary.menus.setdefault(
+                row["menu_id"],
+                {"menu_name": row["menu_name"], "total_quantity": 0, "total_sales": 0},
+            )
+            menu["total_quantity"] += row["quantity_sum"]
+            menu["total_sales"] += row["total_price_sum"]
+    return summary
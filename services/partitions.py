@@ -0,0 +1,264 @@
+"""Declarative monthly range partitions for time-series tables (PostgreSQL).
+
+A model opts in by naming its partition key in the table info::
+
+    __table_args__ = ({"info": {PARTITION_KEY_INFO: "ordered_at"}},)
+
+The partitioned parent table itself is created by an Alembic migration.
+At runtime this module only keeps the upcoming monthly partitions in
+place. Databases without declarative partitioning, such as SQLite in the
+tests, keep a single table and every helper here is a no-op.
+"""
+
+import asyncio
+import os
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection
+
+import models  # noqa: F401  Base.metadata にテーブルを登録
+from database import Base, engine
+
+# モデルの Table.info でパーティションキーの列名を指定するキー
+PARTITION_KEY_INFO = "partition_by_month"
+
+# 先行して作成しておく将来の月パーティションの数
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# アプリ内で将来の月パーティションを作成する間隔（秒）。0以下で無効化
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = int(
+    os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "86400")
+)
+
+
+# ===== 月の計算 =====
+
+
+def month_start(value: date) -> date:
+    """その月の1日"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """月の1日に月数を加算"""
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# ===== パーティションの定義 =====
+
+
+def partition_key(table: Table) -> Optional[str]:
+    """月単位でパーティション分割するテーブルのパーティションキー（対象外はNone）"""
+    return table.info.get(PARTITION_KEY_INFO)
+
+
+def partitioned_tables() -> List[Table]:
+    """月単位でパーティション分割するテーブルの一覧"""
+    return [
+        table for table in Base.metadata.sorted_tables if partition_key(table) is not None
+    ]
+
+
+def partition_name(table_name: str, month: date) -> str:
+    """月パーティションのテーブル名（例: orders_y2026m10）"""
+    return f"{table_name}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition_name(table_name: str) -> str:
+    """どの月パーティションにも入らない行の受け皿（通常は空。月パーティション作成時に移す）"""
+    return f"{table_name}_default"
+
+
+def partition_month(table_name: str, name: str) -> Optional[date]:
+    """月パーティションのテーブル名から月を取得（月パーティション以外はNone）"""
+    prefix = f"{table_name}_y"
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix) :].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def create_partition_sql(
+    table_name: str, month: date, parent: Optional[str] = None
+) -> str:
+    """
+    月パーティションを作成するDDL
+
+    Args:
+        table_name: パーティション分割するテーブル名（パーティション名の接頭辞）
+        month: パーティションの月
+        parent: 親テーブル名（マイグレーションで作成中のテーブルなど。省略時は table_name）
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, month)} "
+        f"PARTITION OF {parent or table_name} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def move_default_rows_sql(table_name: str, key: str, month: date) -> List[str]:
+    """
+    DEFAULTパーティションにある月の行を、新しく作成する月パーティションへ移すDDL
+
+    DEFAULTパーティションにその月の行があると月パーティションを作成できないため、
+    DEFAULTパーティションを切り離してから作成し、行を移して付け直す。
+    """
+    default = default_partition_name(table_name)
+    in_month = (
+        f"{key} >= '{month.isoformat()}' AND {key} < '{add_months(month, 1).isoformat()}'"
+    )
+    return [
+        f"ALTER TABLE {table_name} DETACH PARTITION {default}",
+        create_partition_sql(table_name, month),
+        f"INSERT INTO {table_name} SELECT * FROM {default} WHERE {in_month}",
+        f"DELETE FROM {default} WHERE {in_month}",
+        f"ALTER TABLE {table_name} ATTACH PARTITION {default} DEFAULT",
+    ]
+
+
+# ===== パーティションの管理 =====
+
+
+def is_partitioned(conn: Connection, table_name: str) -> bool:
+    """テーブルがパーティション分割されているか"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+            ),
+            {"table": table_name},
+        ).scalar()
+    )
+
+
+def list_partitions(conn: Connection, table_name: str) -> List[Tuple[str, date]]:
+    """月パーティションの一覧（月の昇順）"""
+    if not is_partitioned(conn, table_name):
+        return []
+    names = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+        ),
+        {"table": table_name},
+    ).scalars()
+    partitions = [(name, partition_month(table_name, name)) for name in names]
+    return sorted(
+        ((name, month) for name, month in partitions if month is not None),
+        key=lambda partition: partition[1],
+    )
+
+
+def has_default_partition(conn: Connection, table_name: str) -> bool:
+    """DEFAULTパーティションが存在するか"""
+    return (
+        conn.execute(
+            text("SELECT to_regclass(:name)"),
+            {"name": default_partition_name(table_name)},
+        ).scalar()
+        is not None
+    )
+
+
+def count_default_rows(
+    conn: Connection, table_name: str, key: str, month: date
+) -> int:
+    """DEFAULTパーティションにある、その月の行数"""
+    return conn.execute(
+        text(
+            f"SELECT count(*) FROM {default_partition_name(table_name)} "
+            f"WHERE {key} >= :start AND {key} < :end"
+        ),
+        {"start": month, "end": add_months(month, 1)},
+    ).scalar()
+
+
+def ensure_partitions(
+    conn: Connection,
+    table_name: str,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    today: Optional[date] = None,
+) -> List[str]:
+    """
+    今月から months_ahead か月先までの月パーティションを作成
+
+    パーティションの作成が遅れてその月の行がDEFAULTパーティションに入っている場合は、
+    DEFAULTパーティションを切り離して月パーティションを作成し、行を移してから付け直す。
+
+    Returns:
+        List[str]: 新たに作成したパーティション名
+    """
+    if not is_partitioned(conn, table_name):
+        return []
+    existing = {name for name, _ in list_partitions(conn, table_name)}
+    key = partition_key(Base.metadata.tables[table_name])
+    has_default = has_default_partition(conn, table_name)
+    current = month_start(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(table_name, month)
+        if name in existing:
+            continue
+        stray = count_default_rows(conn, table_name, key, month) if has_default else 0
+        if stray:
+            for statement in move_default_rows_sql(table_name, key, month):
+                conn.execute(text(statement))
+            print(
+                f"{default_partition_name(table_name)} の{stray}件を {name} に移動しました"
+            )
+        else:
+            conn.execute(text(create_partition_sql(table_name, month)))
+        created.append(name)
+    return created
+
+
+def ensure_all_partitions(
+    months_ahead: int = PARTITION_MONTHS_AHEAD, today: Optional[date] = None
+) -> List[str]:
+    """
+    パーティション分割する全テーブルの将来の月パーティションを作成
+
+    Returns:
+        List[str]: 新たに作成したパーティション名
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    created = []
+    with engine.begin() as conn:
+        for table in partitioned_tables():
+            created.extend(ensure_partitions(conn, table.name, months_ahead, today))
+    return created
+
+
+async def run_periodic_partition_maintenance(
+    interval_seconds: int = PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+) -> None:
+    """将来の月パーティションの作成を一定間隔で実行し続ける（アプリ起動時にタスクとして登録）.
+
+    起動直後に1回実行し、月をまたいでもパーティションが不足しないようにする。
+
+    Args:
+        interval_seconds: 実行間隔（秒）
+    """
+    while True:
+        try:
+            created = await asyncio.to_thread(ensure_all_partitions)
+            if created:
+                print(f"月パーティション作成: {', '.join(created)}")
+        except Exception as e:
+            # 作成に失敗しても次回の実行は継続（DEFAULTパーティションで受ける）
+            print(f"月パーティション作成エラー: {str(e)}")
+        await asyncio.sleep(interval_seconds)
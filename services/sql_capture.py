@@ -0,0 +1,127 @@
+"""Capture of the SQL the application sends to the database.
+
+When SQL_CAPTURE_FILE is set, every query statement executed through the
+engine is appended to that file as JSON Lines, together with its bound
+parameters. Running a benchmark (for example scripts/benchmark_dashboard.py)
+against a server started this way records the hot endpoints' SQL, which
+scripts/index_advisor.py then replays through EXPLAIN.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 実行したSQLを書き出すファイル（空の場合は記録しない）
+SQL_CAPTURE_FILE = os.getenv("SQL_CAPTURE_FILE", "")
+
+# EXPLAIN で実行計画を確認できる文（INSERT・DDL・トランザクション制御は記録しない）
+CAPTURED_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+@dataclass
+class CapturedStatement:
+    """記録したSQL（同じ文は1件にまとめる）"""
+
+    dialect: str
+    statement: str
+    parameters: Any
+    count: int
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(value)
+
+
+class SqlCapture:
+    """エンジンで実行されたSQLをファイルに追記する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._file = None
+
+    @property
+    def active(self) -> bool:
+        return self._engine is not None
+
+    def start(self, engine: Engine, path: str) -> None:
+        """記録を開始"""
+        if self.active:
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._engine = engine
+        event.listen(engine, "before_cursor_execute", self._record)
+        print(f"SQLの記録を開始: {path}")
+
+    def stop(self) -> None:
+        """記録を停止してファイルを閉じる"""
+        if not self.active:
+            return
+        event.remove(self._engine, "before_cursor_execute", self._record)
+        self._engine = None
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(CAPTURED_PREFIXES):
+            return
+        line = json.dumps(
+            {
+                "dialect": conn.dialect.name,
+                "statement": statement,
+                "parameters": parameters,
+            },
+            ensure_ascii=False,
+            default=_json_default,
+        )
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+
+def load_captured_statements(path: Path) -> List[CapturedStatement]:
+    """
+    記録ファイルを読み込み、同じ文をまとめて実行回数の多い順に返す
+
+    Args:
+        path: SQL_CAPTURE_FILE で書き出したファイル
+
+    Returns:
+        List[CapturedStatement]: 最初に記録したパラメータを代表として持つ
+    """
+    statements = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = (record["dialect"], record["statement"])
+            if key in statements:
+                statements[key].count += 1
+                continue
+            parameters = record.get("parameters")
+            # 位置パラメータは JSON で配列になるため DBAPI 用にタプルへ戻す
+            if isinstance(parameters, list):
+                parameters = tuple(parameters)
+            statements[key] = CapturedStatement(
+                record["dialect"], record["statement"], parameters, 1
+            )
+    return sorted(statements.values(), key=lambda captured: -captured.count)
+
+
+sql_capture = SqlCapture()
@@ -0,0 +1,105 @@
+"""Refresh-token revocation store.
+
+/refresh looks the token up in the revoked_tokens table directly (see
+is_token_revoked) so a token revoked or consumed on another worker cannot be
+replayed; expired rows are pruned periodically to keep the table small.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import RevokedToken
+
+# 期限切れレコードをDBから削除する間隔（秒）。0で無効化
+REVOCATION_PRUNE_INTERVAL_SECONDS = int(
+    os.getenv("REVOCATION_PRUNE_INTERVAL_SECONDS", "3600")
+)
+
+
+def _to_timestamp(value: datetime) -> float:
+    """日時をUNIX時刻に変換（タイムゾーンなしはUTCとみなす）"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def is_token_revoked(db: Session, jti: str) -> bool:
+    """
+    トークンIDが無効化されているかDBを直接参照して判定
+
+    revoked_tokens.jti の一意インデックスを1回引くだけ。他ワーカーでの無効化も
+    即座に反映されるため、リフレッシュトークンの判定に使う。
+    """
+    return (
+        db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+    )
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime) -> bool:
+    """
+    トークンIDを無効化リストに登録
+
+    Args:
+        db: データベースセッション
+        jti: トークンID
+        expires_at: トークンの有効期限（これ以降は自然に失効するため削除対象）
+
+    Returns:
+        bool: 新たに無効化した場合True（既に無効化済み・期限切れの場合はFalse）
+    """
+    if _to_timestamp(expires_at) <= time.time():
+        return False
+
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # 既に無効化済み（他ワーカーが同時に使用した場合を含む）
+        db.rollback()
+        return False
+    return True
+
+
+def prune_expired_revocations(db: Session) -> int:
+    """
+    期限切れの無効化レコードを削除
+
+    Returns:
+        int: 削除した件数
+    """
+    deleted = (
+        db.query(RevokedToken)
+        .filter(RevokedToken.expires_at < datetime.now(timezone.utc))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def _prune_with_new_session() -> int:
+    db = SessionLocal()
+    try:
+        return prune_expired_revocations(db)
+    finally:
+        db.close()
+
+
+async def run_periodic_revocation_prune(
+    interval_seconds: int = REVOCATION_PRUNE_INTERVAL_SECONDS,
+) -> None:
+    """期限切れ無効化レコードの削除を一定間隔で実行し続ける（アプリ起動時にタスクとして登録）"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await asyncio.to_thread(_prune_with_new_session)
+            if deleted > 0:
+                print(f"期限切れトークン無効化レコード削除: {deleted}件")
+        except Exception as e:
+            # 削除に失敗しても次回の実行は継続
+            print(f"トークン無効化レコード削除エラー: {str(e)}")
@@ -0,0 +1,202 @@
+"""Per-process cache of authenticated user principals."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import User, UserRole
+
+# キャッシュの有効期間（秒）。他プロセスでの更新を反映するまでの最大遅延。0で無効化
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+# キャッシュする最大ユーザー数（超過時は最も古く使われたものから削除）
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+
+@dataclass(frozen=True)
+class CachedPrincipal:
+    """認証済みユーザーの最小限の情報"""
+
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    role: str
+    store_id: Optional[int]
+    is_active: bool
+    role_names: Tuple[str, ...]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedPrincipal":
+        """user_roles をロード済みの User から作成"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            store_id=user.store_id,
+            is_active=bool(user.is_active),
+            role_names=tuple(
+                sorted(ur.role.name for ur in user.user_roles if ur.role is not None)
+            ),
+        )
+
+    def to_user(self) -> User:
+        """
+        DBセッションに紐付かない User を作成
+
+        リレーションシップは遅延ロードされないため、ロールは role_names で参照する
+        """
+        user = User(
+            id=self.id,
+            username=self.username,
+            email=self.email,
+            full_name=self.full_name,
+            role=self.role,
+            store_id=self.store_id,
+            is_active=self.is_active,
+        )
+        user.role_names = list(self.role_names)
+        return user
+
+
+class UserPrincipalCache:
+    """TTL付きLRUキャッシュ（ユーザー名をキーとする）"""
+
+    def __init__(
+        self,
+        max_size: int = USER_CACHE_MAX_SIZE,
+        ttl_seconds: float = USER_CACHE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CachedPrincipal]]" = OrderedDict()
+        self._usernames_by_id: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, username: str) -> Optional[CachedPrincipal]:
+        """キャッシュからプリンシパルを取得（期限切れの場合はNone）"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._remove(username)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return principal
+
+    def set(self, principal: CachedPrincipal) -> None:
+        """プリンシパルをキャッシュに保存"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._remove(principal.username)
+            self._entries[principal.username] = (
+                time.monotonic() + self.ttl_seconds,
+                principal,
+            )
+            self._usernames_by_id[principal.id] = principal.username
+
+            while len(self._entries) > self.max_size:
+                oldest_username = next(iter(self._entries))
+                self._remove(oldest_username)
+
+    def evict(
+        self, username: Optional[str] = None, user_id: Optional[int] = None
+    ) -> None:
+        """ユーザー名またはユーザーIDを指定してエントリを削除"""
+        with self._lock:
+            if username is None and user_id is not None:
+                username = self._usernames_by_id.get(user_id)
+            if username is not None:
+                self._remove(username)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._entries.clear()
+            self._usernames_by_id.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, username: str) -> None:
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            _, principal = entry
+            if self._usernames_by_id.get(principal.id) == username:
+                del self._usernames_by_id[principal.id]
+
+
+user_cache = UserPrincipalCache()
+
+
+# ===== 書き込み時のキャッシュ無効化 =====
+
+
+def _collect_affected_users(session: Session) -> None:
+    """フラッシュされた User / UserRole の変更対象をセッションに記録"""
+    affected = session.info.setdefault("user_cache_evictions", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            affected.add(("username", obj.username))
+            if obj.id is not None:
+                affected.add(("user_id", obj.id))
+        elif isinstance(obj, UserRole) and obj.user_id is not None:
+            affected.add(("user_id", obj.user_id))
+
+
+def _evict_affected_users(session: Session) -> None:
+    for key, value in session.info.get("user_cache_evictions", ()):
+        if key == "username":
+            user_cache.evict(username=value)
+        else:
+            user_cache.evict(user_id=value)
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    _collect_affected_users(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    _evict_affected_users(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    # フラッシュ後〜コミット前に他リクエストが古い値を再キャッシュした場合に備えて再度削除
+    _evict_affected_users(session)
+    session.info.pop("user_cache_evictions", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("user_cache_evictions", None)
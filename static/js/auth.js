@@ -42,7 +42,7 @@ class AuthForm {
                 
                 // 認証情報を保存
                 console.log('💾 Saving auth token and user info...');
-                Auth.login(response.access_token, response.user);
+                Auth.login(response.access_token, response.user, response.refresh_token);
                 console.log('✅ Auth info saved');
                 
                 // ゲストカートをユーザーカートに移行
@@ -148,7 +148,7 @@ class AuthForm {
                         password
                     });
                     
-                    Auth.login(response.access_token, response.user);
+                    Auth.login(response.access_token, response.user, response.refresh_token);
                     
                     // ゲストカートをユーザーカートに移行
                     if (response.user.role === 'customer') {
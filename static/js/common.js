@@ -5,6 +5,60 @@ const API_BASE_URL = '/api';
 let authToken = localStorage.getItem('authToken');
 let currentUser = JSON.parse(localStorage.getItem('currentUser') || 'null');
 
+// ===== アクセストークンの自動更新 =====
+// ロールクレームを含むアクセストークンは短時間（ROLE_CLAIMS_MAX_AGE_MINUTES）で失効するため、
+// 認証付きのリクエストが401になった場合はリフレッシュトークンで更新して1回だけ再送する
+const nativeFetch = window.fetch.bind(window);
+let refreshPromise = null;
+
+function refreshAccessToken() {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (!refreshToken) {
+        return Promise.resolve(null);
+    }
+    // 同時に401になったリクエストは1回の更新結果を共有する（リフレッシュトークンは使い捨て）
+    if (!refreshPromise) {
+        refreshPromise = nativeFetch(`${API_BASE_URL}/auth/refresh`, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${refreshToken}` }
+        })
+            .then(response => (response.ok ? response.json() : null))
+            .then(data => {
+                if (!data) {
+                    localStorage.removeItem('refreshToken');
+                    return null;
+                }
+                authToken = data.access_token;
+                localStorage.setItem('authToken', data.access_token);
+                localStorage.setItem('refreshToken', data.refresh_token);
+                return data.access_token;
+            })
+            .catch(() => null)
+            .finally(() => {
+                refreshPromise = null;
+            });
+    }
+    return refreshPromise;
+}
+
+window.fetch = async function(input, init = {}) {
+    const response = await nativeFetch(input, init);
+    if (response.status !== 401) {
+        return response;
+    }
+    const url = typeof input === 'string' ? input : input.url;
+    const headers = new Headers(init.headers || (input instanceof Request ? input.headers : {}));
+    if (!headers.has('Authorization') || url.includes('/auth/refresh') || url.includes('/auth/login')) {
+        return response;
+    }
+    const newToken = await refreshAccessToken();
+    if (!newToken) {
+        return response;
+    }
+    headers.set('Authorization', `Bearer ${newToken}`);
+    return nativeFetch(input, { ...init, headers });
+};
+
 // API呼び出し用のヘルパー関数
 class ApiClient {
     static async request(endpoint, options = {}) {
@@ -127,11 +181,14 @@ class Auth {
         return currentUser;
     }
 
-    static login(token, user) {
+    static login(token, user, refreshToken = null) {
         authToken = token;
         currentUser = user;
         localStorage.setItem('authToken', token);
         localStorage.setItem('currentUser', JSON.stringify(user));
+        if (refreshToken) {
+            localStorage.setItem('refreshToken', refreshToken);
+        }
     }
 
     static logout() {
@@ -139,7 +196,8 @@ class Auth {
         const user = this.getUser();
         const isStaff = user && user.role === 'store';
         
-        // ログアウト処理
+        // ログアウト処理（リフレッシュトークンはサーバー側でも無効化する）
+        revokeRefreshToken();
         authToken = null;
         currentUser = null;
         localStorage.removeItem('authToken');
@@ -719,8 +777,25 @@ async function getCurrentUser() {
     }
 }
 
+// リフレッシュトークンを無効化して削除（ページ遷移後も送信されるよう keepalive を指定）
+function revokeRefreshToken() {
+    const refreshToken = localStorage.getItem('refreshToken');
+    localStorage.removeItem('refreshToken');
+    if (!refreshToken) {
+        return;
+    }
+    nativeFetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+        credentials: 'include',
+        keepalive: true
+    }).catch(() => {});
+}
+
 // ログアウト処理
 function logout() {
+    revokeRefreshToken();
     localStorage.removeItem('accessToken');
     localStorage.removeItem('currentUser');
     localStorage.removeItem('cart');
@@ -729,9 +804,12 @@ function logout() {
 
 // Authオブジェクトをグローバルに公開
 window.Auth = window.Auth || {
-    login(token, user) {
+    login(token, user, refreshToken = null) {
         localStorage.setItem('authToken', token);
         localStorage.setItem('currentUser', JSON.stringify(user));
+        if (refreshToken) {
+            localStorage.setItem('refreshToken', refreshToken);
+        }
         authToken = token;
         currentUser = user;
     },
@@ -109,6 +109,10 @@
 
     async function handleLogout() {
         try {
+            // リフレッシュトークンの無効化（common.js）
+            if (typeof revokeRefreshToken === 'function') {
+                revokeRefreshToken();
+            }
             localStorage.removeItem('authToken');
             
             await fetch('/api/logout', {
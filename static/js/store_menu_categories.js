@@ -107,7 +107,7 @@ function renderCategories(categories) {
     if (emptyMessage) emptyMessage.style.display = 'none';
 
     const categoriesHtml = categories.map(category => `
-        <div class="category-card ${category.is_active ? '' : 'inactive'}">
+        <div class="category-card ${category.is_active ? '' : 'inactive'}" draggable="true" data-category-id="${category.id}">
             <div class="category-info">
                 <div class="category-header">
                     <h3 class="category-name">${escapeHtml(category.name)}</h3>
@@ -140,9 +140,54 @@ function renderCategories(categories) {
 
     if (categoriesList) {
         categoriesList.innerHTML = categoriesHtml;
+        setupDragAndDrop(categoriesList);
     }
 }
 
+// ドラッグ&ドロップで並び替え
+function setupDragAndDrop(categoriesList) {
+    let draggedCard = null;
+
+    categoriesList.querySelectorAll('.category-card').forEach(card => {
+        card.addEventListener('dragstart', () => {
+            draggedCard = card;
+            card.classList.add('dragging');
+        });
+
+        card.addEventListener('dragend', () => {
+            card.classList.remove('dragging');
+            draggedCard = null;
+        });
+
+        card.addEventListener('dragover', (e) => {
+            e.preventDefault();
+            if (!draggedCard || draggedCard === card) return;
+            const rect = card.getBoundingClientRect();
+            const after = e.clientY > rect.top + rect.height / 2;
+            categoriesList.insertBefore(draggedCard, after ? card.nextSibling : card);
+        });
+
+        card.addEventListener('drop', (e) => {
+            e.preventDefault();
+            saveCategoryOrder(categoriesList);
+        });
+    });
+}
+
+// 並び替えた順序を1回のリクエストで保存
+async function saveCategoryOrder(categoriesList) {
+    const categoryIds = Array.from(categoriesList.querySelectorAll('.category-card'))
+        .map(card => parseInt(card.dataset.categoryId));
+
+    try {
+        await ApiClient.put('/store/menu-categories/order', { category_ids: categoryIds });
+        showToast('表示順を更新しました', 'success');
+    } catch (error) {
+        showToast('表示順の更新に失敗しました: ' + (error.detail || error.message), 'error');
+    }
+    fetchCategories();
+}
+
 // 作成モーダルを開く
 function openCreateModal() {
     currentCategoryId = null;
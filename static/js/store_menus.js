@@ -1861,6 +1861,10 @@ function closeAuditLogModal() {
     }
 }
 
+// 監査ログのページごとのカーソル（auditLogCursors[page - 1] でそのページを取得）
+let auditLogCursors = [null];
+let auditLogTotal = 0;
+
 // 監査ログを読み込み
 async function loadAuditLogs(page = 1) {
     const loading = document.getElementById('auditLogLoading');
@@ -1880,11 +1884,13 @@ async function loadAuditLogs(page = 1) {
         const startDate = document.getElementById('auditStartDate')?.value || '';
         const endDate = document.getElementById('auditEndDate')?.value || '';
         
-        // クエリパラメータを構築
-        const params = new URLSearchParams({
-            page: page,
-            per_page: 20
-        });
+        // 1ページ目から読み直す場合はカーソルをリセット
+        if (page === 1) auditLogCursors = [null];
+
+        // クエリパラメータを構築（2ページ目以降は前のページのカーソルで続きを取得）
+        const params = new URLSearchParams({ per_page: 20 });
+        const cursor = auditLogCursors[page - 1];
+        if (cursor) params.append('cursor', cursor);
         
         if (action) params.append('action', action);
         if (startDate) params.append('start_date', startDate);
@@ -1900,8 +1906,10 @@ async function loadAuditLogs(page = 1) {
             // ログを表示
             renderAuditLogs(response.logs);
             
-            // ページネーション表示
-            renderAuditLogPagination(response.total, page);
+            // ページネーション表示（総件数は1ページ目のみ返される）
+            if (page === 1) auditLogTotal = response.total || 0;
+            auditLogCursors[page] = response.next_cursor;
+            renderAuditLogPagination(page, response.logs.length, Boolean(response.next_cursor));
         } else {
             // 空メッセージ表示
             if (empty) empty.style.display = 'block';
@@ -2020,7 +2028,7 @@ function renderAuditLogs(logs) {
 }
 
 // 監査ログのページネーション
-function renderAuditLogPagination(total, currentPage) {
+function renderAuditLogPagination(currentPage, count, hasNext) {
     const paginationSection = document.getElementById('auditLogPagination');
     const paginationInfo = document.getElementById('auditPaginationInfo');
     const pagination = document.getElementById('auditPagination');
@@ -2028,9 +2036,8 @@ function renderAuditLogPagination(total, currentPage) {
     if (!paginationSection || !pagination) return;
     
     const perPage = 20;
-    const totalPages = Math.ceil(total / perPage);
     
-    if (totalPages <= 1) {
+    if (currentPage === 1 && !hasNext) {
         paginationSection.style.display = 'none';
         return;
     }
@@ -2039,12 +2046,12 @@ function renderAuditLogPagination(total, currentPage) {
     
     // ページ情報
     const start = (currentPage - 1) * perPage + 1;
-    const end = Math.min(currentPage * perPage, total);
+    const end = start + count - 1;
     if (paginationInfo) {
-        paginationInfo.textContent = `${start}-${end} / ${total}件`;
+        paginationInfo.textContent = `${start}-${end} / ${auditLogTotal}件`;
     }
     
-    // ページネーションボタン
+    // ページネーションボタン（カーソルで続きを取得するため前後のページのみ）
     let paginationHtml = '';
     
     // 前へボタン
@@ -2052,36 +2059,10 @@ function renderAuditLogPagination(total, currentPage) {
         paginationHtml += `<button class="pagination-btn" onclick="loadAuditLogs(${currentPage - 1})">‹ 前へ</button>`;
     }
     
-    // ページ番号
-    const maxButtons = 5;
-    let startPage = Math.max(1, currentPage - Math.floor(maxButtons / 2));
-    let endPage = Math.min(totalPages, startPage + maxButtons - 1);
-    
-    if (endPage - startPage < maxButtons - 1) {
-        startPage = Math.max(1, endPage - maxButtons + 1);
-    }
-    
-    if (startPage > 1) {
-        paginationHtml += `<button class="pagination-btn" onclick="loadAuditLogs(1)">1</button>`;
-        if (startPage > 2) {
-            paginationHtml += `<span class="pagination-ellipsis">...</span>`;
-        }
-    }
-    
-    for (let i = startPage; i <= endPage; i++) {
-        const activeClass = i === currentPage ? 'active' : '';
-        paginationHtml += `<button class="pagination-btn ${activeClass}" onclick="loadAuditLogs(${i})">${i}</button>`;
-    }
-    
-    if (endPage < totalPages) {
-        if (endPage < totalPages - 1) {
-            paginationHtml += `<span class="pagination-ellipsis">...</span>`;
-        }
-        paginationHtml += `<button class="pagination-btn" onclick="loadAuditLogs(${totalPages})">${totalPages}</button>`;
-    }
+    paginationHtml += `<button class="pagination-btn active">${currentPage}</button>`;
     
     // 次へボタン
-    if (currentPage < totalPages) {
+    if (hasNext) {
         paginationHtml += `<button class="pagination-btn" onclick="loadAuditLogs(${currentPage + 1})">次へ ›</button>`;
     }
     
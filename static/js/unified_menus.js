@@ -119,10 +119,8 @@ async function loadStoreInfo() {
         }
 
         // ローカルストレージに保存（次回用）
+        // 店舗名はメニューと一緒にカタログAPIから取得して表示する
         localStorage.setItem('selectedStoreId', selectedStoreId.toString());
-
-        // 店舗名を取得して表示
-        await displayStoreName(selectedStoreId);
     } catch (error) {
         console.error('❌ 店舗情報の読み込みエラー:', error);
         
@@ -131,7 +129,6 @@ async function loadStoreInfo() {
         if (storedStoreId) {
             selectedStoreId = parseInt(storedStoreId);
             console.log('🔄 エラー発生、ローカルストレージから店舗ID使用:', selectedStoreId);
-            await displayStoreName(selectedStoreId);
         } else {
             // 完全に取得できない場合は店舗選択ページへ
             window.location.href = '/stores';
@@ -139,32 +136,10 @@ async function loadStoreInfo() {
     }
 }
 
-async function displayStoreName(storeId) {
-    try {
-        const response = await fetch(
-            `/api/public/stores?is_active=true`,
-            {
-                credentials: 'include',
-            }
-        );
-
-        if (!response.ok) {
-            throw new Error('店舗一覧の取得に失敗しました');
-        }
-
-        const stores = await response.json();
-        const store = stores.find((s) => s.id === storeId);
-
-        if (store) {
-            document.getElementById('storeName').textContent = store.name;
-        } else {
-            document.getElementById('storeName').textContent =
-                '店舗情報が見つかりません';
-        }
-    } catch (error) {
-        console.error('店舗名の表示エラー:', error);
-        document.getElementById('storeName').textContent = '不明な店舗';
-    }
+function displayStoreName(store) {
+    document.getElementById('storeName').textContent = store
+        ? store.name
+        : '店舗情報が見つかりません';
 }
 
 // ========================================
@@ -187,8 +162,8 @@ async function loadMenus() {
         loading.style.display = 'block';
         errorMessage.style.display = 'none';
 
-        // メニュー一覧を取得
-        const apiUrl = `/api/public/stores/${selectedStoreId}/menus?is_available=true`;
+        // 店舗情報・カテゴリ・メニューをカタログAPIで一度に取得
+        const apiUrl = `/api/public/stores/${selectedStoreId}/catalog`;
         console.log('🔗 API URL:', apiUrl);
         
         const response = await fetch(apiUrl, {
@@ -197,16 +172,18 @@ async function loadMenus() {
 
         console.log('📡 API レスポンス:', response.status, response.statusText);
 
+        if (response.status === 404) {
+            displayStoreName(null);
+        }
         if (!response.ok) {
             throw new Error(`メニューの取得に失敗しました (${response.status})`);
         }
 
-        allMenus = await response.json();
+        const catalog = await response.json();
+        displayStoreName(catalog.store);
+        applyCatalog(catalog);
         console.log('✅ メニュー取得成功:', allMenus.length, '件');
 
-        // カテゴリ情報を抽出
-        extractCategories(allMenus);
-
         // UIを更新
         renderCategoryFilter();
         renderMenus(allMenus);
@@ -220,23 +197,24 @@ async function loadMenus() {
     }
 }
 
-function extractCategories(menus) {
-    // メニューからユニークなカテゴリを抽出
-    const categorySet = new Set();
-
-    menus.forEach((menu) => {
-        if (menu.category && menu.category.name) {
-            categorySet.add(JSON.stringify({
-                id: menu.category.id,
-                name: menu.category.name,
-            }));
-        }
+function applyCatalog(catalog) {
+    // カテゴリは表示順のまま使用し、メニューには従来どおりカテゴリ情報を付与する
+    allCategories = catalog.categories
+        .filter((category) => category.menus.length > 0)
+        .map((category) => ({ id: category.id, name: category.name }));
+
+    allMenus = [];
+    catalog.categories.forEach((category) => {
+        category.menus.forEach((menu) => {
+            allMenus.push({
+                ...menu,
+                category: { id: category.id, name: category.name },
+            });
+        });
+    });
+    catalog.uncategorized_menus.forEach((menu) => {
+        allMenus.push({ ...menu, category: null });
     });
-
-    allCategories = Array.from(categorySet).map((cat) => JSON.parse(cat));
-
-    // カテゴリを名前順でソート
-    allCategories.sort((a, b) => a.name.localeCompare(b.name));
 }
 
 // ========================================
@@ -335,6 +335,11 @@ class UniversalHeader {
                 return;
             }
 
+            // リフレッシュトークンの無効化（common.js）
+            if (typeof revokeRefreshToken === 'function') {
+                revokeRefreshToken();
+            }
+
             // API経由でログアウト
             await fetch('/api/logout', {
                 method: 'POST',
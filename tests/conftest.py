@@ -4,11 +4,12 @@ pytest設定とフィクスチャ
 テスト用のデータベース、クライアント、ユーザーなどを提供
 """
 
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -16,6 +17,10 @@ from auth import get_password_hash
 from database import Base, get_db
 from main import app
 from models import Menu, Order, Role, Store, User, UserRole
+from services.catalog_cache import catalog_cache
+from services.login_throttle import login_throttle
+from services.menu_audit import menu_audit_writer
+from services.user_cache import user_cache
 
 # テスト用インメモリデータベース
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -27,6 +32,9 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 監査ログはメニューの変更と同じトランザクションで書き込み、リクエスト直後に確認できるようにする
+menu_audit_writer.synchronous = True
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -35,6 +43,10 @@ def db_session():
     各テストごとに新しいデータベースを作成
     """
     Base.metadata.create_all(bind=engine)
+    # テスト間でユーザーキャッシュやログイン試行回数、カタログを共有しない
+    user_cache.clear()
+    login_throttle.clear()
+    catalog_cache.clear()
     session = TestingSessionLocal()
     try:
         yield session
@@ -382,6 +394,22 @@ def orders_for_customer_b(db_session, customer_user_b, test_menu, store_a):
     return orders
 
 
+@contextmanager
+def count_queries(db_session):
+    """実行されたSQL文を記録する"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    bind = db_session.get_bind()
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
 def get_auth_token(client, username: str, password: str) -> str:
     """
     認証トークンを取得するヘルパー関数
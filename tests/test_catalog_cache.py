@@ -0,0 +1,159 @@
+"""
+店舗カタログスナップショット（services.catalog_cache）のテスト
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import GuestSession, Menu, MenuCategory, Order, Store
+from services.catalog_cache import CatalogCache, catalog_cache
+from tests.conftest import count_queries
+
+
+def _menu_queries(statements):
+    return [s for s in statements if "FROM menus" in s]
+
+
+class TestCatalogCache:
+    """CatalogCache のテスト"""
+
+    def test_second_lookup_does_not_query(self, db_session, store_a, test_menu):
+        """読み込み済みの店舗はDBに問い合わせずに参照できる"""
+        catalog = catalog_cache.get_catalog(db_session, store_a.id)
+        assert catalog.get_menu(test_menu.id).price == 800
+
+        with count_queries(db_session) as statements:
+            menu = catalog_cache.find_menu(db_session, test_menu.id)
+
+        assert menu.name == "テスト弁当"
+        assert statements == []
+
+    def test_snapshot_includes_category_and_store(self, db_session, store_a):
+        """メニューにカテゴリと店舗の情報が含まれる"""
+        category = MenuCategory(name="定番", store_id=store_a.id)
+        db_session.add(category)
+        db_session.flush()
+        menu = Menu(name="唐揚げ弁当", price=600, store_id=store_a.id, category_id=category.id)
+        db_session.add(menu)
+        db_session.commit()
+
+        snapshot = catalog_cache.find_menu(db_session, menu.id)
+
+        assert snapshot.category.name == "定番"
+        assert snapshot.store.name == store_a.name
+
+    def test_commit_swaps_snapshot(self, db_session, store_a, test_menu):
+        """メニューの更新をコミットすると新しいスナップショットに差し替わる"""
+        before = catalog_cache.get_catalog(db_session, store_a.id)
+
+        test_menu.price = 950
+        db_session.commit()
+        after = catalog_cache.get_catalog(db_session, store_a.id)
+
+        assert after.version > before.version
+        assert after.get_menu(test_menu.id).price == 950
+        # 古いスナップショット自体は変更されない
+        assert before.get_menu(test_menu.id).price == 800
+
+    def test_rollback_discards_uncommitted_snapshot(self, db_session, store_a, test_menu):
+        """ロールバックした変更を含むスナップショットは残らない"""
+        test_menu.price = 1
+        db_session.flush()
+        assert catalog_cache.find_menu(db_session, test_menu.id, max_staleness=0).price == 1
+
+        db_session.rollback()
+
+        assert catalog_cache.find_menu(db_session, test_menu.id).price == 800
+
+    def test_version_recheck_detects_other_process_writes(
+        self, db_session, store_a, test_menu
+    ):
+        """他プロセスの書き込みはバージョンの再確認で検出される"""
+        cache = CatalogCache(recheck_seconds=60)
+        cache.get_catalog(db_session, store_a.id)
+
+        # フラッシュを経由しない書き込み（他プロセスでの更新に相当）
+        db_session.execute(update(Menu).where(Menu.id == test_menu.id).values(price=700))
+        db_session.execute(
+            update(Store)
+            .where(Store.id == store_a.id)
+            .values(catalog_version=Store.catalog_version + 1)
+        )
+        db_session.commit()
+
+        assert cache.find_menu(db_session, test_menu.id).price == 800
+        assert cache.find_menu(db_session, test_menu.id, max_staleness=0).price == 700
+
+    def test_lru_evicts_least_recently_used_store(
+        self, db_session, store_a, store_b, test_menu
+    ):
+        """保持する店舗数の上限を超えると古い店舗から破棄される"""
+        cache = CatalogCache(max_stores=1)
+        cache.get_catalog(db_session, store_a.id)
+        cache.get_catalog(db_session, store_b.id)
+
+        assert cache.stats()["stores"] == 1
+        assert cache.stats()["menus"] == 0
+
+    def test_unknown_menu_and_store(self, db_session, store_a):
+        """存在しないメニュー・店舗はNone"""
+        assert catalog_cache.find_menu(db_session, 99999) is None
+        assert catalog_cache.get_catalog(db_session, 99999) is None
+
+
+class TestHotPathsUseSnapshot:
+    """カート追加・注文・公開メニュー一覧でのスナップショット利用のテスト"""
+
+    def test_guest_add_to_cart_skips_menu_query(self, client, db_session, store_a, test_menu):
+        """ゲストのカート追加でメニューを問い合わせない"""
+        guest = GuestSession(
+            session_id="catalog-cache-guest",
+            selected_store_id=store_a.id,
+            expires_at=datetime.utcnow() + timedelta(hours=24),
+        )
+        db_session.add(guest)
+        db_session.commit()
+        catalog_cache.get_catalog(db_session, store_a.id)
+        client.cookies.set("guest_session_id", guest.session_id)
+
+        with count_queries(db_session) as statements:
+            response = client.post(
+                "/api/guest/cart/add", json={"menu_id": test_menu.id, "quantity": 1}
+            )
+
+        assert response.status_code == 201
+        assert not [
+            s for s in _menu_queries(statements) if "guest_cart_items" not in s
+        ]
+
+    def test_create_order_uses_current_price(
+        self, client, db_session, auth_headers_customer_a, test_menu
+    ):
+        """注文金額は最新のカタログの価格で計算される"""
+        catalog_cache.find_menu(db_session, test_menu.id)
+        test_menu.price = 1200
+        db_session.commit()
+
+        response = client.post(
+            "/api/customer/orders",
+            json={"menu_id": test_menu.id, "quantity": 2},
+            headers=auth_headers_customer_a,
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_price"] == 2400
+        assert data["menu"]["price"] == 1200
+        assert db_session.query(Order).one().total_price == 2400
+
+    def test_public_menus_served_from_snapshot(self, client, db_session, store_a, test_menu):
+        """公開メニュー一覧は読み込み済みのスナップショットから返す"""
+        client.get(f"/api/public/stores/{store_a.id}/menus")
+
+        with count_queries(db_session) as statements:
+            response = client.get(f"/api/public/stores/{store_a.id}/menus")
+
+        assert response.status_code == 200
+        assert response.json()[0]["name"] == "テスト弁当"
+        assert _menu_queries(statements) == []
@@ -0,0 +1,127 @@
+"""
+メニューカタログ複製（/api/store/stores/{id}/clone-catalog）のテスト
+"""
+
+from models import Menu, MenuCategory, MenuChangeLog
+from services.catalog_cache import catalog_cache
+from services.menu_search import search_menus
+from tests.conftest import count_queries
+
+
+def _add_catalog(db_session, store, category_count, menus_per_category):
+    for i in range(category_count):
+        category = MenuCategory(name=f"カテゴリ{i:02d}", store_id=store.id, display_order=i)
+        db_session.add(category)
+        db_session.flush()
+        for j in range(menus_per_category):
+            db_session.add(
+                Menu(
+                    name=f"弁当{i:02d}-{j}",
+                    price=500 + j,
+                    store_id=store.id,
+                    category_id=category.id,
+                    image_url=f"/static/images/menus/{i}-{j}.jpg",
+                )
+            )
+    db_session.commit()
+
+
+def _clone(client, headers, target, source, **params):
+    return client.post(
+        f"/api/store/stores/{target}/clone-catalog",
+        params={"from": source, **params},
+        headers=headers,
+    )
+
+
+class TestCloneCatalog:
+    """カタログ複製のテスト"""
+
+    def test_copies_categories_and_remaps_menus(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """カテゴリとメニューを複製し、メニューのカテゴリを複製先のカテゴリに付け替える"""
+        _add_catalog(db_session, store_a, 2, 2)
+        db_session.add(Menu(name="単品", price=300, store_id=store_a.id))
+        db_session.commit()
+
+        response = _clone(client, auth_headers_store, store_b.id, store_a.id)
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "source_store_id": store_a.id,
+            "target_store_id": store_b.id,
+            "categories_created": 2,
+            "menus_created": 5,
+            "menus_skipped": 0,
+        }
+        db_session.expire_all()
+        categories = {
+            c.id: c.name
+            for c in db_session.query(MenuCategory).filter_by(store_id=store_b.id)
+        }
+        menus = db_session.query(Menu).filter_by(store_id=store_b.id).all()
+        assert sorted(categories.values()) == ["カテゴリ00", "カテゴリ01"]
+        by_name = {menu.name: menu for menu in menus}
+        assert categories[by_name["弁当01-1"].category_id] == "カテゴリ01"
+        assert by_name["単品"].category_id is None
+        assert by_name["弁当00-0"].image_url == "/static/images/menus/0-0.jpg"
+        assert db_session.query(MenuChangeLog).filter_by(store_id=store_b.id).count() == 5
+
+    def test_safe_to_rerun_against_live_store(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """複製先の既存カテゴリを使い、既存メニューは複製しない"""
+        _add_catalog(db_session, store_a, 1, 2)
+        existing_category = MenuCategory(name="カテゴリ00", store_id=store_b.id)
+        db_session.add(existing_category)
+        db_session.flush()
+        db_session.add(Menu(name="弁当00-0", price=999, store_id=store_b.id))
+        db_session.commit()
+
+        first = _clone(client, auth_headers_store, store_b.id, store_a.id).json()
+        second = _clone(client, auth_headers_store, store_b.id, store_a.id).json()
+
+        assert (
+            first["categories_created"],
+            first["menus_created"],
+            first["menus_skipped"],
+        ) == (0, 1, 1)
+        assert (second["categories_created"], second["menus_created"]) == (0, 0)
+        db_session.expire_all()
+        cloned = db_session.query(Menu).filter_by(store_id=store_b.id, name="弁当00-1").one()
+        assert cloned.category_id == existing_category.id
+
+    def test_constant_statements_and_search_index(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """カタログの件数に関わらずSQLの回数が一定で、検索・公開一覧にも反映される"""
+        _add_catalog(db_session, store_a, 5, 20)
+        catalog_cache.get_catalog(db_session, store_b.id)
+
+        with count_queries(db_session) as statements:
+            response = _clone(
+                client, auth_headers_store, store_b.id, store_a.id, share_images=False
+            )
+
+        assert response.json()["menus_created"] == 100
+        assert sum(sql.startswith("INSERT INTO menus ") for sql in statements) == 1
+        assert len(statements) < 20
+
+        catalog = catalog_cache.get_catalog(db_session, store_b.id)
+        assert len(catalog.menus) == 100
+        assert all(menu.image_url is None for menu in catalog.menus.values())
+        query, _ = search_menus(db_session.query(Menu), db_session, "弁当04", store_b.id)
+        assert query.count() == 20
+
+    def test_owner_only_and_validation(
+        self, client, store_a, store_b, auth_headers_manager, auth_headers_store
+    ):
+        """Owner以外は403、同じ店舗は400、存在しない店舗は404"""
+        forbidden = _clone(client, auth_headers_manager, store_b.id, store_a.id)
+        same_store = _clone(client, auth_headers_store, store_a.id, store_a.id)
+        unknown = _clone(client, auth_headers_store, store_b.id, 99999)
+
+        assert forbidden.status_code == 403
+        assert same_store.status_code == 400
+        assert unknown.status_code == 404
@@ -0,0 +1,201 @@
+"""
+送信待ちメール（services.email_outbox）のテスト
+"""
+
+import os
+import smtplib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from mail import EmailConfig, enqueue_password_reset_email
+from models import EmailOutbox, PasswordResetToken
+from services.email_outbox import (
+    EMAIL_OUTBOX_LEASE_SECONDS,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EmailOutboxSender,
+    backoff_seconds,
+)
+
+
+class FakeSMTP:
+    """送信内容を記録するSMTP接続の代替"""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, message):
+        if message["To"] in self.fail_for:
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"rejected")})
+        self.sent.append(message)
+
+    def quit(self):
+        self.closed = True
+
+
+def _enqueue(db_session, count, prefix="user"):
+    for i in range(count):
+        enqueue_password_reset_email(db_session, f"{prefix}{i}@test.com", f"token{i}")
+    db_session.commit()
+
+
+class TestEmailOutboxSender:
+    """EmailOutboxSender のテスト"""
+
+    def test_batch_uses_one_connection(self, db_session):
+        """バッチ内のメールは1つの接続で送信される"""
+        _enqueue(db_session, 3)
+        connections = []
+
+        def factory():
+            connections.append(FakeSMTP())
+            return connections[-1]
+
+        result = EmailOutboxSender(db_session, smtp_factory=factory).send_pending()
+
+        assert result == {"sent": 3, "retried": 0, "failed": 0}
+        assert len(connections) == 1
+        assert len(connections[0].sent) == 3
+        assert connections[0].closed
+        assert {e.status for e in db_session.query(EmailOutbox)} == {"sent"}
+
+    def test_batch_size_limits_sent_messages(self, db_session):
+        """batch_size を超える分は次回に送信される"""
+        _enqueue(db_session, 3)
+        smtp = FakeSMTP()
+
+        result = EmailOutboxSender(db_session, smtp_factory=lambda: smtp).send_pending(
+            batch_size=2
+        )
+
+        assert result["sent"] == 2
+        assert db_session.query(EmailOutbox).filter_by(status="pending").count() == 1
+
+    def test_failed_message_is_retried_with_backoff(self, db_session):
+        """送信に失敗したメールは待ち時間を置いて再試行される"""
+        _enqueue(db_session, 2)
+        now = datetime.now(timezone.utc)
+        smtp = FakeSMTP(fail_for={"user0@test.com"})
+
+        result = EmailOutboxSender(db_session, smtp_factory=lambda: smtp).send_pending(
+            now=now
+        )
+
+        assert result == {"sent": 1, "retried": 1, "failed": 0}
+        entry = db_session.query(EmailOutbox).filter_by(recipient="user0@test.com").one()
+        assert entry.status == "pending"
+        assert entry.attempts == 1
+        assert entry.last_error
+
+        # 待ち時間内は送信対象にならない
+        result = EmailOutboxSender(db_session, smtp_factory=lambda: smtp).send_pending(
+            now=now + timedelta(seconds=1)
+        )
+        assert result == {"sent": 0, "retried": 0, "failed": 0}
+
+    def test_connection_failure_retries_whole_batch(self, db_session):
+        """接続に失敗した場合はバッチ全体を再試行に回す"""
+        _enqueue(db_session, 2)
+
+        def factory():
+            raise OSError("connection refused")
+
+        result = EmailOutboxSender(db_session, smtp_factory=factory).send_pending()
+
+        assert result == {"sent": 0, "retried": 2, "failed": 0}
+
+    def test_gives_up_after_max_attempts(self, db_session):
+        """最大試行回数に達したメールは failed になる"""
+        _enqueue(db_session, 1)
+        entry = db_session.query(EmailOutbox).one()
+        entry.attempts = EMAIL_OUTBOX_MAX_ATTEMPTS - 1
+        db_session.commit()
+
+        smtp = FakeSMTP(fail_for={"user0@test.com"})
+        result = EmailOutboxSender(db_session, smtp_factory=lambda: smtp).send_pending()
+
+        assert result["failed"] == 1
+        db_session.refresh(entry)
+        assert entry.status == "failed"
+
+    def test_no_transaction_open_while_sending(self, db_session):
+        """SMTP送信中は確保した行をコミット済みでトランザクションを開いていない"""
+        _enqueue(db_session, 2)
+        states = []
+
+        class CheckingSMTP(FakeSMTP):
+            def send_message(self, message):
+                states.append(db_session.in_transaction())
+                entry = (
+                    db_session.query(EmailOutbox)
+                    .filter_by(recipient=message["To"])
+                    .one()
+                )
+                states.append(entry.status)
+                db_session.rollback()
+                super().send_message(message)
+
+        result = EmailOutboxSender(
+            db_session, smtp_factory=CheckingSMTP
+        ).send_pending()
+
+        assert result["sent"] == 2
+        assert states == [False, "sending", False, "sending"]
+
+    def test_expired_lease_is_claimed_again(self, db_session):
+        """送信途中で停止したワーカーの分はリースの期限後に再送される"""
+        _enqueue(db_session, 1)
+        now = datetime.now(timezone.utc)
+        entry = db_session.query(EmailOutbox).one()
+        entry.status = "sending"
+        entry.next_attempt_at = now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS)
+        db_session.commit()
+        smtp = FakeSMTP()
+
+        sender = EmailOutboxSender(db_session, smtp_factory=lambda: smtp)
+        assert sender.send_pending(now=now)["sent"] == 0
+        result = sender.send_pending(
+            now=now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS + 1)
+        )
+
+        assert result["sent"] == 1
+        assert len(smtp.sent) == 1
+
+    def test_backoff_grows_exponentially(self):
+        """再試行の待ち時間は試行ごとに2倍になる"""
+        assert backoff_seconds(2) == backoff_seconds(1) * 2
+
+
+class TestPasswordResetOutbox:
+    """パスワードリセット要求でのメール登録のテスト"""
+
+    def test_token_and_email_written_together(self, client, db_session, customer_user_a):
+        """リセットトークンと送信待ちメールが同じリクエストで保存される"""
+        response = client.post(
+            "/api/auth/password-reset-request",
+            json={"email": customer_user_a.email},
+        )
+
+        assert response.status_code == 200
+        token = db_session.query(PasswordResetToken).one()
+        entry = db_session.query(EmailOutbox).one()
+        assert entry.recipient == customer_user_a.email
+        assert token.token in entry.body
+
+
+@pytest.mark.skipif(
+    not os.getenv("MAILHOG_SMTP_TEST"),
+    reason="MailHogなどのローカルSMTPサーバーを使う場合のみ実行（MAILHOG_SMTP_TEST=1）",
+)
+def test_send_through_local_smtp_server(db_session, monkeypatch):
+    """docker-compose の MailHog に実際に送信できる"""
+    monkeypatch.setattr(EmailConfig, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(EmailConfig, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(EmailConfig, "MAIL_USE_CREDENTIALS", False)
+    _enqueue(db_session, 2, prefix="mailhog")
+
+    result = EmailOutboxSender(db_session).send_pending()
+
+    assert result["sent"] == 2
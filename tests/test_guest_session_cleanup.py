@@ -0,0 +1,81 @@
+"""
+期限切れゲストセッション削除サービスのテスト
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import GuestCartItem, GuestSession
+from services.guest_session_cleanup import GuestSessionCleanupService
+
+
+def _create_session(db, session_id: str, expires_in_hours: int, converted_to=None):
+    session = GuestSession(
+        session_id=session_id,
+        expires_at=datetime.utcnow() + timedelta(hours=expires_in_hours),
+        converted_to_user_id=converted_to,
+    )
+    db.add(session)
+    db.commit()
+    return session
+
+
+class TestGuestSessionCleanup:
+    """GuestSessionCleanupService のテスト"""
+
+    def test_purges_expired_sessions_and_cart_items(self, db_session, test_menu):
+        """期限切れセッションとカートアイテムが削除される"""
+        _create_session(db_session, "expired_1", -1)
+        _create_session(db_session, "active_1", 24)
+        db_session.add(GuestCartItem(session_id="expired_1", menu_id=test_menu.id))
+        db_session.add(GuestCartItem(session_id="active_1", menu_id=test_menu.id))
+        db_session.commit()
+
+        result = GuestSessionCleanupService(db_session).purge_expired_sessions()
+
+        assert result["sessions_deleted"] == 1
+        assert result["cart_items_deleted"] == 1
+        remaining = [s.session_id for s in db_session.query(GuestSession).all()]
+        assert remaining == ["active_1"]
+        assert db_session.query(GuestCartItem).count() == 1
+
+    def test_converted_sessions_are_kept(self, db_session, customer_user_a):
+        """ユーザーに変換済みのセッションは削除されない"""
+        _create_session(db_session, "converted", -1, converted_to=customer_user_a.id)
+
+        result = GuestSessionCleanupService(db_session).purge_expired_sessions()
+
+        assert result["sessions_deleted"] == 0
+        assert db_session.query(GuestSession).count() == 1
+
+    def test_deletes_in_batches(self, db_session):
+        """バッチサイズ単位で削除される"""
+        for i in range(5):
+            _create_session(db_session, f"expired_{i}", -1)
+
+        result = GuestSessionCleanupService(db_session).purge_expired_sessions(
+            batch_size=2
+        )
+
+        assert result["sessions_deleted"] == 5
+        assert result["batches"] == 3
+        assert result["rows_per_second"] >= 0
+        assert db_session.query(GuestSession).count() == 0
+
+    def test_max_batches_limits_work(self, db_session):
+        """max_batches で1回の実行量を制限できる"""
+        for i in range(5):
+            _create_session(db_session, f"expired_{i}", -1)
+
+        result = GuestSessionCleanupService(db_session).purge_expired_sessions(
+            batch_size=2, max_batches=1
+        )
+
+        assert result["sessions_deleted"] == 2
+        assert db_session.query(GuestSession).count() == 3
+
+    def test_invalid_batch_size(self, db_session):
+        """不正なバッチサイズはエラー"""
+        with pytest.raises(ValueError):
+            GuestSessionCleanupService(db_session).purge_expired_sessions(batch_size=0)
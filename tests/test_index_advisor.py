@@ -0,0 +1,257 @@
+"""
+インデックスアドバイザー（services.index_advisor / services.sql_capture）のテスト
+"""
+
+import json
+from pathlib import Path
+
+from sqlalchemy import text
+
+from services.index_advisor import (
+    AdvisorReport,
+    IndexInfo,
+    RedundantIndex,
+    SeqScanFinding,
+    alembic_heads,
+    analyze_workload,
+    candidate_columns,
+    find_redundant_indexes,
+    render_migration,
+    table_aliases,
+)
+from services.sql_capture import SqlCapture, load_captured_statements
+from tests.conftest import engine
+
+ORDER_COLUMNS = ["id", "user_id", "menu_id", "store_id", "status", "ordered_at"]
+
+ORDERS_BY_USER = text("SELECT orders.id FROM orders WHERE orders.user_id = :user_id")
+ORDERS_BY_MENU = text(
+    "SELECT orders.id FROM orders "
+    "WHERE orders.menu_id = :menu_id AND orders.quantity > 0"
+)
+INSERT_ROLE = text("INSERT INTO roles (name) VALUES (:name)")
+
+
+def _capture(path: Path, run):
+    capture = SqlCapture()
+    capture.start(engine, str(path))
+    try:
+        run()
+    finally:
+        capture.stop()
+    return load_captured_statements(path)
+
+
+class TestSqlCapture:
+    """SQLの記録のテスト"""
+
+    def test_records_queries_and_merges_duplicates(self, db_session, tmp_path):
+        path = tmp_path / "sql.jsonl"
+
+        def run():
+            for user_id in (1, 2, 3):
+                db_session.execute(ORDERS_BY_USER, {"user_id": user_id}).all()
+            db_session.execute(INSERT_ROLE, {"name": "auditor"})
+
+        statements = _capture(path, run)
+
+        assert len(statements) == 1
+        assert statements[0].dialect == "sqlite"
+        assert statements[0].count == 3
+        # 位置パラメータはタプルに戻す
+        assert statements[0].parameters == (1,)
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert not [
+            line for line in lines if json.loads(line)["statement"].startswith("INSERT")
+        ]
+
+
+class TestCandidateColumns:
+    """候補インデックスの列の組み立てのテスト"""
+
+    def test_equality_columns_before_range_column(self):
+        statement = (
+            "SELECT orders_1.id FROM orders AS orders_1 "
+            "JOIN menus ON menus.id = orders_1.menu_id "
+            "WHERE orders_1.store_id = ? AND orders_1.ordered_at >= ? "
+            "AND orders_1.status != ?"
+        )
+        aliases = table_aliases(statement, ["orders", "menus"])
+        assert aliases["orders_1"] == "orders"
+
+        assert candidate_columns(statement, "orders", ORDER_COLUMNS, aliases) == [
+            "store_id",
+            "menu_id",
+            "ordered_at",
+        ]
+
+    def test_ignores_other_tables_and_unsearchable_predicates(self):
+        statement = (
+            "SELECT orders.id FROM orders JOIN users ON users.id = orders.user_id "
+            "WHERE users.username = ? AND orders.status <> ? AND orders.notes LIKE ?"
+        )
+        aliases = table_aliases(statement, ["orders", "users"])
+
+        assert candidate_columns(statement, "orders", ORDER_COLUMNS, aliases) == [
+            "user_id"
+        ]
+
+
+class TestRedundantIndexes:
+    """先頭列が重複するインデックスの検出のテスト"""
+
+    def test_prefix_of_another_index(self):
+        indexes = {
+            "orders": [
+                IndexInfo("orders", "ix_store_id", ["store_id"]),
+                IndexInfo("orders", "ix_store_ordered", ["store_id", "ordered_at"]),
+                IndexInfo("orders", "ix_user_id", ["user_id"], unique=True),
+                IndexInfo("orders", "ix_user_ordered", ["user_id", "ordered_at"]),
+                IndexInfo("orders", "ix_ordered_at", ["ordered_at"], method="brin"),
+                IndexInfo("orders", "ix_active", ["ordered_at", "id"], partial=True),
+            ]
+        }
+
+        redundant = find_redundant_indexes(indexes)
+
+        assert [(r.index.name, r.covered_by.name) for r in redundant] == [
+            ("ix_store_id", "ix_store_ordered")
+        ]
+
+    def test_keeps_one_of_identical_indexes(self):
+        indexes = {
+            "orders": [
+                IndexInfo("orders", "ix_b", ["store_id"]),
+                IndexInfo("orders", "ix_a", ["store_id"]),
+            ]
+        }
+
+        redundant = find_redundant_indexes(indexes)
+
+        assert [(r.index.name, r.covered_by.name) for r in redundant] == [
+            ("ix_a", "ix_b")
+        ]
+
+
+class TestAnalyzeWorkload:
+    """記録したSQLの分析のテスト"""
+
+    def test_hot_endpoint_uses_covering_index(
+        self, client, auth_headers_customer_a, orders_for_customer_a, tmp_path
+    ):
+        statements = _capture(
+            tmp_path / "sql.jsonl",
+            lambda: client.get(
+                "/api/customer/orders", headers=auth_headers_customer_a
+            ),
+        )
+
+        report = analyze_workload(engine, statements, min_rows=0)
+
+        assert report.explained == len(statements)
+        assert not report.failed
+        assert "ix_orders_user_ordered" not in {index.name for index in report.unused}
+        assert not [
+            finding
+            for finding in report.seq_scans
+            if finding.table == "orders" and "user_id" in finding.candidate
+        ]
+
+    def test_reports_seq_scan_with_candidate(
+        self, db_session, orders_for_customer_a, tmp_path
+    ):
+        statements = _capture(
+            tmp_path / "sql.jsonl",
+            lambda: db_session.execute(ORDERS_BY_MENU, {"menu_id": 1}).all(),
+        )
+
+        report = analyze_workload(engine, statements, min_rows=0)
+
+        [finding] = [f for f in report.seq_scans if f.table == "orders"]
+        assert finding.candidate == ["menu_id", "quantity"]
+        assert finding.covered_by is None
+        assert finding.rows == len(orders_for_customer_a)
+        assert report.new_indexes == [finding]
+
+    def test_small_tables_are_not_reported(
+        self, db_session, orders_for_customer_a, tmp_path
+    ):
+        statements = _capture(
+            tmp_path / "sql.jsonl",
+            lambda: db_session.execute(ORDERS_BY_MENU, {"menu_id": 1}).all(),
+        )
+
+        report = analyze_workload(engine, statements, min_rows=1000)
+
+        assert report.seq_scans == []
+
+    def test_skips_statements_from_other_databases(self, db_session, tmp_path):
+        path = tmp_path / "sql.jsonl"
+        path.write_text(
+            json.dumps(
+                {
+                    "dialect": "postgresql",
+                    "statement": "SELECT 1 FROM orders WHERE orders.id = %(id)s",
+                    "parameters": {"id": 1},
+                }
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+        report = analyze_workload(engine, load_captured_statements(path))
+
+        assert report.skipped == 1
+        assert report.explained == 0
+
+
+class TestRenderMigration:
+    """候補のマイグレーション生成のテスト"""
+
+    def test_alembic_heads(self, tmp_path):
+        (tmp_path / "a_first.py").write_text(
+            'revision: str = "aaa"\ndown_revision: Union[str, None] = None\n'
+        )
+        (tmp_path / "b_second.py").write_text(
+            'revision: str = "bbb"\ndown_revision: Union[str, None] = "aaa"\n'
+        )
+        (tmp_path / "c_legacy.py").write_text("revision = 'ccc'\ndown_revision = 'aaa'\n")
+
+        assert alembic_heads(tmp_path) == ["bbb", "ccc"]
+
+    def test_renders_valid_migration(self):
+        store_id = IndexInfo("orders", "ix_orders_store_id", ["store_id"])
+        store_ordered = IndexInfo(
+            "orders", "ix_orders_store_ordered", ["store_id", "ordered_at"]
+        )
+        report = AdvisorReport(
+            seq_scans=[
+                SeqScanFinding("orders", 50000, ["menu_id", "quantity"], statements=1),
+                SeqScanFinding("orders", 50000, [], statements=1),
+            ],
+            unused=[IndexInfo("orders", "ix_orders_ordered_at", ["ordered_at"])],
+            redundant=[RedundantIndex(store_id, store_ordered)],
+        )
+
+        source = render_migration(report, ["d8f3b1c6e274"], revision="0123456789ab")
+
+        compile(source, "candidate.py", "exec")
+        assert 'revision: str = "0123456789ab"' in source
+        assert '= "d8f3b1c6e274"' in source
+        assert (
+            'op.create_index("ix_orders_menu_id_quantity", "orders", '
+            '["menu_id", "quantity"])'
+        ) in source
+        assert 'op.drop_index("ix_orders_store_id", table_name="orders")' in source
+        # 使われていないインデックスの削除はコメントとして提案するだけ
+        assert '    # op.drop_index("ix_orders_ordered_at", table_name="orders")' in source
+        downgrade = source[source.index("def downgrade") :]
+        assert 'op.create_index("ix_orders_store_id", "orders", ["store_id"])' in downgrade
+        assert 'op.drop_index("ix_orders_menu_id_quantity", table_name="orders")' in downgrade
+
+    def test_renders_pass_without_changes(self):
+        source = render_migration(AdvisorReport(), ["d8f3b1c6e274"])
+
+        compile(source, "candidate.py", "exec")
+        assert "def upgrade() -> None:\n    pass" in source
+        assert "def downgrade() -> None:\n    pass" in source
@@ -0,0 +1,119 @@
+"""
+検証済みJWTキャッシュ（auth.TokenVerificationCache）のテスト
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from jose import JWTError, jwt
+
+import auth
+from auth import (
+    ALGORITHM,
+    SECRET_KEY,
+    TokenVerificationCache,
+    create_access_token,
+    token_cache,
+)
+
+
+@pytest.fixture
+def count_decodes(monkeypatch):
+    """jose の jwt.decode 呼び出し回数を記録する"""
+    calls = []
+    original = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+
+class TestTokenVerificationCache:
+    """TokenVerificationCache のテスト"""
+
+    def test_valid_token_is_verified_once(self, count_decodes):
+        """同じトークンは2回目以降署名検証を行わない"""
+        cache = TokenVerificationCache(max_size=10, negative_ttl_seconds=5)
+        token = create_access_token({"sub": "alice"})
+
+        first = cache.decode(token)
+        second = cache.decode(token)
+
+        assert first == second
+        assert first["sub"] == "alice"
+        assert len(count_decodes) == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_returned_payload_is_a_copy(self):
+        """返されたペイロードを変更してもキャッシュに影響しない"""
+        cache = TokenVerificationCache(max_size=10, negative_ttl_seconds=5)
+        token = create_access_token({"sub": "alice"})
+
+        cache.decode(token)["sub"] = "mallory"
+
+        assert cache.decode(token)["sub"] == "alice"
+
+    def test_invalid_token_is_negative_cached(self, count_decodes):
+        """無効なトークンは失敗としてキャッシュされ、再検証しない"""
+        cache = TokenVerificationCache(max_size=10, negative_ttl_seconds=5)
+
+        for _ in range(2):
+            with pytest.raises(JWTError):
+                cache.decode("invalid.token.here")
+
+        assert len(count_decodes) == 1
+
+    def test_negative_cache_disabled(self, count_decodes):
+        """ネガティブキャッシュの秒数が0の場合は毎回検証する"""
+        cache = TokenVerificationCache(max_size=10, negative_ttl_seconds=0)
+
+        for _ in range(2):
+            with pytest.raises(JWTError):
+                cache.decode("invalid.token.here")
+
+        assert len(count_decodes) == 2
+
+    def test_entry_expires_with_token(self):
+        """トークンの exp を過ぎたエントリは使われない"""
+        cache = TokenVerificationCache(max_size=10, negative_ttl_seconds=5)
+        token = jwt.encode(
+            {"sub": "alice", "exp": datetime.utcnow() - timedelta(seconds=1)},
+            SECRET_KEY,
+            algorithm=ALGORITHM,
+        )
+
+        with pytest.raises(JWTError):
+            cache.decode(token)
+        assert cache.stats()["size"] == 1  # 失敗としてのみ保持される
+
+    def test_lru_eviction(self):
+        """最大件数を超えると最も古く使われたエントリが削除される"""
+        cache = TokenVerificationCache(max_size=2, negative_ttl_seconds=5)
+        tokens = [create_access_token({"sub": f"user{i}"}) for i in range(3)]
+
+        for token in tokens:
+            cache.decode(token)
+
+        assert cache.stats()["size"] == 2
+
+
+class TestTokenCacheIntegration:
+    """認証依存関係からのキャッシュ利用のテスト"""
+
+    def test_repeated_requests_hit_cache(self, client, auth_headers_customer_a):
+        """同じトークンでの繰り返しリクエストはキャッシュヒットする"""
+        client.get("/api/customer/cart", headers=auth_headers_customer_a)
+        hits_before = token_cache.stats()["hits"]
+
+        client.get("/api/customer/cart", headers=auth_headers_customer_a)
+
+        assert token_cache.stats()["hits"] > hits_before
+
+    def test_metrics_endpoint_reports_hit_rate(self, client):
+        """メトリクスにJWTキャッシュのヒット率が含まれる"""
+        response = client.get("/health/metrics")
+
+        assert "hit_rate" in response.json()["jwt_cache"]
@@ -0,0 +1,121 @@
+"""
+ログイン試行回数制限（services.login_throttle）のテスト
+"""
+
+import routers.auth as auth_router
+from services.login_throttle import LoginThrottle, TokenBucketLimiter, login_throttle
+
+
+class TestTokenBucketLimiter:
+    """TokenBucketLimiter 単体のテスト"""
+
+    def test_allows_up_to_capacity(self):
+        """容量分までは許可し、超えると待ち秒数を返す"""
+        limiter = TokenBucketLimiter(capacity=2, refill_per_minute=60, max_keys=10)
+
+        assert limiter.try_acquire("a") == 0
+        assert limiter.try_acquire("a") == 0
+        retry_after = limiter.try_acquire("a")
+
+        assert 0 < retry_after <= 1
+
+    def test_keys_are_independent(self):
+        """キーごとに独立して制限される"""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_minute=1, max_keys=10)
+
+        assert limiter.try_acquire("a") == 0
+        assert limiter.try_acquire("a") > 0
+        assert limiter.try_acquire("b") == 0
+
+    def test_lru_eviction(self):
+        """最大キー数を超えると最も古く使われたキーが削除される"""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_minute=1, max_keys=2)
+        limiter.try_acquire("a")
+        limiter.try_acquire("b")
+        limiter.try_acquire("c")
+
+        assert len(limiter) == 2
+        # 削除されたキーは満タンの状態から再開する
+        assert limiter.try_acquire("a") == 0
+
+
+class TestLoginThrottle:
+    """LoginThrottle のテスト"""
+
+    def test_username_is_case_insensitive(self):
+        """ユーザー名の大文字小文字を区別せずに制限する"""
+        throttle = LoginThrottle(
+            user_limiter=TokenBucketLimiter(1, 1, 10),
+            ip_limiter=TokenBucketLimiter(10, 1, 10),
+        )
+
+        assert throttle.check("Alice", "1.1.1.1") == 0
+        assert throttle.check("alice", "2.2.2.2") > 0
+        assert throttle.stats()["rejected"] == 1
+
+    def test_success_resets_account_bucket(self):
+        """ログイン成功でアカウントの制限がリセットされる"""
+        throttle = LoginThrottle(
+            user_limiter=TokenBucketLimiter(1, 1, 10),
+            ip_limiter=TokenBucketLimiter(10, 1, 10),
+        )
+        throttle.check("alice", "1.1.1.1")
+        throttle.record_success("alice")
+
+        assert throttle.check("alice", "1.1.1.1") == 0
+
+
+class TestLoginEndpointThrottle:
+    """ログインエンドポイントでの制限のテスト"""
+
+    def test_rejected_attempts_skip_password_verification(
+        self, client, customer_user_a, monkeypatch
+    ):
+        """上限を超えた試行は429となり、パスワード検証を行わない"""
+        calls = []
+        original = auth_router.verify_password_async
+
+        async def counting_verify(plain, hashed):
+            calls.append(plain)
+            return await original(plain, hashed)
+
+        monkeypatch.setattr(auth_router, "verify_password_async", counting_verify)
+        capacity = login_throttle.user_limiter.capacity
+
+        for _ in range(capacity):
+            response = client.post(
+                "/api/auth/login",
+                json={"username": customer_user_a.username, "password": "wrong"},
+            )
+            assert response.status_code == 401
+
+        response = client.post(
+            "/api/auth/login",
+            json={"username": customer_user_a.username, "password": "password123"},
+        )
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert len(calls) == capacity
+
+    def test_ip_limit_applies_across_accounts(self, client, monkeypatch):
+        """同一IPからは別アカウントでも制限される"""
+        monkeypatch.setattr(
+            login_throttle, "ip_limiter", TokenBucketLimiter(2, 1, 10)
+        )
+
+        statuses = [
+            client.post(
+                "/api/auth/login",
+                json={"username": f"nobody{i}", "password": "x"},
+            ).status_code
+            for i in range(3)
+        ]
+
+        assert statuses == [401, 401, 429]
+
+    def test_metrics_endpoint_reports_throttle(self, client):
+        """メトリクスに制限の状態が含まれる"""
+        response = client.get("/health/metrics")
+
+        assert "rejected" in response.json()["login_throttle"]
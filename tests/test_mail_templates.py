@@ -0,0 +1,158 @@
+"""
+メールテンプレート（mail.EmailTemplateRegistry）のテスト
+"""
+
+import mail
+from mail import EmailTemplateRegistry, build_password_reset_email, inline_css
+
+
+class TestInlineCss:
+    """inline_css のテスト"""
+
+    def test_inlines_tag_and_class_rules(self):
+        """要素名・クラス名のルールが style 属性に展開される"""
+        html = (
+            "<html><head><style>p { color: red; } .note { font-size: 12px }</style>"
+            '</head><body><p class="note">a</p></body></html>'
+        )
+
+        result = inline_css(html)
+
+        assert '<p class="note" style="color: red; font-size: 12px;">' in result
+        assert "<style>" not in result
+
+    def test_existing_style_attribute_wins(self):
+        """既存の style 属性が最後に置かれ優先される"""
+        html = '<style>p { color: red }</style><p style="color: blue">a</p>'
+
+        result = inline_css(html)
+
+        assert 'style="color: red; color: blue;"' in result
+
+    def test_pseudo_class_rules_are_kept(self):
+        """展開できないルールは !important 付きで <style> に残る"""
+        html = (
+            "<head><style>.button { color: white } .button:hover { color: gray }"
+            '</style></head><a class="button">x</a>'
+        )
+
+        result = inline_css(html)
+
+        assert ".button:hover { color: gray !important }" in result
+        assert '<a class="button" style="color: white;">' in result
+
+    def test_media_query_is_kept_intact(self):
+        """@media ブロックは展開せず、中のルールを !important 付きで残す"""
+        html = (
+            "<style>p { color: red } "
+            "@media (max-width: 600px) { p { color: blue } .wide { width: 100% } } "
+            ".note { margin: 0 }</style>"
+            '<p class="note">a</p>'
+        )
+
+        result = inline_css(html)
+
+        assert (
+            "@media (max-width: 600px) { p { color: blue !important } "
+            ".wide { width: 100% !important } }"
+        ) in result
+        assert '<p class="note" style="color: red; margin: 0;">' in result
+
+    def test_other_at_rules_are_kept_verbatim(self):
+        """@font-face などのアットルールと @import はそのまま残す"""
+        html = (
+            "<style>@import url(a.css); @font-face { font-family: X; src: url(x.woff) }"
+            " b { color: red }</style><b>x</b>"
+        )
+
+        result = inline_css(html)
+
+        assert "@import url(a.css);" in result
+        assert "@font-face { font-family: X; src: url(x.woff) }" in result
+        assert '<b style="color: red;">' in result
+
+    def test_single_quoted_and_unquoted_attributes(self):
+        """単一引用符・引用符なしの class / style 属性にも展開される"""
+        html = (
+            "<style>.a { color: red } .b { margin: 0 }</style>"
+            "<p class='a' style='color: blue'>x</p><p class=b>y</p>"
+        )
+
+        result = inline_css(html)
+
+        assert '<p class=\'a\' style="color: red; color: blue;">' in result
+        assert '<p class=b style="margin: 0;">' in result
+
+    def test_selector_specificity(self):
+        """宣言は記述順ではなく詳細度の低い順に並ぶ（後の宣言が優先）"""
+        html = (
+            "<style>#main { color: green } p.note { color: blue } "
+            ".note { color: red } p { color: black }</style>"
+            '<p id="main" class="note">a</p><p class="note">b</p><div class="note">c</div>'
+        )
+
+        result = inline_css(html)
+
+        assert (
+            '<p id="main" class="note" '
+            'style="color: black; color: red; color: blue; color: green;">'
+        ) in result
+        assert '<p class="note" style="color: black; color: red; color: blue;">' in result
+        assert '<div class="note" style="color: red;">' in result
+
+    def test_important_declarations_override_style_attribute(self):
+        """!important 付きの宣言は既存の style 属性より後に置かれる"""
+        html = (
+            "<style>a { color: white !important; margin: 0 }</style>"
+            '<a style="color: blue; padding: 1px">x</a>'
+        )
+
+        result = inline_css(html)
+
+        assert 'style="margin: 0; color: blue; padding: 1px; color: white !important;"' in result
+
+    def test_compound_class_selector_requires_all_classes(self):
+        """複数クラスのセレクタはすべてのクラスを持つ要素にのみ展開される"""
+        html = '<style>.a.b { color: red }</style><i class="a">x</i><i class="b a">y</i>'
+
+        result = inline_css(html)
+
+        assert '<i class="a">' in result
+        assert '<i class="b a" style="color: red;">' in result
+
+
+class TestEmailTemplateRegistry:
+    """EmailTemplateRegistry のテスト"""
+
+    def test_template_is_compiled_once(self, tmp_path, monkeypatch):
+        """テンプレートは初回のみ読み込み・コンパイルされる"""
+        (tmp_path / "hello.html").write_text(
+            "<style>b { color: red }</style><b>{{ name }}</b>", encoding="utf-8"
+        )
+        registry = EmailTemplateRegistry(tmp_path)
+        calls = []
+        original = mail.inline_css
+        monkeypatch.setattr(mail, "inline_css", lambda s: calls.append(s) or original(s))
+
+        first = registry.render("hello.html", name="<太郎>")
+        second = registry.render("hello.html", name="花子")
+
+        assert first == '<b style="color: red;">&lt;太郎&gt;</b>'
+        assert second == '<b style="color: red;">花子</b>'
+        assert len(calls) == 1
+
+    def test_password_reset_email(self):
+        """パスワードリセットメールにリンクが含まれ、CSSが展開されている"""
+        subject, html = build_password_reset_email("abc123", "https://example.com")
+
+        assert subject == mail.PASSWORD_RESET_SUBJECT
+        assert html.count("https://example.com/reset-password?token=abc123") == 2
+        assert 'class="button" style="' in html
+
+    def test_mail_client_is_created_lazily(self, monkeypatch):
+        """メールクライアントは初回取得時に作成され、以降は使い回される"""
+        monkeypatch.setattr(mail, "_mail_client", None)
+
+        client = mail.get_mail_client()
+
+        assert mail.get_mail_client() is client
@@ -0,0 +1,157 @@
+"""
+監査ログのバッチ書き込み（services.menu_audit）のテスト
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from models import Menu, MenuChangeLog
+from services.menu_audit import MenuAuditWriter, menu_audit_writer
+from tests.conftest import TestingSessionLocal, count_queries, engine
+
+
+def _events(menu, count, action="update"):
+    return [
+        {
+            "menu_id": menu.id,
+            "store_id": menu.store_id,
+            "user_id": None,
+            "action": action,
+            "changes": {"price": {"old": str(i), "new": str(i + 1)}},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def async_audit_writer(db_session):
+    """バックグラウンドで書き込むモードに切り替えた監査ログライター"""
+    original = menu_audit_writer.session_factory
+    menu_audit_writer.synchronous = False
+    menu_audit_writer.session_factory = TestingSessionLocal
+    try:
+        yield menu_audit_writer
+    finally:
+        menu_audit_writer.shutdown()
+        menu_audit_writer.synchronous = True
+        menu_audit_writer.session_factory = original
+
+
+class TestMenuAuditWriter:
+    """監査ログライターのテスト"""
+
+    def test_menu_write_does_not_insert_logs(
+        self, client, db_session, auth_headers_store, async_audit_writer
+    ):
+        """メニュー作成のリクエスト中は監査ログを書き込まず、コミット後にまとめて書き込む"""
+        request_statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if threading.current_thread().name != "menu-audit-writer":
+                request_statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.post(
+                "/api/store/menus",
+                json={"name": "唐揚げ弁当", "price": 600},
+                headers=auth_headers_store,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        assert not any("menu_change_logs" in sql for sql in request_statements)
+
+        async_audit_writer.flush()
+
+        log = db_session.query(MenuChangeLog).one()
+        assert log.menu_id == response.json()["id"]
+        assert log.action == "create"
+        assert log.changes["name"] == "唐揚げ弁当"
+
+    def test_rolled_back_changes_are_not_logged(
+        self, db_session, store_a, test_menu, async_audit_writer
+    ):
+        """ロールバックした変更のログは書き込まない"""
+        menu = Menu(name="試作弁当", price=500, store_id=store_a.id)
+        db_session.add(menu)
+        db_session.flush()
+        async_audit_writer.record(db_session, _events(test_menu, 1, action="create"))
+        db_session.rollback()
+        db_session.commit()
+
+        async_audit_writer.flush()
+
+        assert db_session.query(MenuChangeLog).count() == 0
+
+    def test_batches_and_shutdown_flushes(self, db_session, test_menu):
+        """複数行INSERTでまとめて書き込み、停止時に残りを書き込む"""
+        writer = MenuAuditWriter(
+            session_factory=TestingSessionLocal, batch_size=100, synchronous=False
+        )
+        with count_queries(db_session) as statements:
+            writer.enqueue(_events(test_menu, 250))
+            writer.shutdown()
+
+        assert db_session.query(MenuChangeLog).count() == 250
+        assert writer.stats()["written"] == 250
+        inserts = [sql for sql in statements if sql.startswith("INSERT INTO menu_change_logs")]
+        assert 3 <= len(inserts) < 250
+
+    def test_overflow_is_written_by_caller(self, db_session, test_menu):
+        """待ち行列があふれた分も失わずに書き込む"""
+        writer = MenuAuditWriter(
+            session_factory=TestingSessionLocal, max_queue=5, synchronous=False
+        )
+
+        writer.enqueue(_events(test_menu, 40))
+        writer.shutdown()
+
+        assert db_session.query(MenuChangeLog).count() == 40
+        assert writer.stats()["failed"] == 0
+
+    def test_invalid_row_does_not_drop_batch(self, db_session, test_menu):
+        """書き込めない行があっても同じバッチの他の行は書き込む"""
+        writer = MenuAuditWriter(session_factory=TestingSessionLocal, synchronous=False)
+        events = _events(test_menu, 3)
+        events[1]["action"] = None
+
+        writer.enqueue(events)
+        writer.shutdown()
+
+        assert db_session.query(MenuChangeLog).count() == 2
+        assert writer.stats()["failed"] == 1
+
+    def test_deleted_menu_events_are_skipped(self, db_session, store_a, test_menu):
+        """削除済みメニューのログは1行ずつの再試行に頼らず除いてから書き込む"""
+        deleted = Menu(name="終売弁当", price=500, store_id=store_a.id)
+        db_session.add(deleted)
+        db_session.commit()
+        events = _events(test_menu, 2) + _events(deleted, 1, action="delete")
+        db_session.delete(deleted)
+        db_session.commit()
+        writer = MenuAuditWriter(session_factory=TestingSessionLocal, synchronous=False)
+
+        with count_queries(db_session) as statements:
+            writer.enqueue(events)
+            writer.shutdown()
+
+        assert db_session.query(MenuChangeLog).count() == 2
+        assert writer.stats()["skipped"] == 1
+        assert writer.stats()["failed"] == 0
+        inserts = [sql for sql in statements if sql.startswith("INSERT INTO menu_change_logs")]
+        assert len(inserts) == 1
+
+    def test_synchronous_mode_writes_in_transaction(self, db_session, test_menu):
+        """同期モードでは呼び出し元のトランザクションで書き込む"""
+        writer = MenuAuditWriter(synchronous=True)
+
+        writer.record(db_session, _events(test_menu, 2))
+        db_session.rollback()
+        assert db_session.query(MenuChangeLog).count() == 0
+
+        writer.record(db_session, _events(test_menu, 2))
+        db_session.commit()
+        assert db_session.query(MenuChangeLog).count() == 2
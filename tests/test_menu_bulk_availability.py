@@ -0,0 +1,119 @@
+"""
+メニュー一括公開/非公開（/api/store/menus/bulk-availability）のテスト
+"""
+
+from models import Menu, MenuChangeLog
+from services.catalog_cache import catalog_cache
+from tests.conftest import count_queries
+
+
+def _add_menus(db_session, store, count, is_available=True):
+    menus = [
+        Menu(name=f"季節の弁当{i:03d}", price=700, store_id=store.id, is_available=is_available)
+        for i in range(count)
+    ]
+    db_session.add_all(menus)
+    db_session.commit()
+    return [menu.id for menu in menus]
+
+
+def _bulk_update(client, headers, menu_ids, is_available):
+    return client.put(
+        "/api/store/menus/bulk-availability",
+        json={"menu_ids": menu_ids, "is_available": is_available},
+        headers=headers,
+    )
+
+
+class TestBulkMenuAvailability:
+    """一括公開/非公開のテスト"""
+
+    def test_updates_own_menus_and_reports_failed_ids(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """自店舗のメニューのみ更新し、他店舗・存在しないIDは failed_ids で返す"""
+        own_ids = _add_menus(db_session, store_a, 3)
+        other_ids = _add_menus(db_session, store_b, 1)
+
+        response = _bulk_update(
+            client, auth_headers_store, own_ids + other_ids + [99999], False
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated_count"] == 3
+        assert data["failed_ids"] == other_ids + [99999]
+
+        db_session.expire_all()
+        menus = db_session.query(Menu).filter(Menu.id.in_(own_ids + other_ids)).all()
+        assert {m.id: m.is_available for m in menus} == {
+            **{menu_id: False for menu_id in own_ids},
+            other_ids[0]: True,
+        }
+
+    def test_writes_one_change_log_per_menu(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """更新したメニューごとに監査ログを記録する"""
+        menu_ids = _add_menus(db_session, store_a, 3, is_available=False)
+
+        _bulk_update(client, auth_headers_store, menu_ids, True)
+
+        logs = db_session.query(MenuChangeLog).order_by(MenuChangeLog.menu_id).all()
+        assert [log.menu_id for log in logs] == menu_ids
+        assert all(log.action == "update" for log in logs)
+        assert all(
+            log.changes == {"is_available": {"old": "False", "new": "True"}}
+            for log in logs
+        )
+        assert all(log.store_id == store_a.id for log in logs)
+
+    def test_unchanged_menus_are_not_logged(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """既に指定の状態だったメニューは更新済みとして返すが監査ログは記録しない"""
+        hidden_ids = _add_menus(db_session, store_a, 2, is_available=False)
+        visible_ids = _add_menus(db_session, store_a, 1, is_available=True)
+        visible_updated_at = db_session.get(Menu, visible_ids[0]).updated_at
+
+        response = _bulk_update(
+            client, auth_headers_store, hidden_ids + visible_ids, True
+        )
+
+        data = response.json()
+        assert data["updated_count"] == 3
+        assert data["failed_ids"] == []
+        logs = db_session.query(MenuChangeLog).order_by(MenuChangeLog.menu_id).all()
+        assert [log.menu_id for log in logs] == hidden_ids
+        assert all(log.changes["is_available"]["old"] == "False" for log in logs)
+        db_session.expire_all()
+        assert db_session.get(Menu, visible_ids[0]).updated_at == visible_updated_at
+
+    def test_statement_count_does_not_grow_with_batch_size(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """200件の更新でもメニュー数に比例してクエリが増えない"""
+        few_ids = _add_menus(db_session, store_a, 2)
+        many_ids = _add_menus(db_session, store_a, 200)
+        _bulk_update(client, auth_headers_store, few_ids, False)
+
+        with count_queries(db_session) as few:
+            _bulk_update(client, auth_headers_store, few_ids, True)
+        with count_queries(db_session) as many:
+            response = _bulk_update(client, auth_headers_store, many_ids, False)
+
+        assert response.json()["updated_count"] == 200
+        assert len(many) == len(few)
+        assert sum("UPDATE menus" in sql for sql in many) == 1
+
+    def test_refreshes_catalog_snapshot(
+        self, client, db_session, store_a, test_menu, auth_headers_store
+    ):
+        """一括更新後の公開メニュー一覧に反映される"""
+        menu_id = test_menu.id
+        catalog_cache.get_catalog(db_session, store_a.id)
+
+        _bulk_update(client, auth_headers_store, [menu_id], False)
+
+        catalog = catalog_cache.get_catalog(db_session, store_a.id)
+        assert catalog.get_menu(menu_id).is_available is False
@@ -0,0 +1,70 @@
+"""
+カテゴリ一覧のメニュー数集計（/api/store/menu-categories）のテスト
+"""
+
+from models import Menu, MenuCategory
+from tests.conftest import count_queries
+
+
+def _add_categories(db_session, store, count, menus_per_category=2):
+    for i in range(count):
+        category = MenuCategory(name=f"カテゴリ{i:02d}", store_id=store.id, display_order=i)
+        db_session.add(category)
+        db_session.flush()
+        for j in range(menus_per_category):
+            db_session.add(
+                Menu(
+                    name=f"弁当{i:02d}-{j}",
+                    price=500,
+                    store_id=store.id,
+                    category_id=category.id,
+                )
+            )
+    db_session.commit()
+
+
+class TestMenuCategoryCounts:
+    """カテゴリごとのメニュー数のテスト"""
+
+    def test_menu_counts_per_category(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """各カテゴリのメニュー数（自店舗のメニューのみ）を返す"""
+        empty = MenuCategory(name="空", store_id=store_a.id, display_order=0)
+        full = MenuCategory(name="定番", store_id=store_a.id, display_order=1)
+        db_session.add_all([empty, full])
+        db_session.flush()
+        db_session.add_all(
+            [
+                Menu(name="唐揚げ弁当", price=600, store_id=store_a.id, category_id=full.id),
+                Menu(name="のり弁当", price=450, store_id=store_a.id, category_id=full.id),
+                # 他店舗のメニューは数えない
+                Menu(name="他店の弁当", price=500, store_id=store_b.id, category_id=full.id),
+            ]
+        )
+        db_session.commit()
+
+        response = client.get("/api/store/menu-categories", headers=auth_headers_store)
+
+        assert response.status_code == 200
+        counts = {c["name"]: c["menu_count"] for c in response.json()["categories"]}
+        assert counts == {"空": 0, "定番": 2}
+
+    def test_query_count_does_not_grow_with_categories(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """カテゴリ数に関わらずクエリ数が一定"""
+        _add_categories(db_session, store_a, 2)
+        client.get("/api/store/menu-categories", headers=auth_headers_store)
+        with count_queries(db_session) as few:
+            response = client.get("/api/store/menu-categories", headers=auth_headers_store)
+        assert response.json()["total"] == 2
+
+        _add_categories(db_session, store_a, 30)
+        client.get("/api/store/menu-categories", headers=auth_headers_store)
+        with count_queries(db_session) as many:
+            response = client.get("/api/store/menu-categories", headers=auth_headers_store)
+        assert response.json()["total"] == 32
+
+        assert len(many) == len(few)
+        assert all(c["menu_count"] == 2 for c in response.json()["categories"])
@@ -0,0 +1,84 @@
+"""
+カテゴリ一括並び替え（/api/store/menu-categories/order）のテスト
+"""
+
+from models import MenuCategory
+from services.catalog_cache import catalog_cache
+from tests.conftest import count_queries
+
+
+def _add_categories(db_session, store, count):
+    categories = [
+        MenuCategory(name=f"カテゴリ{i:02d}", store_id=store.id, display_order=i)
+        for i in range(count)
+    ]
+    db_session.add_all(categories)
+    db_session.commit()
+    return [category.id for category in categories]
+
+
+def _reorder(client, headers, category_ids):
+    return client.put(
+        "/api/store/menu-categories/order",
+        json={"category_ids": category_ids},
+        headers=headers,
+    )
+
+
+class TestMenuCategoryOrder:
+    """カテゴリ並び替えのテスト"""
+
+    def test_applies_list_order(self, client, db_session, store_a, auth_headers_store):
+        """リストの順に display_order を振り直す"""
+        ids = _add_categories(db_session, store_a, 3)
+
+        response = _reorder(client, auth_headers_store, [ids[2], ids[0], ids[1]])
+
+        assert response.status_code == 200
+        assert response.json()["updated_count"] == 3
+        listed = client.get("/api/store/menu-categories", headers=auth_headers_store)
+        assert [c["id"] for c in listed.json()["categories"]] == [ids[2], ids[0], ids[1]]
+
+    def test_other_store_categories_are_not_updated(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """他店舗・存在しないカテゴリは更新せず failed_ids で返す"""
+        own_ids = _add_categories(db_session, store_a, 2)
+        other = MenuCategory(name="他店", store_id=store_b.id, display_order=5)
+        db_session.add(other)
+        db_session.commit()
+
+        response = _reorder(client, auth_headers_store, [other.id, *own_ids, 99999])
+
+        assert response.json()["failed_ids"] == [other.id, 99999]
+        db_session.expire_all()
+        assert db_session.get(MenuCategory, other.id).display_order == 5
+        assert db_session.get(MenuCategory, own_ids[0]).display_order == 1
+
+    def test_single_update_statement(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """カテゴリ数に関わらずUPDATEは1回"""
+        ids = _add_categories(db_session, store_a, 50)
+
+        with count_queries(db_session) as statements:
+            _reorder(client, auth_headers_store, list(reversed(ids)))
+
+        assert sum(sql.startswith("UPDATE menu_categories") for sql in statements) == 1
+
+    def test_refreshes_catalog_snapshot(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """並び替え後のカタログスナップショットに反映される"""
+        ids = _add_categories(db_session, store_a, 2)
+        catalog_cache.get_catalog(db_session, store_a.id)
+
+        _reorder(client, auth_headers_store, [ids[1], ids[0]])
+
+        catalog = catalog_cache.get_catalog(db_session, store_a.id)
+        assert [c.id for c in catalog.active_categories] == [ids[1], ids[0]]
+
+    def test_rejects_duplicate_ids(self, client, auth_headers_store):
+        """重複したIDは422"""
+        response = _reorder(client, auth_headers_store, [1, 1])
+        assert response.status_code == 422
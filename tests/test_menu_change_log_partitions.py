@@ -0,0 +1,153 @@
+"""
+メニュー変更履歴のアーカイブ・キーセットページネーションのテスト
+"""
+
+import gzip
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models import MenuChangeLog
+from services import change_log_partitions
+from services.change_log_partitions import archive_old_months
+from tests.conftest import engine
+
+
+def _add_logs(db_session, menu, count, start=datetime(2026, 10, 1, 12, 0, 0, 123456)):
+    """1分おきの変更履歴を作成（同じ日時の行も含める）"""
+    logs = []
+    for i in range(count):
+        logs.append(
+            MenuChangeLog(
+                menu_id=menu.id,
+                store_id=menu.store_id,
+                action="update",
+                changes={"price": {"old": str(i), "new": str(i + 1)}},
+                changed_at=start + timedelta(minutes=i // 2),
+            )
+        )
+    db_session.add_all(logs)
+    db_session.commit()
+    return logs
+
+
+class TestArchiveOldMonths:
+    """保持期間を過ぎた監査ログのアーカイブのテスト"""
+
+    def test_exports_and_deletes_old_months(self, db_session, test_menu, tmp_path):
+        old_ids = [
+            log.id
+            for log in _add_logs(
+                db_session, test_menu, 3, start=datetime(2024, 5, 10, 9, 0, 0)
+            )
+        ]
+        _add_logs(db_session, test_menu, 2, start=datetime(2024, 6, 2, 9, 0, 0))
+        _add_logs(db_session, test_menu, 2, start=datetime(2026, 10, 1, 9, 0, 0))
+
+        archived = archive_old_months(
+            engine, tmp_path, retention_months=12, today=date(2026, 10, 19), batch_size=2
+        )
+
+        assert [(a.month, a.rows) for a in archived] == [
+            (date(2024, 5, 1), 3),
+            (date(2024, 6, 1), 2),
+        ]
+        with gzip.open(archived[0].path, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [r["id"] for r in records] == old_ids
+        assert records[0]["changes"] == {"price": {"old": "0", "new": "1"}}
+
+        db_session.expire_all()
+        assert db_session.query(MenuChangeLog).count() == 2
+
+    def test_each_month_is_committed_separately(
+        self, db_session, test_menu, tmp_path, monkeypatch
+    ):
+        """書き出しに失敗した月は残し、それより前の月のアーカイブは確定している"""
+        _add_logs(db_session, test_menu, 3, start=datetime(2024, 5, 10, 9, 0, 0))
+        _add_logs(db_session, test_menu, 2, start=datetime(2024, 6, 2, 9, 0, 0))
+        write_archive = change_log_partitions._write_archive
+
+        def fail_in_june(output_dir, month, rows, table):
+            if month == date(2024, 6, 1):
+                raise OSError("disk full")
+            return write_archive(output_dir, month, rows, table)
+
+        monkeypatch.setattr(change_log_partitions, "_write_archive", fail_in_june)
+
+        with pytest.raises(OSError):
+            archive_old_months(
+                engine, tmp_path, retention_months=12, today=date(2026, 10, 19)
+            )
+
+        db_session.expire_all()
+        assert db_session.query(MenuChangeLog).count() == 2
+        assert [p.name for p in tmp_path.iterdir()] == [
+            "menu_change_logs_2024-05.jsonl.gz"
+        ]
+
+    def test_dry_run_keeps_rows(self, db_session, test_menu, tmp_path):
+        _add_logs(db_session, test_menu, 2, start=datetime(2024, 5, 10, 9, 0, 0))
+
+        archived = archive_old_months(
+            engine, tmp_path, retention_months=12, today=date(2026, 10, 19), dry_run=True
+        )
+
+        assert [(a.month, a.rows, a.path) for a in archived] == [(date(2024, 5, 1), 2, None)]
+        assert list(tmp_path.iterdir()) == []
+        assert db_session.query(MenuChangeLog).count() == 2
+
+
+class TestChangeLogKeysetPagination:
+    """変更履歴一覧のキーセットページネーションのテスト"""
+
+    @pytest.mark.parametrize(
+        "path",
+        ["/api/store/change-logs", "/api/store/menus/{menu_id}/change-logs"],
+    )
+    def test_pages_cover_all_logs_once(
+        self, client, db_session, test_menu, auth_headers_store, path
+    ):
+        logs = _add_logs(db_session, test_menu, 7)
+        url = path.format(menu_id=test_menu.id)
+
+        response = client.get(url, params={"per_page": 3}, headers=auth_headers_store)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 7
+        seen = [log["id"] for log in data["logs"]]
+
+        while data["next_cursor"]:
+            response = client.get(
+                url,
+                params={"per_page": 3, "cursor": data["next_cursor"]},
+                headers=auth_headers_store,
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] is None
+            seen.extend(log["id"] for log in data["logs"])
+
+        expected = sorted(logs, key=lambda log: (log.changed_at, log.id), reverse=True)
+        assert seen == [log.id for log in expected]
+
+    def test_last_page_has_no_cursor(self, client, db_session, test_menu, auth_headers_store):
+        _add_logs(db_session, test_menu, 3)
+
+        response = client.get(
+            "/api/store/change-logs", params={"per_page": 3}, headers=auth_headers_store
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()["logs"]) == 3
+        assert response.json()["next_cursor"] is None
+
+    def test_invalid_cursor(self, client, auth_headers_store):
+        response = client.get(
+            "/api/store/change-logs",
+            params={"cursor": "not-a-cursor"},
+            headers=auth_headers_store,
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,128 @@
+"""
+メニューのn-gram全文検索（services.menu_search）のテスト
+"""
+
+import pytest
+
+from models import Menu
+from services.menu_search import normalize_text, text_ngrams
+
+
+@pytest.fixture
+def search_menus_a(db_session, store_a, store_b):
+    """検索用のメニュー（店舗Bにも同名のメニューを用意）"""
+    menus = [
+        Menu(name="鮭弁当", description="新鮮な鮭を使用した定番のお弁当", price=850),
+        Menu(name="チキン南蛮弁当", description="特製タルタルソース", price=900),
+        Menu(name="照り焼き丼", description="甘辛いチキンの照り焼き", price=880),
+        Menu(name="野菜カレー", description="たっぷりの野菜", price=800),
+        Menu(name="ＢＩＧエビフライ", description=None, price=950),
+    ]
+    for menu in menus:
+        menu.store_id = store_a.id
+    db_session.add_all(menus)
+    db_session.add(Menu(name="チキンカツ弁当", price=700, store_id=store_b.id))
+    db_session.commit()
+    return menus
+
+
+def _store_search(client, headers, keyword, **params):
+    response = client.get(
+        "/api/store/menus", params={"keyword": keyword, **params}, headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestNgrams:
+    """正規化とn-gram分割のテスト"""
+
+    def test_normalize_width_case_and_kana(self):
+        """全角英数・大文字・カタカナを統一する"""
+        assert normalize_text("ＢＩＧエビ") == "bigえび"
+        assert normalize_text("ｴﾋﾞ") == normalize_text("えび")
+
+    def test_bigrams_per_word(self):
+        """単語ごとにbigramと末尾の1文字に分割する"""
+        assert text_ngrams("鮭弁当・特盛") == ["鮭弁", "弁当", "当", "特盛", "盛"]
+
+
+class TestStoreMenuSearch:
+    """店舗向けメニュー一覧の検索のテスト"""
+
+    def test_matches_name_and_description(
+        self, client, auth_headers_store, search_menus_a
+    ):
+        """名前または説明文に含むメニューを返し、名前の一致を優先する"""
+        data = _store_search(client, auth_headers_store, "チキン")
+
+        names = [menu["name"] for menu in data["menus"]]
+        assert data["total"] == 2
+        assert names == ["チキン南蛮弁当", "照り焼き丼"]
+
+    def test_scoped_to_own_store(self, client, auth_headers_store, search_menus_a):
+        """他店舗のメニューは検索されない"""
+        data = _store_search(client, auth_headers_store, "弁当")
+
+        assert sorted(menu["name"] for menu in data["menus"]) == ["チキン南蛮弁当", "鮭弁当"]
+
+    def test_kana_and_width_insensitive(
+        self, client, auth_headers_store, search_menus_a
+    ):
+        """ひらがな・半角カナ・半角英字でも検索できる"""
+        assert _store_search(client, auth_headers_store, "えび")["total"] == 1
+        assert _store_search(client, auth_headers_store, "ｴﾋﾞ")["total"] == 1
+        assert _store_search(client, auth_headers_store, "big")["total"] == 1
+
+    def test_single_character_and_multiple_words(
+        self, client, auth_headers_store, search_menus_a
+    ):
+        """1文字の検索語や、空白区切りの複数語（AND）で検索できる"""
+        assert _store_search(client, auth_headers_store, "鮭")["total"] == 1
+        data = _store_search(client, auth_headers_store, "弁当 南蛮")
+        assert [menu["name"] for menu in data["menus"]] == ["チキン南蛮弁当"]
+
+    def test_non_contiguous_bigrams_do_not_match(
+        self, client, auth_headers_store, search_menus_a
+    ):
+        """bigramが連続していない場合は一致しない"""
+        assert _store_search(client, auth_headers_store, "鮭当")["total"] == 0
+
+    def test_index_follows_updates_and_deletes(
+        self, client, db_session, auth_headers_store, search_menus_a
+    ):
+        """メニューの更新・削除が検索結果に反映される"""
+        salmon, chicken = search_menus_a[0], search_menus_a[1]
+        salmon.name = "焼き鮭御膳"
+        db_session.delete(chicken)
+        db_session.commit()
+
+        assert _store_search(client, auth_headers_store, "御膳")["total"] == 1
+        assert _store_search(client, auth_headers_store, "南蛮")["total"] == 0
+
+    def test_explicit_sort_overrides_relevance(
+        self, client, auth_headers_store, search_menus_a
+    ):
+        """sort_by を指定した場合はその順序で返す"""
+        data = _store_search(
+            client, auth_headers_store, "チキン", sort_by="price", sort_order="asc"
+        )
+
+        assert [menu["price"] for menu in data["menus"]] == [880, 900]
+
+
+class TestCustomerMenuSearch:
+    """お客様向けメニュー一覧の検索のテスト"""
+
+    def test_search_uses_index(self, client, auth_headers_customer_a, search_menus_a):
+        """説明文も検索対象となり、関連度順に返す"""
+        response = client.get(
+            "/api/customer/menus",
+            params={"search": "ちきん"},
+            headers=auth_headers_customer_a,
+        )
+
+        assert response.status_code == 200
+        names = [menu["name"] for menu in response.json()["menus"]]
+        assert names[-1] == "照り焼き丼"
+        assert set(names) == {"チキン南蛮弁当", "チキンカツ弁当", "照り焼き丼"}
@@ -0,0 +1,150 @@
+"""
+メニュー一括インポート（/api/store/menus/import）のテスト
+"""
+
+import json
+
+from models import Menu, MenuCategory, MenuChangeLog
+from tests.conftest import count_queries
+
+CSV_HEADER = "external_id,name,price,description,is_available,category_id\n"
+
+
+def _import(client, headers, content, filename="menus.csv", **params):
+    content_type = "text/csv" if filename.endswith(".csv") else "application/json"
+    return client.post(
+        "/api/store/menus/import",
+        params=params,
+        files={"file": (filename, content.encode("utf-8"), content_type)},
+        headers=headers,
+    )
+
+
+def _menus_by_key(db_session, store):
+    db_session.expire_all()
+    return {
+        menu.external_id: menu
+        for menu in db_session.query(Menu).filter(Menu.store_id == store.id)
+        if menu.external_id
+    }
+
+
+class TestMenuImport:
+    """メニュー一括インポートのテスト"""
+
+    def test_csv_creates_menus(self, client, db_session, store_a, auth_headers_store):
+        """CSVからメニューを作成し、監査ログと検索インデックスに反映する"""
+        content = CSV_HEADER + (
+            "B-001,唐揚げ弁当,600,ジューシーな唐揚げ,true,\n"
+            "B-002,のり弁当,450,,false,\n"
+        )
+
+        response = _import(client, auth_headers_store, content)
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "created_count": 2,
+            "updated_count": 0,
+            "unchanged_count": 0,
+            "error_count": 0,
+            "errors": [],
+        }
+        menus = _menus_by_key(db_session, store_a)
+        assert menus["B-001"].price == 600
+        assert menus["B-002"].is_available is False
+        assert menus["B-002"].description is None
+        assert db_session.query(MenuChangeLog).filter_by(action="create").count() == 2
+
+        search = client.get(
+            "/api/store/menus", params={"keyword": "のり"}, headers=auth_headers_store
+        )
+        assert [m["name"] for m in search.json()["menus"]] == ["のり弁当"]
+
+    def test_json_upserts_by_external_id(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """同じ external_id のメニューは更新し、変更のない行は書き込まない"""
+        rows = [
+            {"external_id": "B-001", "name": "唐揚げ弁当", "price": 600},
+            {"external_id": "B-002", "name": "のり弁当", "price": 450},
+        ]
+        _import(client, auth_headers_store, json.dumps(rows), "menus.json")
+
+        rows[0]["price"] = 650
+        response = _import(client, auth_headers_store, json.dumps(rows), "menus.json")
+
+        data = response.json()
+        assert (data["created_count"], data["updated_count"], data["unchanged_count"]) == (
+            0,
+            1,
+            1,
+        )
+        menus = _menus_by_key(db_session, store_a)
+        assert len(menus) == 2
+        assert menus["B-001"].price == 650
+        update_log = db_session.query(MenuChangeLog).filter_by(action="update").one()
+        assert update_log.menu_id == menus["B-001"].id
+        assert update_log.changes == {"price": {"old": "600", "new": "650"}}
+
+    def test_invalid_rows_abort_import(
+        self, client, db_session, store_a, store_b, auth_headers_store
+    ):
+        """エラーのある行があれば何も登録せず、行ごとのエラーを返す"""
+        other_category = MenuCategory(name="他店", store_id=store_b.id)
+        db_session.add(other_category)
+        db_session.commit()
+        content = CSV_HEADER + (
+            "B-001,唐揚げ弁当,600,,,\n"
+            "B-002,のり弁当,-1,,,\n"
+            "B-001,重複,500,,,\n"
+            f"B-003,他店カテゴリ,500,,,{other_category.id}\n"
+        )
+
+        response = _import(client, auth_headers_store, content)
+
+        assert response.status_code == 422
+        errors = response.json()["detail"]["errors"]
+        assert [(e["row"], e["external_id"]) for e in errors] == [
+            (2, "B-002"),
+            (3, "B-001"),
+            (4, "B-003"),
+        ]
+        assert errors[0]["errors"][0].startswith("price:")
+        assert _menus_by_key(db_session, store_a) == {}
+
+    def test_skip_invalid_imports_remaining_rows(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """skip_invalid=true の場合はエラーのない行を登録する"""
+        content = CSV_HEADER + "B-001,唐揚げ弁当,600,,,\nB-002,,450,,,\n"
+
+        response = _import(client, auth_headers_store, content, skip_invalid=True)
+
+        data = response.json()
+        assert data["created_count"] == 1
+        assert data["error_count"] == 1
+        assert list(_menus_by_key(db_session, store_a)) == ["B-001"]
+
+    def test_statement_count_per_chunk(
+        self, client, db_session, store_a, auth_headers_store
+    ):
+        """300行でもメニュー数に比例してクエリが増えない"""
+        content = CSV_HEADER + "".join(
+            f"B-{i:03d},弁当{i:03d},500,,,\n" for i in range(300)
+        )
+
+        with count_queries(db_session) as statements:
+            response = _import(client, auth_headers_store, content)
+
+        assert response.json()["created_count"] == 300
+        assert sum(sql.startswith("INSERT INTO menus ") for sql in statements) == 2
+        assert len(statements) < 30
+
+    def test_rejects_unknown_format(self, client, auth_headers_store):
+        """CSV・JSON以外は400"""
+        response = client.post(
+            "/api/store/menus/import",
+            files={"file": ("menus.txt", b"hello", "text/plain")},
+            headers=auth_headers_store,
+        )
+        assert response.status_code == 400
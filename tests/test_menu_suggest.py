@@ -0,0 +1,113 @@
+"""
+メニュー名の入力候補（/api/public/stores/{id}/menus/suggest）のテスト
+"""
+
+import pytest
+
+from models import Menu
+from services.menu_suggest import MenuPrefixIndex
+from tests.conftest import count_queries
+
+
+@pytest.fixture
+def suggest_menus_a(db_session, store_a):
+    """入力候補用のメニュー"""
+    menus = [
+        Menu(name="唐揚げ弁当", price=600),
+        Menu(name="特製唐揚げ弁当", price=750),
+        Menu(name="チキン南蛮弁当", price=900),
+        Menu(name="ちくわ天丼", price=650),
+        Menu(name="ＢＩＧ エビフライ", price=950),
+        Menu(name="唐揚げ丼", price=700, is_available=False),
+    ]
+    for menu in menus:
+        menu.store_id = store_a.id
+    db_session.add_all(menus)
+    db_session.commit()
+    return menus
+
+
+def _suggest(client, store_id, prefix, **params):
+    response = client.get(
+        f"/api/public/stores/{store_id}/menus/suggest",
+        params={"prefix": prefix, **params},
+    )
+    assert response.status_code == 200
+    return [menu["name"] for menu in response.json()]
+
+
+class TestMenuPrefixIndex:
+    """前方一致インデックスのテスト"""
+
+    def test_full_name_prefix_ranks_before_word_prefix(self):
+        """名前の先頭からの一致を、単語の先頭からの一致より優先する"""
+        index = MenuPrefixIndex(
+            [
+                Menu(id=1, name="特製 唐揚げ弁当"),
+                Menu(id=2, name="唐揚げ弁当"),
+                Menu(id=3, name="唐揚げ"),
+            ]
+        )
+
+        assert [m.id for m in index.suggest("唐揚")] == [3, 2, 1]
+        assert [m.id for m in index.suggest("唐揚", limit=1)] == [3]
+        assert index.suggest("   ") == []
+
+
+class TestMenuSuggestEndpoint:
+    """入力候補APIのテスト"""
+
+    def test_kana_and_width_insensitive(self, client, store_a, suggest_menus_a):
+        """カタカナ・ひらがな、全角・半角を区別しない"""
+        assert _suggest(client, store_a.id, "ちき") == ["チキン南蛮弁当"]
+        assert _suggest(client, store_a.id, "ﾁｸ") == ["ちくわ天丼"]
+        assert _suggest(client, store_a.id, "big") == ["ＢＩＧ エビフライ"]
+        assert _suggest(client, store_a.id, "えび") == ["ＢＩＧ エビフライ"]
+
+    def test_available_only_by_default(self, client, store_a, suggest_menus_a):
+        """デフォルトでは販売中のメニューのみを返す"""
+        assert _suggest(client, store_a.id, "唐揚") == ["唐揚げ弁当"]
+        assert _suggest(client, store_a.id, "唐揚", is_available=False) == [
+            "唐揚げ丼",
+            "唐揚げ弁当",
+        ]
+
+    def test_warm_request_does_not_query(
+        self, client, db_session, store_a, suggest_menus_a
+    ):
+        """2回目以降はDBに問い合わせない"""
+        url = f"/api/public/stores/{store_a.id}/menus/suggest"
+        client.get(url, params={"prefix": "唐"})
+
+        with count_queries(db_session) as statements:
+            response = client.get(url, params={"prefix": "ち"})
+
+        assert response.status_code == 200
+        assert statements == []
+
+    def test_follows_committed_changes(
+        self, client, db_session, store_a, suggest_menus_a
+    ):
+        """メニューの追加・名前変更・削除がコミット後に反映される"""
+        assert _suggest(client, store_a.id, "唐揚") == ["唐揚げ弁当"]
+
+        suggest_menus_a[0].name = "ザンギ弁当"
+        db_session.delete(suggest_menus_a[2])
+        db_session.add(Menu(name="唐揚げ定食", price=800, store_id=store_a.id))
+        db_session.commit()
+
+        assert _suggest(client, store_a.id, "唐揚") == ["唐揚げ定食"]
+        assert _suggest(client, store_a.id, "ざんぎ") == ["ザンギ弁当"]
+        assert _suggest(client, store_a.id, "ちき") == []
+
+    def test_unknown_store(self, client):
+        """存在しない店舗は404"""
+        response = client.get(
+            "/api/public/stores/99999/menus/suggest", params={"prefix": "唐"}
+        )
+        assert response.status_code == 404
+
+    def test_prefix_required(self, client, store_a):
+        """prefix は必須"""
+        response = client.get(f"/api/public/stores/{store_a.id}/menus/suggest")
+        assert response.status_code == 422
@@ -0,0 +1,178 @@
+"""
+注文のコールドストレージ・アーカイブ（services.order_archive）のテスト
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+import services.order_archive as order_archive
+from models import Menu, Order
+from services.order_archive import (
+    archive_cutoff,
+    archive_orders,
+    archive_path,
+    archived_until,
+    summarize_archived_sales,
+)
+from tests.conftest import engine
+
+REPORT_URL = "/api/store/reports/sales?start_date=2025-03-01&end_date=2025-04-30"
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """アーカイブの出力先をテスト用のディレクトリに切り替える"""
+    monkeypatch.setattr(order_archive, "ORDER_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(order_archive, "ORDER_ARCHIVE_TIMEZONE", "Asia/Tokyo")
+    return tmp_path
+
+
+@pytest.fixture
+def old_orders(db_session, customer_user_a, test_menu, store_a, store_b):
+    """2店舗の2025年3月（アーカイブ対象）と4月（オンライン）の注文"""
+    menu_b = Menu(name="店舗B弁当", price=800, store_id=store_b.id)
+    db_session.add(menu_b)
+    db_session.flush()
+
+    specs = [
+        (test_menu, datetime(2025, 3, 3, 11, 0), 2, "completed"),
+        (test_menu, datetime(2025, 3, 3, 12, 30), 1, "cancelled"),
+        (test_menu, datetime(2025, 3, 31, 23, 59, 59), 3, "completed"),
+        (menu_b, datetime(2025, 3, 15, 12, 0), 1, "completed"),
+        (test_menu, datetime(2025, 4, 1, 0, 0), 1, "pending"),
+        (menu_b, datetime(2025, 4, 20, 18, 0), 2, "ready"),
+    ]
+    orders = []
+    for menu, ordered_at, quantity, status in specs:
+        order = Order(
+            user_id=customer_user_a.id,
+            menu_id=menu.id,
+            store_id=menu.store_id,
+            quantity=quantity,
+            total_price=menu.price * quantity,
+            status=status,
+            ordered_at=ordered_at,
+        )
+        db_session.add(order)
+        orders.append(order)
+    db_session.commit()
+    return orders
+
+
+class TestArchiveCutoff:
+    """アーカイブ対象の月のテスト"""
+
+    def test_keeps_retention_months_online(self):
+        assert archive_cutoff(date(2026, 10, 19), 12) == date(2025, 10, 1)
+        assert archive_cutoff(date(2026, 1, 1), 1) == date(2025, 12, 1)
+
+    def test_archived_until_without_watermark(self, archive_dir):
+        assert archived_until() is None
+        (archive_dir / "_archived_until").write_text("broken")
+        assert archived_until() is None
+
+    def test_dry_run_counts_without_writing(self, db_session, old_orders, archive_dir):
+        result = archive_orders(
+            bind=engine, retention_months=2, today=date(2025, 6, 10), dry_run=True
+        )
+
+        assert result["cutoff"] == date(2025, 4, 1)
+        assert sorted((f.store_id, f.month, f.rows) for f in result["files"]) == sorted(
+            [
+                (old_orders[0].store_id, date(2025, 3, 1), 3),
+                (old_orders[3].store_id, date(2025, 3, 1), 1),
+            ]
+        )
+        assert result["deleted"] == 0
+        assert archived_until() is None
+        assert db_session.query(Order).count() == 6
+
+
+class TestParquetArchive:
+    """Parquetファイルへの書き出しと売上レポートのテスト"""
+
+    def test_archives_old_months_and_deletes_rows(self, db_session, old_orders, archive_dir):
+        store_a_id = old_orders[0].store_id
+        result = archive_orders(
+            bind=engine, retention_months=2, batch_size=2, today=date(2025, 6, 10)
+        )
+
+        assert result["deleted"] == 4
+        assert archived_until() == date(2025, 4, 1)
+        path = archive_path(archive_dir, store_a_id, date(2025, 3, 1))
+        assert path.exists()
+        assert not list(archive_dir.rglob("*.tmp"))
+
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        assert table.num_rows == 3
+        assert table.column("menu_name").to_pylist() == ["テスト弁当"] * 3
+        # 日本時間の 2025-03-31 23:59:59 をUTCで保存
+        assert table.column("ordered_at").to_pylist()[-1] == datetime(2025, 3, 31, 14, 59, 59)
+
+        db_session.expire_all()
+        remaining = {order.ordered_at.month for order in db_session.query(Order)}
+        assert remaining == {4}
+
+    def test_rerun_is_idempotent(self, db_session, old_orders, archive_dir):
+        archive_orders(bind=engine, retention_months=2, today=date(2025, 6, 10))
+        result = archive_orders(bind=engine, retention_months=2, today=date(2025, 6, 10))
+
+        assert result["files"] == []
+        assert result["deleted"] == 0
+
+    def test_summary_per_store(self, db_session, old_orders, archive_dir):
+        store_a_id = old_orders[0].store_id
+        menu_id = old_orders[0].menu_id
+        archive_orders(bind=engine, retention_months=2, today=date(2025, 6, 10))
+
+        summary = summarize_archived_sales(
+            store_a_id, datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59)
+        )
+
+        # キャンセルを除く
+        assert summary.total_orders == 2
+        assert summary.menus[menu_id]["total_quantity"] == 5
+        assert set(summary.daily) == {date(2025, 3, 3), date(2025, 3, 31)}
+
+    def test_days_are_bucketed_in_archive_timezone(
+        self, db_session, old_orders, archive_dir, test_menu
+    ):
+        """UTCでは前日になる早朝の注文もアーカイブのタイムゾーンの日付で集計される"""
+        db_session.add(
+            Order(
+                user_id=old_orders[0].user_id,
+                menu_id=test_menu.id,
+                store_id=test_menu.store_id,
+                quantity=1,
+                total_price=test_menu.price,
+                status="completed",
+                # 日本時間 3/10 07:00 = UTC 3/9 22:00
+                ordered_at=datetime(2025, 3, 10, 7, 0),
+            )
+        )
+        db_session.commit()
+        archive_orders(bind=engine, retention_months=2, today=date(2025, 6, 10))
+
+        summary = summarize_archived_sales(
+            test_menu.store_id, datetime(2025, 3, 10), datetime(2025, 3, 10, 23, 59, 59)
+        )
+
+        assert set(summary.daily) == {date(2025, 3, 10)}
+        assert summary.total_orders == 1
+
+    def test_sales_report_reads_archived_months(
+        self, client, db_session, old_orders, archive_dir, auth_headers_store
+    ):
+        before = client.get(REPORT_URL, headers=auth_headers_store)
+        assert before.status_code == 200
+
+        archive_orders(bind=engine, retention_months=2, today=date(2025, 6, 10))
+        assert db_session.query(Order).count() == 2
+
+        after = client.get(REPORT_URL, headers=auth_headers_store)
+        assert after.status_code == 200
+        assert after.json() == before.json()
+        assert after.json()["total_orders"] == 5
@@ -0,0 +1,106 @@
+"""
+注文テーブルのインデックス構成のテスト
+"""
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from models import Order
+from tests.conftest import engine
+
+
+def _postgresql_ddl(name: str) -> str:
+    index = next(index for index in Order.__table__.indexes if index.name == name)
+    return str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+
+def _query_plan(sql: str, params: dict) -> str:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " ".join(row[-1] for row in rows)
+
+
+class TestOrderIndexDefinitions:
+    """モデルで宣言したインデックスのテスト"""
+
+    def test_redundant_indexes_removed(self, db_session):
+        names = {index["name"] for index in inspect(engine).get_indexes("orders")}
+        assert {
+            "ix_orders_store_ordered",
+            "ix_orders_ordered_at",
+            "ix_orders_user_ordered",
+            "ix_orders_store_ordered_active",
+        } <= names
+        assert not names & {
+            "ix_orders_id",
+            "ix_orders_store_id",
+            "ix_orders_status",
+            "ix_orders_store_status",
+            "ix_orders_store_ordered_status",
+        }
+
+    def test_ordered_at_uses_brin_on_postgresql(self):
+        ddl = _postgresql_ddl("ix_orders_ordered_at")
+        assert "USING brin (ordered_at)" in ddl
+
+    def test_user_history_index_covers_my_orders_columns(self):
+        ddl = _postgresql_ddl("ix_orders_user_ordered")
+        assert "(user_id, ordered_at DESC)" in ddl
+        assert (
+            "INCLUDE (id, menu_id, quantity, total_price, status, delivery_time, "
+            "updated_at)"
+        ) in ddl
+
+    def test_revenue_index_excludes_cancelled_orders(self):
+        ddl = _postgresql_ddl("ix_orders_store_ordered_active")
+        assert "(store_id, ordered_at)" in ddl
+        assert "INCLUDE (menu_id, quantity, total_price)" in ddl
+        assert ddl.endswith("WHERE status <> 'cancelled'")
+
+
+class TestOrderIndexUsage:
+    """ホットクエリが想定したインデックスを使うことのテスト"""
+
+    def test_order_history_uses_user_index_without_sort(self, db_session):
+        plan = _query_plan(
+            "SELECT id, ordered_at FROM orders WHERE user_id = :user_id "
+            "ORDER BY ordered_at DESC LIMIT 20",
+            {"user_id": 1},
+        )
+        assert "ix_orders_user_ordered" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_sales_report_uses_partial_index(
+        self, client, db_session, auth_headers_manager_store_a, orders_for_customer_a
+    ):
+        """店舗の売上レポートの実際のクエリで、キャンセルを除く部分インデックスが選ばれる"""
+        executed = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            executed.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get(
+                "/api/store/reports/sales",
+                params={"start_date": "2026-10-01", "end_date": "2026-10-03"},
+                headers=auth_headers_manager_store_a,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+
+        revenue_queries = [
+            (sql, params)
+            for sql, params in executed
+            if "orders.store_id = ?" in sql and "orders.status != ?" in sql
+        ]
+        assert revenue_queries
+        with engine.connect() as conn:
+            for sql, params in revenue_queries:
+                plan = " ".join(
+                    row[-1]
+                    for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+                )
+                assert "ix_orders_store_ordered_active" in plan, (sql, plan)
@@ -0,0 +1,107 @@
+"""
+注文テーブルの月パーティション（services.partitions）のテスト
+"""
+
+import re
+from datetime import date
+
+import pytest
+
+from models import MenuChangeLog, Order
+from services.partitions import (
+    add_months,
+    create_partition_sql,
+    default_partition_name,
+    ensure_all_partitions,
+    ensure_partitions,
+    move_default_rows_sql,
+    partition_key,
+    partition_month,
+    partition_name,
+    partitioned_tables,
+)
+from tests.conftest import count_queries, engine
+
+
+class TestPartitionHelpers:
+    """月パーティションの補助関数のテスト"""
+
+    def test_add_months_across_years(self):
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_partition_name_round_trip(self):
+        name = partition_name("orders", date(2026, 3, 1))
+        assert name == "orders_y2026m03"
+        assert partition_month("orders", name) == date(2026, 3, 1)
+        assert partition_month("orders", default_partition_name("orders")) is None
+        assert partition_month("orders", "menu_change_logs_y2026m03") is None
+
+    def test_create_partition_sql_covers_one_month(self):
+        sql = create_partition_sql("orders", date(2026, 12, 1))
+        assert sql.startswith("CREATE TABLE IF NOT EXISTS orders_y2026m12 ")
+        assert "PARTITION OF orders " in sql
+        assert "FROM ('2026-12-01') TO ('2027-01-01')" in sql
+
+    def test_create_partition_sql_for_new_parent(self):
+        sql = create_partition_sql("orders", date(2026, 12, 1), parent="orders_new")
+        assert "orders_y2026m12 PARTITION OF orders_new " in sql
+
+    def test_move_default_rows_reattaches_default(self):
+        statements = move_default_rows_sql("orders", "ordered_at", date(2026, 12, 1))
+        assert statements[0] == "ALTER TABLE orders DETACH PARTITION orders_default"
+        assert statements[1] == create_partition_sql("orders", date(2026, 12, 1))
+        in_month = "ordered_at >= '2026-12-01' AND ordered_at < '2027-01-01'"
+        assert statements[2] == (
+            f"INSERT INTO orders SELECT * FROM orders_default WHERE {in_month}"
+        )
+        assert statements[3] == f"DELETE FROM orders_default WHERE {in_month}"
+        assert statements[4] == "ALTER TABLE orders ATTACH PARTITION orders_default DEFAULT"
+
+
+class TestDeclarativePartitions:
+    """モデルで宣言したパーティションのテスト"""
+
+    def test_models_declare_partition_keys(self):
+        assert partition_key(Order.__table__) == "ordered_at"
+        assert partition_key(MenuChangeLog.__table__) == "changed_at"
+        assert {table.name for table in partitioned_tables()} == {
+            "orders",
+            "menu_change_logs",
+        }
+
+    def test_partition_key_is_not_nullable(self):
+        for table in partitioned_tables():
+            assert not table.c[partition_key(table)].nullable
+
+    def test_ensure_is_noop_without_partitioning(self):
+        assert ensure_all_partitions() == []
+        with engine.begin() as conn:
+            assert ensure_partitions(conn, "orders") == []
+
+
+class TestPartitionPruning:
+    """レポート系のクエリがパーティションを絞り込める条件を持つことのテスト"""
+
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "/api/store/dashboard",
+            "/api/store/dashboard/weekly-sales",
+            "/api/store/reports/sales?start_date=2026-10-01&end_date=2026-10-03",
+        ],
+    )
+    def test_order_queries_are_bounded_by_ordered_at(
+        self, client, db_session, auth_headers_store, orders_for_customer_a, path
+    ):
+        with count_queries(db_session) as statements:
+            response = client.get(path, headers=auth_headers_store)
+
+        assert response.status_code == 200
+        order_queries = [
+            sql for sql in statements if re.search(r"\bFROM orders\b|\bJOIN orders\b", sql)
+        ]
+        assert order_queries
+        for sql in order_queries:
+            assert "orders.ordered_at >=" in sql, sql
+            assert "orders.ordered_at <=" in sql, sql
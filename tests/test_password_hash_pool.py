@@ -0,0 +1,139 @@
+"""
+パスワード処理専用ワーカープールのテスト
+"""
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import event
+
+import auth
+from auth import PasswordHashPool, PasswordHasherBusyError, verify_password
+from models import User
+from tests.conftest import engine
+
+
+class TestPasswordHashPool:
+    """PasswordHashPool のテスト"""
+
+    def test_runs_function_in_pool(self):
+        """関数がプールのスレッドで実行される"""
+        pool = PasswordHashPool(max_workers=2, max_queue=10)
+
+        thread_name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+
+        assert thread_name.startswith("password-hash")
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    def test_rejects_when_queue_is_full(self):
+        """待ち行列が上限に達すると PasswordHasherBusyError を送出する"""
+        pool = PasswordHashPool(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            blocking = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(PasswordHasherBusyError):
+                await pool.run(lambda: None)
+            release.set()
+            await blocking
+
+        asyncio.run(scenario())
+
+        assert pool.stats()["rejected"] == 1
+        pool.shutdown()
+
+
+class TestLoginRehash:
+    """ログイン時の再ハッシュのテスト"""
+
+    def test_login_rehashes_outdated_cost(self, client, db_session, monkeypatch):
+        """bcryptのコスト設定が変わるとログイン時に再ハッシュされる"""
+        old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+        user = User(
+            username="rehash_user",
+            email="rehash@test.com",
+            full_name="再ハッシュ",
+            hashed_password=old_context.hash("password123"),
+            role="customer",
+            is_active=True,
+        )
+        db_session.add(user)
+        db_session.commit()
+
+        monkeypatch.setattr(
+            auth,
+            "pwd_context",
+            CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5),
+        )
+
+        response = client.post(
+            "/api/auth/login",
+            json={"username": "rehash_user", "password": "password123"},
+        )
+
+        assert response.status_code == 200
+        db_session.refresh(user)
+        assert user.hashed_password.startswith("$2b$05$")
+        assert verify_password("password123", user.hashed_password)
+
+    def test_login_rejects_wrong_password(self, client, customer_user_a):
+        """パスワードが一致しない場合は401"""
+        response = client.post(
+            "/api/auth/login",
+            json={"username": customer_user_a.username, "password": "wrong"},
+        )
+
+        assert response.status_code == 401
+
+    def test_metrics_endpoint_reports_pool(self, client):
+        """メトリクスにプールの状態が含まれる"""
+        response = client.get("/health/metrics")
+
+        assert response.status_code == 200
+        assert "queued" in response.json()["password_hashing"]
+
+
+class TestAuthHandlersOffEventLoop:
+    """認証ルートのDB処理がイベントループ上で実行されないことのテスト"""
+
+    @pytest.fixture
+    def loop_statements(self):
+        """イベントループのスレッドで実行されたSQL"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        yield statements
+        event.remove(engine, "before_cursor_execute", record)
+
+    def test_register_and_login(self, client, loop_statements):
+        """登録・ログインのDB処理はスレッドプールで実行される"""
+        register = client.post(
+            "/api/auth/register",
+            json={
+                "username": "threaded_user",
+                "email": "threaded@test.com",
+                "password": "password123",
+                "full_name": "スレッド",
+                "role": "customer",
+            },
+        )
+        login = client.post(
+            "/api/auth/login",
+            json={"username": "threaded_user", "password": "password123"},
+        )
+
+        assert register.status_code == 200
+        assert login.status_code == 200
+        assert login.json()["user"]["username"] == "threaded_user"
+        assert loop_statements == []
@@ -0,0 +1,104 @@
+"""
+店舗の公開カタログAPI（/api/public/stores/{id}/catalog）のテスト
+"""
+
+import pytest
+
+from models import Menu, MenuCategory
+from tests.conftest import count_queries
+
+
+@pytest.fixture
+def catalog_menus(db_session, store_a):
+    """カテゴリ付きのメニュー一式"""
+    sides = MenuCategory(name="サイド", store_id=store_a.id, display_order=2)
+    bento = MenuCategory(name="弁当", store_id=store_a.id, display_order=1)
+    hidden = MenuCategory(
+        name="終了", store_id=store_a.id, display_order=0, is_active=False
+    )
+    db_session.add_all([sides, bento, hidden])
+    db_session.flush()
+    db_session.add_all(
+        [
+            Menu(name="幕の内弁当", price=700, store_id=store_a.id, category_id=bento.id),
+            Menu(name="唐揚げ弁当", price=600, store_id=store_a.id, category_id=bento.id),
+            Menu(
+                name="売切れ弁当",
+                price=500,
+                store_id=store_a.id,
+                category_id=bento.id,
+                is_available=False,
+            ),
+            Menu(name="味噌汁", price=150, store_id=store_a.id, category_id=sides.id),
+            Menu(name="旧メニュー", price=400, store_id=store_a.id, category_id=hidden.id),
+            Menu(name="お茶", price=120, store_id=store_a.id),
+        ]
+    )
+    db_session.commit()
+    return {"bento": bento, "sides": sides, "hidden": hidden}
+
+
+class TestPublicStoreCatalog:
+    """公開カタログAPIのテスト"""
+
+    def test_returns_store_categories_and_menus(self, client, store_a, catalog_menus):
+        """店舗・有効なカテゴリ（表示順）・販売中メニューを1つのレスポンスで返す"""
+        response = client.get(f"/api/public/stores/{store_a.id}/catalog")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["store"]["name"] == store_a.name
+        assert [c["name"] for c in data["categories"]] == ["弁当", "サイド"]
+        assert [m["name"] for m in data["categories"][0]["menus"]] == sorted(
+            ["幕の内弁当", "唐揚げ弁当"]
+        )
+        assert [m["name"] for m in data["categories"][1]["menus"]] == ["味噌汁"]
+        # カテゴリ未設定・無効なカテゴリのメニュー
+        assert sorted(m["name"] for m in data["uncategorized_menus"]) == sorted(
+            ["お茶", "旧メニュー"]
+        )
+
+    def test_built_from_at_most_two_queries(
+        self, client, db_session, store_a, catalog_menus
+    ):
+        """未読込の店舗でも2クエリ以内で組み立てる"""
+        url = f"/api/public/stores/{store_a.id}/catalog"
+
+        with count_queries(db_session) as statements:
+            response = client.get(url)
+
+        assert response.status_code == 200
+        assert len(statements) <= 2
+
+    def test_if_none_match_returns_304(self, client, store_a, catalog_menus):
+        """ETagが一致する場合は304を返す"""
+        etag = client.get(f"/api/public/stores/{store_a.id}/catalog").headers["ETag"]
+
+        response = client.get(
+            f"/api/public/stores/{store_a.id}/catalog", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+
+    def test_menu_change_is_reflected(
+        self, client, db_session, store_a, catalog_menus
+    ):
+        """メニューの変更後は新しいカタログを返す"""
+        etag = client.get(f"/api/public/stores/{store_a.id}/catalog").headers["ETag"]
+
+        menu = db_session.query(Menu).filter_by(name="お茶").one()
+        menu.category_id = catalog_menus["sides"].id
+        db_session.commit()
+        response = client.get(
+            f"/api/public/stores/{store_a.id}/catalog", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        sides = response.json()["categories"][1]
+        assert [m["name"] for m in sides["menus"]] == sorted(["お茶", "味噌汁"])
+
+    def test_unknown_store_returns_404(self, client):
+        """存在しない店舗は404"""
+        response = client.get("/api/public/stores/99999/catalog")
+
+        assert response.status_code == 404
@@ -0,0 +1,122 @@
+"""
+公開APIのHTTPキャッシュ（ETag / 304）のテスト
+"""
+
+from models import Menu, MenuCategory
+from tests.conftest import count_queries
+
+
+class TestCatalogVersion:
+    """カタログバージョンの加算のテスト"""
+
+    def test_menu_write_bumps_store_version(self, db_session, store_a):
+        """メニューの追加・更新で店舗のバージョンが加算される"""
+        assert store_a.catalog_version == 0
+
+        menu = Menu(name="弁当", price=500, store_id=store_a.id)
+        db_session.add(menu)
+        db_session.commit()
+        assert store_a.catalog_version == 1
+
+        menu.price = 600
+        db_session.commit()
+        assert store_a.catalog_version == 2
+
+    def test_category_and_store_writes_bump_version(self, db_session, store_a):
+        """カテゴリや店舗情報の変更でも加算される"""
+        db_session.add(MenuCategory(name="定番", store_id=store_a.id))
+        db_session.commit()
+
+        store_a.name = "新店舗名"
+        db_session.commit()
+
+        assert store_a.catalog_version == 2
+
+    def test_other_store_is_not_bumped(self, db_session, store_a, store_b):
+        """他店舗のバージョンは変わらない"""
+        db_session.add(Menu(name="弁当", price=500, store_id=store_a.id))
+        db_session.commit()
+
+        assert store_b.catalog_version == 0
+
+
+class TestPublicMenusETag:
+    """公開メニュー一覧のETagのテスト"""
+
+    def test_returns_etag_and_cache_control(self, client, store_a, test_menu):
+        """ETagとCache-Controlが付与される"""
+        response = client.get(f"/api/public/stores/{store_a.id}/menus")
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('"')
+        assert "public" in response.headers["Cache-Control"]
+
+    def test_if_none_match_returns_304_without_fetching_rows(
+        self, client, db_session, store_a, test_menu
+    ):
+        """ETagが一致する場合はメニューを取得せずに304を返す"""
+        etag = client.get(f"/api/public/stores/{store_a.id}/menus").headers["ETag"]
+
+        with count_queries(db_session) as statements:
+            response = client.get(
+                f"/api/public/stores/{store_a.id}/menus",
+                headers={"If-None-Match": etag},
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert len(statements) == 1
+        assert "FROM menus" not in statements[0]
+
+    def test_menu_change_invalidates_etag(self, client, db_session, store_a, test_menu):
+        """メニューを変更するとETagが変わり200を返す"""
+        etag = client.get(f"/api/public/stores/{store_a.id}/menus").headers["ETag"]
+
+        test_menu.price = 999
+        db_session.commit()
+        response = client.get(
+            f"/api/public/stores/{store_a.id}/menus", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()[0]["price"] == 999
+
+    def test_query_parameters_change_etag(self, client, store_a, test_menu):
+        """クエリ条件が異なればETagも異なる"""
+        first = client.get(f"/api/public/stores/{store_a.id}/menus")
+        second = client.get(
+            f"/api/public/stores/{store_a.id}/menus", params={"is_available": False}
+        )
+
+        assert first.headers["ETag"] != second.headers["ETag"]
+
+    def test_unknown_store_returns_404(self, client):
+        """存在しない店舗は404"""
+        response = client.get("/api/public/stores/99999/menus")
+
+        assert response.status_code == 404
+
+
+class TestPublicStoresETag:
+    """公開店舗一覧のETagのテスト"""
+
+    def test_if_none_match_returns_304(self, client, store_a):
+        """ETagが一致する場合は304を返す"""
+        etag = client.get("/api/public/stores").headers["ETag"]
+
+        response = client.get("/api/public/stores", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_store_change_invalidates_etag(self, client, db_session, store_a):
+        """店舗の追加・変更でETagが変わる"""
+        etag = client.get("/api/public/stores").headers["ETag"]
+
+        store_a.description = "説明を更新"
+        db_session.commit()
+        response = client.get("/api/public/stores", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
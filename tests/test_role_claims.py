@@ -0,0 +1,145 @@
+"""
+アクセストークンのロールクレームのテスト
+"""
+
+from datetime import datetime, timedelta
+
+import dependencies
+from auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ROLE_CLAIMS_MAX_AGE_MINUTES,
+    create_access_token,
+    decode_token,
+)
+from models import User, UserRole
+from services.user_cache import user_cache
+
+
+def _move_store(db_session, user, store):
+    db_session.query(User).filter(User.id == user.id).update({"store_id": store.id})
+    db_session.commit()
+    user_cache.clear()
+
+
+def _remove_roles(db_session, user):
+    for user_role in db_session.query(UserRole).filter(UserRole.user_id == user.id):
+        db_session.delete(user_role)
+    db_session.commit()
+
+
+class TestRoleClaimsInToken:
+    """トークン発行時のクレームのテスト"""
+
+    def test_login_token_contains_roles_and_store_id(self, client, store_user):
+        """ログインで発行されたトークンにロールと店舗IDが含まれる"""
+        response = client.post(
+            "/api/auth/login",
+            json={"username": "store_user", "password": "password123"},
+        )
+        assert response.status_code == 200
+
+        payload = decode_token(response.json()["access_token"])
+        assert payload["roles"] == ["owner"]
+        assert payload["store_id"] == store_user.store_id
+
+    def test_role_claims_expiry_is_capped(self):
+        """ロールクレーム付きトークンの有効期限は上限を超えない"""
+        token = create_access_token(
+            {"sub": "someone"}, expires_delta=timedelta(days=1), roles=["staff"]
+        )
+
+        payload = decode_token(token)
+        max_expire = datetime.utcnow() + timedelta(minutes=ROLE_CLAIMS_MAX_AGE_MINUTES)
+        assert payload["exp"] <= max_expire.timestamp() + 1
+
+    def test_role_claims_expire_sooner_than_access_tokens(self):
+        """ロールクレーム付きトークンは通常のアクセストークンより短い有効期限になる"""
+        assert ROLE_CLAIMS_MAX_AGE_MINUTES < ACCESS_TOKEN_EXPIRE_MINUTES
+
+    def test_token_without_roles_has_no_claims(self):
+        """roles を指定しない場合はクレームを追加しない"""
+        payload = decode_token(create_access_token({"sub": "someone"}))
+
+        assert "roles" not in payload
+        assert "store_id" not in payload
+
+
+class TestRequireRoleFromClaims:
+    """require_role がクレームで判定されることのテスト"""
+
+    def test_roles_answered_from_claims(
+        self, client, db_session, store_user, auth_headers_store
+    ):
+        """DB上のロールが削除されてもトークン有効期間中はクレームで判定される"""
+        _remove_roles(db_session, store_user)
+
+        response = client.get("/api/store/menus", headers=auth_headers_store)
+
+        assert response.status_code == 200
+
+    def test_store_id_answered_from_claims(
+        self, client, db_session, store_user, store_b, test_menu, auth_headers_store
+    ):
+        """所属店舗が変更されてもトークン有効期間中はクレームの店舗で判定される"""
+        _move_store(db_session, store_user, store_b)
+
+        response = client.get("/api/store/menus", headers=auth_headers_store)
+
+        assert response.status_code == 200
+        assert [menu["name"] for menu in response.json()["menus"]] == ["テスト弁当"]
+        # クレームの値はDBに書き込まれない
+        db_session.expire_all()
+        assert db_session.get(User, store_user.id).store_id == store_b.id
+
+    def test_strict_mode_uses_db_store_for_writes(
+        self,
+        client,
+        db_session,
+        store_user,
+        store_b,
+        test_menu,
+        auth_headers_store,
+        monkeypatch,
+    ):
+        """strictモードの書き込み系リクエストはDB上の所属店舗で判定される"""
+        monkeypatch.setattr(dependencies, "ROLE_CLAIMS_STRICT", True)
+        _move_store(db_session, store_user, store_b)
+
+        response = client.put(
+            f"/api/store/menus/{test_menu.id}",
+            json={"price": 999},
+            headers=auth_headers_store,
+        )
+
+        assert response.status_code == 404
+
+    def test_strict_mode_revalidates_writes(
+        self, client, db_session, store_user, auth_headers_store, monkeypatch
+    ):
+        """strictモードでは書き込み系リクエストのみDBで再検証される"""
+        monkeypatch.setattr(dependencies, "ROLE_CLAIMS_STRICT", True)
+        _remove_roles(db_session, store_user)
+
+        read_response = client.get("/api/store/menus", headers=auth_headers_store)
+        write_response = client.post(
+            "/api/store/menus",
+            json={"name": "新メニュー", "price": 500},
+            headers=auth_headers_store,
+        )
+
+        assert read_response.status_code == 200
+        assert write_response.status_code == 403
+
+    def test_strict_mode_allows_valid_writes(
+        self, client, store_user, auth_headers_store, monkeypatch
+    ):
+        """strictモードでもDB上のロールを持つユーザーは書き込み可能"""
+        monkeypatch.setattr(dependencies, "ROLE_CLAIMS_STRICT", True)
+
+        response = client.post(
+            "/api/store/menus",
+            json={"name": "新メニュー", "price": 500},
+            headers=auth_headers_store,
+        )
+
+        assert response.status_code == 200
@@ -0,0 +1,109 @@
+"""
+リフレッシュトークン無効化（services.token_revocation）のテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from auth import create_refresh_token, decode_token
+from models import RevokedToken
+from services.token_revocation import (
+    is_token_revoked,
+    prune_expired_revocations,
+    revoke_token,
+)
+
+
+def _login(client, username="store_user"):
+    response = client.post(
+        "/api/auth/login", json={"username": username, "password": "password123"}
+    )
+    assert response.status_code == 200
+    return response.json()["refresh_token"]
+
+
+def _refresh(client, refresh_token):
+    return client.post(
+        "/api/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"}
+    )
+
+
+class TestPruneExpiredRevocations:
+    """prune_expired_revocations のテスト"""
+
+    def test_expired_entries_are_pruned(self, db_session):
+        """期限切れのレコードのみDBから削除される"""
+        past = datetime.now(timezone.utc) - timedelta(minutes=1)
+        future = datetime.now(timezone.utc) + timedelta(days=1)
+        db_session.add_all(
+            [
+                RevokedToken(jti="old", expires_at=past),
+                RevokedToken(jti="new", expires_at=future),
+            ]
+        )
+        db_session.commit()
+
+        assert prune_expired_revocations(db_session) == 1
+        assert [t.jti for t in db_session.query(RevokedToken).all()] == ["new"]
+
+
+class TestRefreshTokenRevocation:
+    """エンドポイントでの無効化のテスト"""
+
+    def test_refresh_token_has_jti(self):
+        """リフレッシュトークンにトークンIDが含まれる"""
+        payload = decode_token(create_refresh_token({"sub": "someone"}))
+
+        assert len(payload["jti"]) == 32
+
+    def test_logout_revokes_refresh_token(self, client, db_session, store_user):
+        """ログアウト時に指定したリフレッシュトークンは使用できなくなる"""
+        refresh_token = _login(client)
+
+        response = client.post(
+            "/api/auth/logout", json={"refresh_token": refresh_token}
+        )
+
+        assert response.status_code == 200
+        assert db_session.query(RevokedToken).count() == 1
+        assert _refresh(client, refresh_token).status_code == 401
+
+    def test_logout_without_body(self, client):
+        """リフレッシュトークンを指定しないログアウトも成功する"""
+        response = client.post("/api/auth/logout")
+
+        assert response.status_code == 200
+
+    def test_refresh_rotates_token(self, client, store_user):
+        """使用済みのリフレッシュトークンは再利用できない"""
+        refresh_token = _login(client)
+
+        first = _refresh(client, refresh_token)
+        second = _refresh(client, refresh_token)
+
+        assert first.status_code == 200
+        assert second.status_code == 401
+        assert _refresh(client, first.json()["refresh_token"]).status_code == 200
+
+    def test_refresh_checks_database_directly(self, client, db_session, store_user):
+        """他ワーカーでの無効化は即座に反映される"""
+        refresh_token = _login(client)
+
+        # 他ワーカーがログアウト処理で登録した行
+        payload = decode_token(refresh_token)
+        db_session.add(
+            RevokedToken(
+                jti=payload["jti"],
+                expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+            )
+        )
+        db_session.commit()
+
+        assert is_token_revoked(db_session, payload["jti"]) is True
+        assert _refresh(client, refresh_token).status_code == 401
+
+    def test_concurrent_refresh_is_rejected(self, db_session):
+        """同じトークンを同時に使用した場合は後から無効化した方が失敗する"""
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+        assert revoke_token(db_session, "shared", expires_at) is True
+        assert revoke_token(db_session, "shared", expires_at) is False
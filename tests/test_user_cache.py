@@ -0,0 +1,118 @@
+"""
+認証ユーザーキャッシュ（services.user_cache）のテスト
+"""
+
+import time
+
+from models import UserRole
+from services.user_cache import CachedPrincipal, UserPrincipalCache, user_cache
+from tests.conftest import count_queries
+
+
+def _principal(user_id: int, username: str) -> CachedPrincipal:
+    return CachedPrincipal(
+        id=user_id,
+        username=username,
+        email=f"{username}@test.com",
+        full_name=None,
+        role="store",
+        store_id=1,
+        is_active=True,
+        role_names=("owner",),
+    )
+
+
+class TestUserPrincipalCache:
+    """UserPrincipalCache 単体のテスト"""
+
+    def test_lru_eviction(self):
+        """最大件数を超えると最も古く使われたエントリが削除される"""
+        cache = UserPrincipalCache(max_size=2, ttl_seconds=60)
+        cache.set(_principal(1, "a"))
+        cache.set(_principal(2, "b"))
+        cache.get("a")
+        cache.set(_principal(3, "c"))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_ttl_expiry(self):
+        """TTLを過ぎたエントリは返されない"""
+        cache = UserPrincipalCache(max_size=10, ttl_seconds=0.01)
+        cache.set(_principal(1, "a"))
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+
+    def test_evict_by_user_id(self):
+        """ユーザーIDでエントリを削除できる"""
+        cache = UserPrincipalCache(max_size=10, ttl_seconds=60)
+        cache.set(_principal(1, "a"))
+        cache.evict(user_id=1)
+
+        assert cache.get("a") is None
+
+    def test_disabled_when_ttl_is_zero(self):
+        """TTLが0の場合はキャッシュしない"""
+        cache = UserPrincipalCache(max_size=10, ttl_seconds=0)
+        cache.set(_principal(1, "a"))
+
+        assert cache.get("a") is None
+
+
+class TestGetCurrentUserCache:
+    """get_current_user のキャッシュ動作のテスト"""
+
+    def test_cached_request_has_no_auth_queries(
+        self, client, db_session, auth_headers_customer_a
+    ):
+        """2回目以降の認証ではusersテーブルを参照しない"""
+        response = client.get("/api/customer/cart", headers=auth_headers_customer_a)
+        assert response.status_code == 200
+
+        with count_queries(db_session) as statements:
+            response = client.get("/api/customer/cart", headers=auth_headers_customer_a)
+
+        assert response.status_code == 200
+        assert not [s for s in statements if "FROM users" in s]
+
+    def test_store_roles_served_from_cache(
+        self, client, db_session, auth_headers_store
+    ):
+        """require_role のロール確認でもクエリを発行しない"""
+        client.get("/api/store/menus", headers=auth_headers_store)
+
+        with count_queries(db_session) as statements:
+            response = client.get("/api/store/menus", headers=auth_headers_store)
+
+        assert response.status_code == 200
+        assert not [
+            s for s in statements if "FROM users" in s or "user_roles" in s
+        ]
+
+    def test_user_update_evicts_cache(
+        self, client, db_session, customer_user_a, auth_headers_customer_a
+    ):
+        """ユーザーの更新でキャッシュが無効化される"""
+        client.get("/api/customer/cart", headers=auth_headers_customer_a)
+        assert user_cache.get(customer_user_a.username) is not None
+
+        customer_user_a.is_active = False
+        db_session.commit()
+
+        assert user_cache.get(customer_user_a.username) is None
+        response = client.get("/api/customer/cart", headers=auth_headers_customer_a)
+        assert response.status_code == 403
+
+    def test_role_change_evicts_cache(
+        self, client, db_session, store_user, roles, auth_headers_store
+    ):
+        """ロールの付与でキャッシュが無効化される"""
+        client.get("/api/store/menus", headers=auth_headers_store)
+        assert user_cache.get(store_user.username) is not None
+
+        db_session.add(UserRole(user_id=store_user.id, role_id=roles["manager"].id))
+        db_session.commit()
+
+        assert user_cache.get(store_user.username) is None